@@ -20,11 +20,90 @@ THINKING_BUDGET = 1024  # 추론 예산 설정 (0-24576)
 
 # === OpenAI Image Model Configuration ===
 OPENAI_IMAGE_MODEL = "gpt-image-1"  # 최신 GPT-4o 기반 이미지 생성 모델
-OPENAI_IMAGE_API_URL = "https://api.openai.com/v1/images/generations"
+OPENAI_IMAGE_API_URL = os.getenv("OPENAI_IMAGE_API_URL", "https://api.openai.com/v1/images/generations")  # 로컬 스텁 서버로 교체 가능
 DEFAULT_IMAGE_SIZE = "1024x1024"
 DEFAULT_NUM_IMAGES = 1
 DEFAULT_IMAGE_QUALITY = "low"  # gpt-image-1 지원값: low, medium, high, auto
 
+# 생성된 원본(PNG) 옆에 같은 해시로 저장하는 축소본 티어: cached_images/<hash>_<tier>.<format>
+# size: 긴 변 픽셀, quality: 인코더 품질(0-100). 요청에서 image_tier로 선택 (없으면 원본)
+IMAGE_VARIANT_TIERS = {
+    "thumb": {"size": 128, "quality": 60},
+    "small": {"size": 320, "quality": 75},
+    "medium": {"size": 640, "quality": 80},
+}
+# "webp" 또는 "avif" (AVIF 인코더가 없는 Pillow에서는 webp로 대체)
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "webp").lower()
+# 한 턴에 여러 아이템이 드랍될 때 동시에 보낼 이미지 생성 요청 수 / 턴당 최대 이미지 수
+IMAGE_MAX_CONCURRENCY = 3
+IMAGE_MAX_PER_TURN = 6
+# Blob 이미지 캐시 용량 제한 (image_cache.py). 넘으면 정책(lru: 오래전에 쓴 것, lfu: 적게 쓴 것)에 따라 삭제
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "2000"))  # 인덱스 크기(조회/저장 비용)도 제한
+IMAGE_CACHE_EVICTION = os.getenv("IMAGE_CACHE_EVICTION", "lru").lower()
+IMAGE_CACHE_EVICT_RATIO = 0.9  # 제한을 넘으면 제한의 이 비율까지 지움 (업로드마다 정리하지 않도록 여유를 둠)
+IMAGE_CACHE_PAGE_SIZE = 100   # Blob 목록/삭제 한 페이지 크기
+IMAGE_CACHE_TOUCH_BATCH = 20            # 캐시 히트 기록을 모아서 저장할 개수
+IMAGE_CACHE_TOUCH_FLUSH_SECONDS = 60    # 또는 마지막 저장 후 이 시간이 지나면 저장
+# 이미지 API/다운로드용 공유 HTTP 연결 풀 (http_pool.py). 호스트당 연결 수는 동시 요청 수 이상으로
+HTTP_POOL_HOSTS = 4       # 연결 풀을 유지할 호스트 수 (OpenAI API, 이미지 다운로드, Blob 등)
+HTTP_POOL_MAXSIZE = 8     # 호스트당 유지할 keep-alive 연결 수
+
+# === Item Image Pre-warming ===
+# 자주 나오는 보상 아이템/상점 아이템의 카드 이미지를 미리 생성해 둡니다 (image_prewarm.py).
+IMAGE_PREWARM_MAX_IMAGES = int(os.getenv("IMAGE_PREWARM_MAX_IMAGES", "3"))   # 한 번 실행에서 새로 생성할 최대 이미지 수
+IMAGE_PREWARM_MAX_SECONDS = float(os.getenv("IMAGE_PREWARM_MAX_SECONDS", "45"))  # 한 번 실행의 시간 예산
+IMAGE_PREWARM_CANDIDATES = 20   # 캐시 여부를 확인할 상위 후보 아이템 수
+# 프리워밍/이미지 캐시 관리 엔드포인트는 "Authorization: Bearer <CRON_SECRET>" 필요. 설정되지 않으면 해당 엔드포인트는 403
+CRON_SECRET = os.getenv("CRON_SECRET")
+
+# === Speculative Mode (speculation.py) ===
+# 플레이어가 입력하는 동안 컨텍스트 캐시를 데우고, 자주 쓰는 입력의 GM 응답을 미리 생성합니다. 기본 꺼짐.
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "false").lower() in ("1", "true", "yes")
+SPECULATION_MIN_REPEATS = 2          # 이 횟수 이상 제출된 입력만 응답을 미리 생성
+SPECULATION_MAX_PENDING = 4          # 동시에 유지할 미리 생성 응답 수
+SPECULATION_TTL_SECONDS = 120        # 미리 생성한 응답의 유효 시간
+SPECULATION_CACHE_MIN_CHARS = 4000   # 히스토리가 이보다 짧으면 컨텍스트 캐시를 만들지 않음 (모델 최소 토큰 수 미만)
+SPECULATION_CACHE_TTL_SECONDS = 600  # Gemini 컨텍스트 캐시 TTL
+
+# === GM Response Cache (response_cache.py) ===
+# 같은 상태에서 같은 입력이 반복되면 Gemini 호출 없이 이전 응답을 재사용합니다. 요청별로 끌 수 있음 (use_cache).
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_ENTRIES = 256      # 최대 항목 수 (넘으면 LRU로 버림)
+RESPONSE_CACHE_TTL_SECONDS = 1800     # 항목 유효 시간
+RESPONSE_CACHE_CONTEXT_MAX_CHARS = 3  # 이 길이 이하의 입력("응", "계속")은 직전 GM 응답에 따라 뜻이 달라지므로 키에 직전 응답 포함
+
+# === Retrieval Memory (memory.py) ===
+# 전체 히스토리 대신 최근 대화 창 + 지난 기록 중 이번 입력과 관련된 스니펫만 보냅니다.
+MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMORY_RECENT_ENTRIES = 20       # 항상 보내는 최근 히스토리 항목 수 (사용자/GM 각각 한 항목)
+MEMORY_WINDOW_STEP = 10          # 창 시작 위치를 이 단위로 맞춤 (요청 앞부분을 몇 턴 동안 같게 유지)
+MEMORY_TOP_K = 4                 # 턴마다 불러올 최대 스니펫 수
+MEMORY_TOKEN_BUDGET = 600        # 불러온 스니펫 전체의 대략적인 토큰 예산
+MEMORY_SNIPPET_MAX_CHARS = 400   # 스니펫 하나의 최대 길이
+
+# === Quests (quest_store.py) ===
+QUEST_ARCHIVE_MAX = 200          # 보관할 최대 완료 퀘스트 수 (넘으면 오래된 것부터 버림)
+QUEST_ARCHIVE_PAGE_SIZE = 20     # 완료 퀘스트 목록 API의 기본 페이지 크기
+
+# === HTTP ===
+RESPONSE_COMPRESSION_MIN_BYTES = 1000   # 이보다 큰 응답만 gzip/brotli로 압축
+
+# === WebSocket Game Session (game_session.py) ===
+# 연결이 열려 있는 동안 상태를 메모리에 두고 지연 저장합니다. 서버리스(Vercel)에서는 WebSocket이 동작하지 않음.
+SESSION_WS_ENABLED = os.getenv("SESSION_WS_ENABLED", "true").lower() in ("1", "true", "yes")
+SESSION_FLUSH_SECONDS = 5        # 바뀐 상태를 저장하는 주기 (프로세스 장애 시 최대 손실 시간)
+SESSION_FLUSH_MAX_TURNS = 5      # 저장하지 않은 턴이 이만큼 쌓이면 주기를 기다리지 않고 저장
+
+# === Game State Storage ===
+# "kv": Vercel KV (REDIS_URL 필요), "sqlite": 로컬 SQLite 파일 (데스크톱 클라이언트용, 네트워크 불필요)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "kv").lower()
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "game_data.db")
+
+# === Achievement Rule Packs ===
+# 추가 업적 규칙 JSON 파일 경로 (여러 개는 os.pathsep으로 구분). 예: "rules/seasonal.json"
+ACHIEVEMENT_RULES_PATH = os.getenv("ACHIEVEMENT_RULES_PATH")
+
 # === Error Handling & Validation ===
 def check_api_keys():
     """API 키가 설정되어 있는지 확인합니다."""
@@ -0,0 +1,96 @@
+# context_builder.py
+"""
+GM에게 보낼 턴 컨텍스트 구성 (웹 백엔드와 데스크톱 클라이언트 공용)
+
+현재 플레이어 상태 블록은 이번 요청에만 붙이고, 대화 기록에는 플레이어의 원래 입력만 저장합니다.
+(get_gm_response(..., history_text=user_input))
+예전에 상태 블록째로 저장된 기록은 strip_status_block / migrate_history로 정리합니다.
+"""
+
+from .inventory import inventory_lines
+
+STATUS_HEADER = "--- 현재 플레이어 상태 ---"
+PLAYER_INPUT_MARKER = "플레이어:"
+
+# 예전 웹 백엔드(build_gemini_context) 형식의 표식
+LEGACY_WEB_HEADER = "플레이어 이름:"
+LEGACY_WEB_INPUT_MARKER = "플레이어의 현재 행동 또는 대화:"
+
+# 모든 대화 기록은 GM 기본 프롬프트와 첫 인사(get_initial_history) 두 항목으로 시작합니다.
+INITIAL_HISTORY_TURNS = 2
+
+QUEST_TAG_GUIDE = """--- 퀘스트 관리 안내 ---
+새 퀘스트 추가: [QUEST_ADD: 퀘스트이름 | 설명 | 상태]
+퀘스트 완료: [QUEST_COMPLETE: 퀘스트이름]
+퀘스트 업데이트: [QUEST_UPDATE: 퀘스트이름 | 새상태 | 새설명]
+보상 지급: [REWARD: XP +30, 골드 +15, 아이템: 아이템이름]
+---"""
+
+def build_status_block(player_data, game_state=None):
+    """현재 플레이어 상태 블록을 만듭니다."""
+    title = player_data.get("title") or ""
+    stats = player_data.get("stats", {})
+    inventory = inventory_lines(player_data)
+    achievements = player_data.get("achievements") or []
+
+    # 현재 퀘스트 정보 구성
+    active_quests = player_data.get("active_quests") or []
+    if active_quests:
+        quest_info = "현재 진행 중인 퀘스트:\n"
+        for i, quest in enumerate(active_quests, 1):
+            quest_info += f"  {i}. {quest.get('name', '이름 없음')} - {quest.get('status', '진행중')}\n"
+            quest_info += f"     설명: {quest.get('description', '설명 없음')}\n"
+    else:
+        quest_info = "현재 진행 중인 퀘스트: 없음"
+
+    turn_line = f"\n현재 게임 턴: {game_state.get('game_turn', 0)}" if game_state else ""
+    return f"""{STATUS_HEADER}
+{title}레벨: {player_data.get('level', 1)} (XP: {player_data.get('xp', 0)}/{player_data.get('xp_to_next_level', 100)})
+골드: {player_data.get('gold', 0)}G
+능력치: {', '.join(f'{name} {value}' for name, value in stats.items())}
+보유 스탯 포인트: {player_data.get('stat_points', 0)}
+인벤토리: {', '.join(inventory) if inventory else '비어있음'}
+업적: {', '.join(achievements) if achievements else '없음'}{turn_line}
+
+{quest_info}"""
+
+MEMORY_HEADER = "--- 관련된 지난 기록 ---"
+
+def build_gm_context(user_input, player_data, game_state=None, memory_snippets=None):
+    """이번 턴에 GM에게 보낼 메시지(상태 블록 + 태그 안내 + 플레이어 입력)를 만듭니다.
+
+    memory_snippets: 최근 대화 창 밖의 관련 기록 (memory.recall_for_turn). 있으면 별도 섹션으로 붙입니다.
+    """
+    memory_section = ""
+    if memory_snippets:
+        memory_section = f"\n{MEMORY_HEADER}\n" + "\n\n".join(memory_snippets) + "\n---\n"
+    return f"""
+{build_status_block(player_data, game_state)}
+{memory_section}
+{QUEST_TAG_GUIDE}
+{PLAYER_INPUT_MARKER} {user_input}
+"""
+
+def strip_status_block(text):
+    """상태 블록째로 저장된 예전 사용자 턴에서 플레이어 입력만 꺼냅니다. 해당 형식이 아니면 그대로 반환합니다."""
+    if STATUS_HEADER in text and PLAYER_INPUT_MARKER in text:
+        return text.rsplit(PLAYER_INPUT_MARKER, 1)[1].strip()
+    if text.lstrip().startswith(LEGACY_WEB_HEADER) and LEGACY_WEB_INPUT_MARKER in text:
+        utterance = text.split(LEGACY_WEB_INPUT_MARKER, 1)[1].split("\n\n", 1)[0].strip()
+        if len(utterance) >= 2 and utterance[0] == utterance[-1] == "'":
+            utterance = utterance[1:-1]
+        return utterance
+    return text
+
+def migrate_history(history):
+    """직렬화된(dict) 대화 기록의 사용자 턴에서 예전 상태 블록을 제거합니다. (새 목록, 바뀐 항목 수)를 반환합니다."""
+    migrated = []
+    changed = 0
+    for index, entry in enumerate(history):
+        if index >= INITIAL_HISTORY_TURNS and isinstance(entry, dict) and entry.get("role") == "user":
+            parts = [strip_status_block(part) if isinstance(part, str) else part for part in entry.get("parts", [])]
+            if parts != entry.get("parts"):
+                entry = dict(entry, parts=parts)
+                changed += 1
+        migrated.append(entry)
+    return migrated, changed
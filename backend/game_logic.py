@@ -1,15 +1,30 @@
 # game_logic.py
 import re
+import json
 import random
+from collections import defaultdict
 
-def parse_gm_response_for_updates(response_text, player_data, game_state):
-    """GM 응답에서 Gemini 태그 기반으로 게임 상태 변경 사항을 파싱합니다."""
+from .quest_store import QuestStore, COMPLETED_STATUS
+from .inventory import parse_item_quantity, add_item, use_item, item_count, item_label, inventory_lines
+
+def parse_gm_response_for_updates(response_text, player_data, game_state, changes=None):
+    """GM 응답에서 Gemini 태그 기반으로 게임 상태 변경 사항을 파싱합니다.
+
+    changes에 set을 넘기면 변경된 player_data 필드 이름이 추가됩니다
+    (check_achievements의 증분 평가에 사용).
+    """
     # player_data is game_state["player_data"]
     # game_state is available if other parts of it are needed in the future.
     updates = []
+    if changes is None:
+        changes = set()
     
     print(f"[DEBUG] Gemini 태그 파싱 시작...")
     
+    # 퀘스트 태그는 이름 인덱스로 처리 (완료된 퀘스트는 보관함으로 이동)
+    quests = QuestStore(player_data)
+    game_turn = game_state.get("game_turn") if game_state else None
+    
     # 1. 퀘스트 추가 파싱: [QUEST_ADD: 이름 | 설명 | 상태]
     quest_add_matches = re.findall(r'\[QUEST_ADD:\s*([^|]+)\s*\|\s*([^|]+)\s*\|\s*([^\]]+)\]', response_text)
     for quest_name, description, status in quest_add_matches:
@@ -18,16 +33,8 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
         status = status.strip()
         
         # 기존 퀘스트 중복 확인
-        existing_quest_names = [q.get("name", "") for q in player_data.get("active_quests", [])]
-        if quest_name not in existing_quest_names:
-            new_quest = {
-                "name": quest_name,
-                "description": description,
-                "status": status
-            }
-            if "active_quests" not in player_data:
-                player_data["active_quests"] = []
-            player_data["active_quests"].append(new_quest)
+        if quests.add(quest_name, description, status, turn=game_turn):
+            changes.add("active_quests")
             updates.append(f"새 퀘스트 추가: {quest_name}")
             print(f"[DEBUG] 퀘스트 추가됨: {quest_name} - {description}")
     
@@ -36,14 +43,11 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
     for quest_name in quest_complete_matches:
         quest_name = quest_name.strip()
         
-        # 해당 퀘스트를 완료 상태로 변경하거나 제거
-        if "active_quests" in player_data:
-            for quest in player_data["active_quests"]:
-                if quest.get("name") == quest_name:
-                    quest["status"] = "완료"
-                    updates.append(f"퀘스트 완료: {quest_name}")
-                    print(f"[DEBUG] 퀘스트 완료됨: {quest_name}")
-                    break
+        # 진행 중 목록에서 빼서 완료 보관함으로 이동
+        if quests.complete(quest_name, turn=game_turn) is not None:
+            changes.update(("active_quests", "completed_quests"))
+            updates.append(f"퀘스트 완료: {quest_name}")
+            print(f"[DEBUG] 퀘스트 완료됨: {quest_name}")
     
     # 3. 퀘스트 업데이트 파싱: [QUEST_UPDATE: 이름 | 새상태 | 새설명]
     quest_update_matches = re.findall(r'\[QUEST_UPDATE:\s*([^|]+)\s*\|\s*([^|]+)\s*\|\s*([^\]]+)\]', response_text)
@@ -52,14 +56,12 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
         new_status = new_status.strip()
         new_description = new_description.strip()
         
-        if "active_quests" in player_data:
-            for quest in player_data["active_quests"]:
-                if quest.get("name") == quest_name:
-                    quest["status"] = new_status
-                    quest["description"] = new_description
-                    updates.append(f"퀘스트 업데이트: {quest_name}")
-                    print(f"[DEBUG] 퀘스트 업데이트됨: {quest_name} - {new_status}")
-                    break
+        if quests.update(quest_name, new_status, new_description, turn=game_turn):
+            changes.add("active_quests")
+            if new_status == COMPLETED_STATUS:
+                changes.add("completed_quests")
+            updates.append(f"퀘스트 업데이트: {quest_name}")
+            print(f"[DEBUG] 퀘스트 업데이트됨: {quest_name} - {new_status}")
     
     # 4. 보상 파싱: [REWARD: XP +30, 골드 +15, 아이템: 지식의 파편]
     reward_matches = re.findall(r'\[REWARD:\s*([^\]]+)\]', response_text)
@@ -69,6 +71,7 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
         for xp_match in xp_matches:
             new_xp = int(xp_match)
             player_data["xp"] += new_xp
+            changes.add("xp")
             updates.append(f"XP +{new_xp}")
         
         # 골드 파싱
@@ -76,15 +79,17 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
         for gold_match in gold_matches:
             new_gold = int(gold_match)
             player_data["gold"] += new_gold
+            changes.add("gold")
             updates.append(f"골드 +{new_gold}")
         
-        # 아이템 파싱
+        # 아이템 파싱 (이미 있는 아이템은 개수가 늘어남, "이름 x2" 형식의 수량 지원)
         item_matches = re.findall(r'아이템:\s*([^,\]]+)', reward_text)
-        for item_name in item_matches:
-            item_name = item_name.strip()
-            if item_name and item_name not in player_data["inventory"]:
-                player_data["inventory"].append(item_name)
-                updates.append(f"아이템 획득: {item_name}")
+        for item_text in item_matches:
+            item_name, quantity = parse_item_quantity(item_text)
+            if item_name:
+                total = add_item(player_data, item_name, quantity, turn=game_turn)
+                changes.add("inventory")
+                updates.append(f"아이템 획득: {item_label(item_name, {'count': quantity})}" + (f" (보유 {total}개)" if total > quantity else ""))
         
         print(f"[DEBUG] 보상 처리됨: {reward_text}")
     
@@ -93,12 +98,14 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
     for xp_match in xp_matches:
         new_xp = int(xp_match)
         player_data["xp"] += new_xp
+        changes.add("xp")
         updates.append(f"XP +{new_xp}")
     
     gold_matches = re.findall(r"(?:골드|G)\s*\+\s*(\d+)", response_text, re.IGNORECASE)
     for gold_match in gold_matches:
         new_gold = int(gold_match)
         player_data["gold"] += new_gold
+        changes.add("gold")
         updates.append(f"골드 +{new_gold}")
     
     print(f"[DEBUG] 태그 파싱 완료. 총 활성 퀘스트: {len(player_data.get('active_quests', []))}")
@@ -113,58 +120,134 @@ def parse_gm_response_for_updates(response_text, player_data, game_state):
         player_data["stat_points"] += 3
     
     if leveled_up:
+        changes.update(("level", "xp_to_next_level", "stat_points"))
         updates.append(f"레벨업! Lv.{player_data['level']} 달성! 능력치 포인트 +3")
     
     return updates
 
+# 이미지 생성 요청 패턴 (앞의 패턴이 우선)
+IMAGE_PROMPT_PATTERNS = [
+    re.compile(r"\(이미지\s*생성:\s*([^)]+)\)", re.IGNORECASE),
+    re.compile(r"이미지\s*생성:\s*([^\n\r]+)", re.IGNORECASE),
+    re.compile(r"\[이미지:\s*([^\]]+)\]", re.IGNORECASE),
+]
+
 def extract_image_prompt(gm_text):
     """GM 응답에서 이미지 생성 프롬프트를 추출합니다."""
     # 여러 패턴으로 이미지 생성 요청을 찾음
-    patterns = [
-        r"\(이미지\s*생성:\s*([^)]+)\)",
-        r"이미지\s*생성:\s*([^\n\r]+)",
-        r"\[이미지:\s*([^\]]+)\]"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, gm_text, re.IGNORECASE)
+    for pattern in IMAGE_PROMPT_PATTERNS:
+        match = pattern.search(gm_text)
         if match:
             return match.group(1).strip()
     
     return None
 
+def extract_image_prompts(gm_text):
+    """GM 응답의 모든 이미지 생성 프롬프트를 등장 순서대로 추출합니다 (중복 제거).
+
+    "(이미지 생성: ...)" 안의 "이미지 생성: ..."처럼 여러 패턴에 걸리는 같은 요청은
+    앞선 패턴의 매치만 사용합니다.
+    """
+    spans = []
+    for pattern in IMAGE_PROMPT_PATTERNS:
+        for match in pattern.finditer(gm_text):
+            start, end = match.span()
+            if any(start < taken_end and taken_start < end for taken_start, taken_end, _ in spans):
+                continue
+            spans.append((start, end, match.group(1).strip()))
+    
+    prompts = []
+    for _, _, prompt in sorted(spans):
+        if prompt and prompt not in prompts:
+            prompts.append(prompt)
+    return prompts
+
+def extract_reward_items(gm_text):
+    """GM 응답의 [REWARD: ...] 태그에서 아이템 이름을 등장 순서대로 추출합니다."""
+    items = []
+    for reward_text in re.findall(r'\[REWARD:\s*([^\]]+)\]', gm_text):
+        for item_text in re.findall(r'아이템:\s*([^,\]]+)', reward_text):
+            item_name = parse_item_quantity(item_text)[0]
+            if item_name:
+                items.append(item_name)
+    return items
+
+# === 능력치 별칭 인덱스 ===
+STAT_NAMES = ("힘", "지능", "의지력", "체력", "매력")
+
+# 소문자 별칭 -> 정규 능력치 이름
+STAT_ALIASES = {
+    "힘": "힘", "str": "힘", "strength": "힘",
+    "지능": "지능", "int": "지능", "intelligence": "지능",
+    "의지력": "의지력", "will": "의지력", "willpower": "의지력",
+    "체력": "체력", "hp": "체력", "health": "체력",
+    "매력": "매력", "cha": "매력", "charisma": "매력"
+}
+
+# 긴 별칭을 먼저 시도해야 "strength"가 "str"로 잘리지 않습니다.
+_NATURAL_STAT_RE = re.compile(
+    r"(" + "|".join(sorted((re.escape(alias) for alias in STAT_ALIASES), key=len, reverse=True)) + r")\s*[:=]?\s*(\d+)"
+)
+_DIGIT_RE = re.compile(r"\d")
+
+def normalize_stat_name(stat_name):
+    """능력치 별칭을 정규 이름으로 변환합니다. 알 수 없으면 None을 반환합니다."""
+    return STAT_ALIASES.get(stat_name.strip().lower())
+
 def parse_natural_language_stats(user_input):
     """자연어에서 능력치 설정을 파싱합니다."""
-    # 능력치 패턴 매칭
-    stat_patterns = {
-        "힘": [r"힘\s*[:=]?\s*(\d+)", r"str\s*[:=]?\s*(\d+)", r"strength\s*[:=]?\s*(\d+)"],
-        "지능": [r"지능\s*[:=]?\s*(\d+)", r"int\s*[:=]?\s*(\d+)", r"intelligence\s*[:=]?\s*(\d+)"],
-        "의지력": [r"의지력\s*[:=]?\s*(\d+)", r"will\s*[:=]?\s*(\d+)", r"willpower\s*[:=]?\s*(\d+)"],
-        "체력": [r"체력\s*[:=]?\s*(\d+)", r"hp\s*[:=]?\s*(\d+)", r"health\s*[:=]?\s*(\d+)"],
-        "매력": [r"매력\s*[:=]?\s*(\d+)", r"cha\s*[:=]?\s*(\d+)", r"charisma\s*[:=]?\s*(\d+)"]
-    }
-    
-    found_stats = {}
     text = user_input.lower()
-    
-    for stat_name, patterns in stat_patterns.items():
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                found_stats[stat_name] = int(match.group(1))
-                break
-    
-    return found_stats
+    # 숫자가 없으면 능력치 설정일 수 없으므로 정규식을 돌리지 않음
+    if not _DIGIT_RE.search(text):
+        return {}
+
+    found_stats = {}
+    for match in _NATURAL_STAT_RE.finditer(text):
+        stat_name = STAT_ALIASES[match.group(1)]
+        if stat_name not in found_stats:
+            found_stats[stat_name] = int(match.group(2))
 
-def process_command(user_input, player_data, game_state):
+    return {stat: found_stats[stat] for stat in STAT_NAMES if stat in found_stats}
+
+# === 명령어 레지스트리 ===
+# 명령어(소문자) -> 핸들러. 핸들러는 (args, player_data, game_state)를 받아
+# (응답 텍스트, 상태 변경 여부)를 반환합니다. args는 명령어 뒤의 토큰 목록입니다.
+COMMAND_HANDLERS = {}
+COMMAND_USAGES = {}
+
+def register_command(name, handler=None, usage=None):
+    """슬래시 명령어 핸들러를 등록합니다. 데코레이터로도 사용할 수 있습니다.
+
+    같은 이름으로 다시 등록하면 기존 핸들러를 대체하므로, 클라이언트(GUI 등)는
+    자신만의 명령어를 추가하거나 공용 명령어를 덮어쓸 수 있습니다.
+    """
+    def decorator(func):
+        key = name.lower()
+        COMMAND_HANDLERS[key] = func
+        if usage:
+            COMMAND_USAGES[key] = usage
+        return func
+
+    if handler is not None:
+        return decorator(handler)
+    return decorator
+
+def process_command(user_input, player_data, game_state=None):
     """사용자 명령어를 처리합니다."""
     # player_data is game_state["player_data"]
     # game_state is available if other parts of it are needed in the future.
-    command = user_input.lower().strip()
-    
+    command = user_input.strip()
+
+    if command.startswith("/"):
+        parts = command.split()
+        handler = COMMAND_HANDLERS.get(parts[0].lower())
+        if handler is None:
+            return None, False
+        return handler(parts[1:], player_data, game_state)
+
     # 자연어 능력치 설정 감지
-    natural_stats = parse_natural_language_stats(user_input)
-    if len(natural_stats) >= 3 and not command.startswith("/"):  # 3개 이상의 능력치가 감지되고 명령어가 아닌 경우
+    natural_stats = parse_natural_language_stats(command)
+    if len(natural_stats) >= 3:  # 3개 이상의 능력치가 감지된 경우
         total_points = sum(natural_stats.values())
         if len(natural_stats) == 5 and total_points == 25:
             player_data["stats"].update(natural_stats)
@@ -175,113 +258,108 @@ def process_command(user_input, player_data, game_state):
         elif len(natural_stats) == 5:
             return f"능력치 총합이 25가 되어야 합니다. (현재 총합: {total_points})", False
         else:
-            missing_stats = set(["힘", "지능", "의지력", "체력", "매력"]) - set(natural_stats.keys())
+            missing_stats = [stat for stat in STAT_NAMES if stat not in natural_stats]
             return f"모든 능력치를 설정해주세요. 누락된 능력치: {', '.join(missing_stats)}", False
-    
-    if command.startswith("/능력치분배"):
-        try:
-            parts = user_input.split()
-            if len(parts) < 3:
-                return "사용법: /능력치분배 [능력치] [포인트]", False
-            
-            stat_name = parts[1]
-            points = int(parts[2])
-            
-            # 능력치 이름 정규화
-            stat_map = {
-                "힘": "힘", "str": "힘", "strength": "힘",
-                "지능": "지능", "int": "지능", "intelligence": "지능",
-                "의지력": "의지력", "will": "의지력", "willpower": "의지력",
-                "체력": "체력", "hp": "체력", "health": "체력",
-                "매력": "매력", "cha": "매력", "charisma": "매력"
-            }
-            
-            normalized_stat = stat_map.get(stat_name.lower())
-            if not normalized_stat:
-                return f"유효하지 않은 능력치입니다. 가능한 능력치: {', '.join(player_data['stats'].keys())}", False
-            
-            if points <= 0 or points > player_data["stat_points"]:
-                return f"1에서 {player_data['stat_points']} 사이의 포인트를 분배할 수 있습니다.", False
-            
-            player_data["stats"][normalized_stat] += points
-            player_data["stat_points"] -= points
-            return f"{normalized_stat} +{points} (현재: {player_data['stats'][normalized_stat]})", True
-        except ValueError:
-            return "포인트는 숫자로 입력해주세요.", False
-        except Exception as e:
-            return f"능력치 분배 중 오류가 발생했습니다: {str(e)}", False
-    
-    elif command.startswith("/상점"):
-        return "상점 기능은 아직 구현 중입니다.", False
-    
-    elif command.startswith("/인벤토리"):
-        if player_data["inventory"]:
-            inventory_list = "\n".join([f"• {item}" for item in player_data["inventory"]])
-            return f"보유 아이템:\n{inventory_list}", False
+
+    return None, False
+
+@register_command("/능력치분배", usage="/능력치분배 [능력치] [포인트]")
+def _command_allocate_stat(args, player_data, game_state):
+    try:
+        if len(args) < 2:
+            return "사용법: /능력치분배 [능력치] [포인트]", False
+
+        points = int(args[1])
+        normalized_stat = normalize_stat_name(args[0])
+        if not normalized_stat:
+            return f"유효하지 않은 능력치입니다. 가능한 능력치: {', '.join(player_data['stats'].keys())}", False
+
+        if points <= 0 or points > player_data["stat_points"]:
+            return f"1에서 {player_data['stat_points']} 사이의 포인트를 분배할 수 있습니다.", False
+
+        player_data["stats"][normalized_stat] += points
+        player_data["stat_points"] -= points
+        return f"{normalized_stat} +{points} (현재: {player_data['stats'][normalized_stat]})", True
+    except ValueError:
+        return "포인트는 숫자로 입력해주세요.", False
+    except Exception as e:
+        return f"능력치 분배 중 오류가 발생했습니다: {str(e)}", False
+
+@register_command("/능력치설정", usage="/능력치설정 힘:값 지능:값 의지력:값 체력:값 매력:값")
+def _command_set_stats(args, player_data, game_state):
+    try:
+        # 사용법: /능력치설정 힘:4 지능:9 의지력:2 체력:4 매력:6
+        if not args:
+            return "사용법: /능력치설정 힘:값 지능:값 의지력:값 체력:값 매력:값", False
+
+        stat_updates = {}
+        total_points = 0
+
+        for part in args:
+            if ':' in part:
+                stat_name, value = part.split(':', 1)
+                value = int(value.strip())
+
+                normalized_stat = normalize_stat_name(stat_name)
+                if normalized_stat:
+                    stat_updates[normalized_stat] = value
+                    total_points += value
+
+        if len(stat_updates) == 5 and total_points == 25:  # 총 25포인트로 제한
+            player_data["stats"].update(stat_updates)
+            result = "능력치가 설정되었습니다:\n"
+            for stat, value in stat_updates.items():
+                result += f"• {stat}: {value}\n"
+            return result.strip(), True
         else:
-            return "인벤토리가 비어있습니다.", False
-    
-    elif command.startswith("/능력치설정"):
-        try:
-            # 사용법: /능력치설정 힘:4 지능:9 의지력:2 체력:4 매력:6
-            parts = user_input.split()[1:]  # 첫 번째 부분(명령어) 제외
-            if not parts:
-                return "사용법: /능력치설정 힘:값 지능:값 의지력:값 체력:값 매력:값", False
-            
-            stat_updates = {}
-            total_points = 0
-            
-            for part in parts:
-                if ':' in part:
-                    stat_name, value = part.split(':', 1)
-                    stat_name = stat_name.strip()
-                    value = int(value.strip())
-                    
-                    # 능력치 이름 정규화
-                    stat_map = {
-                        "힘": "힘", "str": "힘", "strength": "힘",
-                        "지능": "지능", "int": "지능", "intelligence": "지능",
-                        "의지력": "의지력", "will": "의지력", "willpower": "의지력",
-                        "체력": "체력", "hp": "체력", "health": "체력",
-                        "매력": "매력", "cha": "매력", "charisma": "매력"
-                    }
-                    
-                    normalized_stat = stat_map.get(stat_name.lower())
-                    if normalized_stat:
-                        stat_updates[normalized_stat] = value
-                        total_points += value
-            
-            if len(stat_updates) == 5 and total_points == 25:  # 총 25포인트로 제한
-                player_data["stats"].update(stat_updates)
-                result = "능력치가 설정되었습니다:\n"
-                for stat, value in stat_updates.items():
-                    result += f"• {stat}: {value}\n"
-                return result.strip(), True
-            else:
-                return f"모든 능력치를 설정하고 총합이 25가 되어야 합니다. (현재 총합: {total_points})", False
-                
-        except ValueError:
-            return "능력치 값은 숫자로 입력해주세요.", False
-        except Exception as e:
-            return f"능력치 설정 중 오류가 발생했습니다: {str(e)}", False
-    
-    elif command.startswith("/스탯"):
-        stats_text = f"""
+            return f"모든 능력치를 설정하고 총합이 25가 되어야 합니다. (현재 총합: {total_points})", False
+
+    except ValueError:
+        return "능력치 값은 숫자로 입력해주세요.", False
+    except Exception as e:
+        return f"능력치 설정 중 오류가 발생했습니다: {str(e)}", False
+
+@register_command("/상점", usage="/상점")
+def _command_shop(args, player_data, game_state):
+    return "상점 기능은 아직 구현 중입니다.", False
+
+@register_command("/인벤토리", usage="/인벤토리")
+def _command_inventory(args, player_data, game_state):
+    lines = inventory_lines(player_data)
+    if lines:
+        inventory_list = "\n".join(f"• {line}" for line in lines)
+        return f"보유 아이템:\n{inventory_list}", False
+    else:
+        return "인벤토리가 비어있습니다.", False
+
+@register_command("/사용", usage="/사용 [아이템 이름]")
+def _command_use_item(args, player_data, game_state):
+    if not args:
+        return "사용법: /사용 [아이템 이름]", False
+    item_name = " ".join(args)
+    if not use_item(player_data, item_name):
+        return f"'{item_name}' 아이템을 가지고 있지 않습니다.", False
+    remaining = item_count(player_data, item_name)
+    return f"{item_name}을(를) 사용했습니다. (남은 개수: {remaining})", True
+
+@register_command("/스탯", usage="/스탯")
+def _command_stats(args, player_data, game_state):
+    stats_lines = "\n".join(f"• {stat}: {player_data['stats'][stat]}" for stat in STAT_NAMES)
+    stats_text = f"""
 현재 캐릭터 정보:
 레벨: {player_data['level']} (XP: {player_data['xp']}/{player_data['xp_to_next_level']})
 골드: {player_data['gold']}G
 사용 가능 스탯 포인트: {player_data['stat_points']}
 
 능력치:
-• 힘: {player_data['stats']['힘']}
-• 지능: {player_data['stats']['지능']}
-• 의지력: {player_data['stats']['의지력']}
-• 체력: {player_data['stats']['체력']}
-• 매력: {player_data['stats']['매력']}
+{stats_lines}
 """
-        return stats_text.strip(), False
-    
-    return None, False
+    return stats_text.strip(), False
+
+@register_command("/도움말", usage="/도움말")
+def _command_help(args, player_data, game_state):
+    usage_lines = "\n".join(f"• {usage}" for usage in COMMAND_USAGES.values())
+    return f"사용 가능한 명령어:\n{usage_lines}", False
 
 def generate_random_quest(difficulty="normal"):
     """랜덤 퀘스트를 생성합니다."""
@@ -306,33 +384,103 @@ def generate_random_quest(difficulty="normal"):
     quests = quest_templates.get(difficulty, quest_templates["normal"])
     return random.choice(quests)
 
-def check_achievements(player_data, game_state):
-    """업적 달성 여부를 확인합니다."""
+# === 업적 규칙 레지스트리 ===
+# 규칙은 player_data의 한 필드(field)에 의존하며, 해당 필드의 값(리스트면 길이)이
+# threshold 이상이 되면 달성됩니다. 칭호가 있는 업적끼리는 priority가 높은 쪽이 우선합니다.
+DEFAULT_ACHIEVEMENT_RULES = [
+    {"name": "초보 모험가", "field": "level", "threshold": 5, "title": "[초보 모험가] ", "priority": 1},
+    {"name": "숙련된 모험가", "field": "level", "threshold": 10, "title": "[숙련된 모험가] ", "priority": 2},
+    {"name": "부자", "field": "gold", "threshold": 100},
+    {"name": "수집가", "field": "inventory", "threshold": 10},
+]
+
+ACHIEVEMENT_RULES = {}          # 업적 이름 -> 규칙
+_RULES_BY_FIELD = defaultdict(list)  # 필드 이름 -> 해당 필드에 의존하는 규칙 목록
+_TITLE_PRIORITY = {}            # 칭호 문자열 -> priority
+
+def register_achievement_rule(rule):
+    """업적 규칙을 등록합니다. 같은 이름의 규칙이 있으면 대체합니다."""
+    if not rule.get("name") or not rule.get("field") or "threshold" not in rule:
+        raise ValueError(f"업적 규칙에는 name, field, threshold가 필요합니다: {rule}")
+
+    rule = dict(rule)
+    rule.setdefault("title", None)
+    rule.setdefault("priority", 0)
+
+    previous = ACHIEVEMENT_RULES.get(rule["name"])
+    if previous is not None:
+        _RULES_BY_FIELD[previous["field"]].remove(previous)
+
+    ACHIEVEMENT_RULES[rule["name"]] = rule
+    _RULES_BY_FIELD[rule["field"]].append(rule)
+    if rule["title"]:
+        _TITLE_PRIORITY[rule["title"]] = rule["priority"]
+    return rule
+
+def load_achievement_rules(path):
+    """JSON 파일에서 업적 규칙 팩을 읽어 등록합니다. 등록된 규칙 수를 반환합니다.
+
+    파일은 규칙 목록이거나 {"rules": [...]} 형태여야 합니다.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[ACHIEVEMENTS] 업적 규칙 파일을 읽을 수 없습니다 ({path}): {e}")
+        return 0
+
+    rules = data.get("rules", []) if isinstance(data, dict) else data
+    loaded = 0
+    for rule in rules:
+        try:
+            register_achievement_rule(rule)
+            loaded += 1
+        except (ValueError, AttributeError) as e:
+            print(f"[ACHIEVEMENTS] 잘못된 업적 규칙을 건너뜁니다: {e}")
+    print(f"[ACHIEVEMENTS] {path}에서 업적 규칙 {loaded}개 로드됨")
+    return loaded
+
+for _rule in DEFAULT_ACHIEVEMENT_RULES:
+    register_achievement_rule(_rule)
+
+def _achievement_metric(player_data, field):
+    value = player_data.get(field, 0)
+    if isinstance(value, (list, dict, set)):
+        return len(value)
+    return value or 0
+
+def check_achievements(player_data, game_state, changed_fields=None):
+    """업적 달성 여부를 확인합니다.
+
+    changed_fields(parse_gm_response_for_updates가 채운 변경 필드 집합)를 넘기면
+    해당 필드에 의존하는 규칙만 평가합니다. None이면 모든 규칙을 평가합니다.
+    """
     # player_data is game_state["player_data"]
     # game_state is available if other parts of it are needed in the future.
+    if changed_fields is None:
+        rules = list(ACHIEVEMENT_RULES.values())
+    else:
+        rules = [rule for field in changed_fields for rule in _RULES_BY_FIELD.get(field, ())]
+    if not rules:
+        return []
+
+    unlocked = set(player_data["achievements"])
     new_achievements = []
-    
-    # 레벨 기반 업적
-    if player_data["level"] >= 5 and "초보 모험가" not in player_data["achievements"]:
-        player_data["achievements"].append("초보 모험가")
-        player_data["title"] = "[초보 모험가] "
-        new_achievements.append("초보 모험가")
-    
-    if player_data["level"] >= 10 and "숙련된 모험가" not in player_data["achievements"]:
-        player_data["achievements"].append("숙련된 모험가")
-        player_data["title"] = "[숙련된 모험가] "
-        new_achievements.append("숙련된 모험가")
-    
-    # 골드 기반 업적
-    if player_data["gold"] >= 100 and "부자" not in player_data["achievements"]:
-        player_data["achievements"].append("부자")
-        new_achievements.append("부자")
-    
-    # 인벤토리 기반 업적
-    if len(player_data["inventory"]) >= 10 and "수집가" not in player_data["achievements"]:
-        player_data["achievements"].append("수집가")
-        new_achievements.append("수집가")
-    
+
+    for rule in rules:
+        if rule["name"] in unlocked:
+            continue
+        if _achievement_metric(player_data, rule["field"]) < rule["threshold"]:
+            continue
+
+        unlocked.add(rule["name"])
+        player_data["achievements"].append(rule["name"])
+        new_achievements.append(rule["name"])
+
+        # 더 높은 등급의 칭호를 이미 보유 중이면 덮어쓰지 않음
+        if rule["title"] and rule["priority"] >= _TITLE_PRIORITY.get(player_data.get("title"), -1):
+            player_data["title"] = rule["title"]
+
     return new_achievements
 
 def calculate_quest_reward(difficulty, player_level):
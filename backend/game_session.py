@@ -0,0 +1,139 @@
+# game_session.py
+"""
+WebSocket 게임 세션 (메모리 작업 상태 + 지연 저장)
+
+WebSocket(/api/game/ws)이 열려 있는 동안 게임 상태를 메모리에 두고 모든 턴을 그 상태에 적용합니다.
+변경 사항은 턴마다 저장하지 않고:
+- SESSION_FLUSH_SECONDS마다 (바뀐 것이 있을 때만),
+- 저장하지 않은 턴이 SESSION_FLUSH_MAX_TURNS개 쌓이면 바로,
+- 마지막 연결이 끊길 때
+저장소에 씁니다. 프로세스가 죽으면 최대 SESSION_FLUSH_SECONDS초 / SESSION_FLUSH_MAX_TURNS턴까지 잃을 수 있습니다.
+
+세션이 열려 있는 동안 HTTP 엔드포인트도 같은 메모리 상태를 쓰도록
+(send_message는 세션 상태에 턴 적용, 상태 조회/초기화/캐릭터 생성은 flush_active/reload_active) 맞춥니다.
+서버리스(Vercel) 함수는 WebSocket을 지원하지 않으므로 uvicorn 같은 상주 서버에서만 쓸 수 있고,
+그 밖의 환경에서는 클라이언트가 HTTP로 돌아갑니다.
+"""
+
+import asyncio
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import game_state_manager as gsm
+from .config import SESSION_FLUSH_SECONDS, SESSION_FLUSH_MAX_TURNS
+
+class GameSession:
+    def __init__(self, state):
+        self.state = state
+        self.lock = asyncio.Lock()        # 턴 적용과 저장을 직렬화
+        self.connections = 0
+        self.unsaved_turns = 0
+        self.last_flush = time.monotonic()
+        self._flush_task = None
+
+    def mark_dirty(self):
+        self.unsaved_turns += 1
+
+    async def flush(self):
+        """바뀐 것이 있으면 저장합니다. lock을 잡은 상태에서 호출하지 마세요."""
+        async with self.lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self):
+        if not self.unsaved_turns:
+            return
+        saved_turns = self.unsaved_turns
+        await run_in_threadpool(gsm.save_game_state, self.state)
+        self.unsaved_turns = 0
+        self.last_flush = time.monotonic()
+        print(f"[SESSION] 저장 완료 (저장하지 않았던 턴 {saved_turns}개)")
+
+    async def after_turn(self):
+        """턴을 적용한 뒤(lock 안에서) 호출합니다. 쌓인 턴이 많으면 바로 저장합니다."""
+        if self.unsaved_turns >= SESSION_FLUSH_MAX_TURNS:
+            await self._flush_locked()
+
+    def _ensure_flush_loop(self):
+        """지연 저장 루프가 없거나 끝났으면 (다시) 시작합니다."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(SESSION_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                # 다음 주기에 다시 시도 (unsaved_turns는 그대로 유지됨)
+                print(f"[SESSION] 지연 저장 실패: {e}")
+                continue
+            if self.connections <= 0 and await _retire(self):
+                return
+
+_active = None
+_active_lock = asyncio.Lock()
+
+def get_active():
+    """열려 있는 세션 (없으면 None)."""
+    return _active
+
+async def open_session():
+    """세션에 연결합니다. 열린 세션이 없으면 저장소에서 상태를 읽어 새로 엽니다."""
+    global _active
+    async with _active_lock:
+        if _active is None:
+            state = await run_in_threadpool(gsm.load_game_state)
+            _active = GameSession(state)
+            print("[SESSION] 게임 세션 시작")
+        _active._ensure_flush_loop()
+        _active.connections += 1
+        return _active
+
+async def close_session(session):
+    """연결을 끊습니다. 마지막 연결이면 남은 변경 사항을 저장하고 세션을 닫습니다."""
+    global _active
+    async with _active_lock:
+        session.connections -= 1
+        if session.connections > 0:
+            return
+        try:
+            await session.flush()
+        except Exception as e:
+            # 저장하지 못한 턴이 남으므로 세션을 닫지 않고 지연 저장 루프가 계속 재시도하게 둠
+            print(f"[SESSION] 종료 시 저장 실패, 세션 유지: {e}")
+            session._ensure_flush_loop()
+            return
+        if session._flush_task:
+            session._flush_task.cancel()
+            session._flush_task = None
+        if _active is session:
+            _active = None
+        print("[SESSION] 게임 세션 종료")
+
+async def _retire(session):
+    """연결이 모두 끊긴 뒤 남은 변경 사항까지 저장된 세션을 닫습니다 (종료 시 저장에 실패했던 세션). 닫았으면 True."""
+    global _active
+    async with _active_lock:
+        if session.connections > 0 or session.unsaved_turns:
+            return False
+        if _active is session:
+            _active = None
+        session._flush_task = None
+    print("[SESSION] 게임 세션 종료 (지연 저장 완료)")
+    return True
+
+async def flush_active():
+    """열린 세션이 있으면 저장소와 맞춥니다 (저장소에서 직접 상태를 읽기 전에 호출)."""
+    session = _active
+    if session is not None:
+        await session.flush()
+
+async def reload_active():
+    """저장소의 상태가 세션 밖에서 바뀌었을 때(초기화, 캐릭터 생성) 세션 상태를 다시 읽습니다."""
+    session = _active
+    if session is None:
+        return
+    async with session.lock:
+        session.state = await run_in_threadpool(gsm.load_game_state)
+        session.unsaved_turns = 0
@@ -4,27 +4,65 @@ import os
 import copy
 import traceback # Added import
 import json # Ensure json is imported
-from vercel_kv import KV
+from .config import STORAGE_BACKEND, SQLITE_DB_PATH
+from .storage import KVStorage, SQLiteStorage
+from .context_builder import migrate_history
+from .quest_store import archive_completed_quests
+from .inventory import migrate_inventory
 
 # === Vercel KV Configuration ===
 GAME_STATE_KV_KEY = "rpg_game_state_user_default"
 
-# Initialize kv_store, attempting to use REDIS_URL
+# KV 클라이언트는 첫 사용 시 get_kv_store()가 생성합니다 (콜드 스타트 시 vercel_kv import/연결 생략).
 kv_store = None
-try:
-    redis_url = os.getenv("REDIS_URL")
-    print(f"[KV_INIT] Attempting to initialize KV store with REDIS_URL from env: {'********' if redis_url else None}") # Mask URL in logs
-    if not redis_url:
-        print("[KV_INIT_ERROR] REDIS_URL environment variable not found. Please ensure it is set in your Vercel environment.")
-        # Proceeding with redis_url=None, KV() constructor will likely raise an error if this is invalid.
-    
-    kv_store = KV(url=redis_url)
-    print("[KV_INIT] KV store initialized successfully.")
-except Exception as e:
-    print(f"[KV_INIT_ERROR] Failed to initialize KV store: {e}")
-    traceback.print_exc()
-    # Depending on recovery strategy, kv_store might remain None or a dummy/fallback could be used.
-    # For now, if it fails, operations using kv_store in load/save will fail and should be caught by their try-excepts.
+
+def get_kv_store():
+    """KV 저장소를 반환합니다. 아직 없으면 REDIS_URL로 생성합니다."""
+    global kv_store
+    if kv_store is not None:
+        return kv_store
+    try:
+        from vercel_kv import KV
+        redis_url = os.getenv("REDIS_URL")
+        print(f"[KV_INIT] Attempting to initialize KV store with REDIS_URL from env: {'********' if redis_url else None}") # Mask URL in logs
+        if not redis_url:
+            print("[KV_INIT_ERROR] REDIS_URL environment variable not found. Please ensure it is set in your Vercel environment.")
+            # Proceeding with redis_url=None, KV() constructor will likely raise an error if this is invalid.
+        
+        kv_store = KV(url=redis_url)
+        print("[KV_INIT] KV store initialized successfully.")
+    except Exception as e:
+        print(f"[KV_INIT_ERROR] Failed to initialize KV store: {e}")
+        traceback.print_exc()
+        # kv_store stays None; the next call retries. load/save catch the resulting errors.
+    return kv_store
+
+def set_kv_store(store):
+    """KV 저장소를 교체합니다 (테스트/벤치마크용 인메모리 KV 등). get/set을 가진 객체여야 합니다."""
+    global kv_store
+    kv_store = store
+
+# === Storage Backend ===
+# 상태 저장소는 config.STORAGE_BACKEND로 선택하며, 첫 사용 시 생성됩니다.
+_storage = None
+
+def get_storage():
+    """설정된 게임 상태 저장소(KVStorage 또는 SQLiteStorage)를 반환합니다."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "sqlite":
+            print(f"[STORAGE] Using SQLite storage: {SQLITE_DB_PATH}")
+            _storage = SQLiteStorage(SQLITE_DB_PATH)
+        else:
+            if STORAGE_BACKEND != "kv":
+                print(f"[STORAGE] Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'. Falling back to Vercel KV.")
+            _storage = KVStorage(get_kv_store)
+    return _storage
+
+def set_storage(storage):
+    """게임 상태 저장소를 교체합니다."""
+    global _storage
+    _storage = storage
 
 # === Default Game State Structures ===
 DEFAULT_PLAYER_DATA = {
@@ -41,7 +79,7 @@ DEFAULT_PLAYER_DATA = {
         "매력": 5
     },
     "stat_points": 0,
-    "inventory": [],
+    "inventory": {},  # 아이템 이름 -> {"count": 개수, "acquired_turn": 처음 얻은 턴} (inventory.py)
     "active_quests": [],
     "completed_quests": [],
     "main_story_progress": {},
@@ -100,6 +138,7 @@ DEFAULT_GAME_STATE = {
     "npcs": DEFAULT_NPCS,
     "shop_items": DEFAULT_SHOP_ITEMS,
     "game_turn": 0,
+    "state_version": 0,  # 저장할 때마다 증가 (클라이언트 패치 적용/재동기화 판단용)
     "history": []  # Gemini 대화 기록
 }
 
@@ -142,12 +181,17 @@ def deserialize_history(serialized_history):
                 ))
     return history
 
-def load_game_state():
-    """게임을 Vercel KV에서 로드합니다."""
-    print(f"[LOAD_STATE] Attempting to load game state from Vercel KV. Key: {GAME_STATE_KV_KEY}")
+def load_game_state(deserialize=True):
+    """게임을 설정된 저장소(Vercel KV 또는 SQLite)에서 로드합니다.
+
+    deserialize=False이면 history를 직렬화된 dict 목록 그대로 둡니다
+    (Gemini를 호출하지 않는 엔드포인트에서 google.genai import를 피하기 위함).
+    """
+    storage = get_storage()
+    print(f"[LOAD_STATE] Attempting to load game state from {storage.name} storage. Key: {GAME_STATE_KV_KEY}")
     try:
-        state_json_string = kv_store.get(GAME_STATE_KV_KEY)
-        print(f"[LOAD_STATE] Received from KV: {state_json_string}")
+        state_json_string = storage.load_state(GAME_STATE_KV_KEY)
+        print(f"[LOAD_STATE] Received from {storage.name}: {type(state_json_string).__name__}")
 
         state = None
         if state_json_string is None:
@@ -162,8 +206,8 @@ def load_game_state():
                 print(f"[LOAD_STATE] Error parsing JSON from KV: {e}. Returning default state.")
                 traceback.print_exc()
                 return copy.deepcopy(DEFAULT_GAME_STATE)
-        elif isinstance(state_json_string, dict): # Should not happen with current KV lib version
-            print("[LOAD_STATE] Received a dict directly from KV (unexpected). Processing as is.")
+        elif isinstance(state_json_string, dict): # SQLite storage returns a dict; KV normally returns a string
+            print(f"[LOAD_STATE] Received a dict from {storage.name}. Processing as is.")
             state = state_json_string 
         else:
             print(f"[LOAD_STATE] Unexpected data type received from KV: {type(state_json_string)}. Returning default state.")
@@ -190,6 +234,11 @@ def load_game_state():
             print(f"[LOAD_STATE] player_data is not a dict. Resetting to default player_data.") # Changed from DEBUG
             current_player_data = copy.deepcopy(DEFAULT_PLAYER_DATA)
 
+        # 예전 형식: 이름 목록 인벤토리를 이름 -> 개수 형식으로 변환
+        # (아래 기본값 보충이 dict가 아닌 인벤토리를 빈 dict로 바꾸기 전에 해야 함)
+        if "inventory" in current_player_data and migrate_inventory(current_player_data):
+            print(f"[LOAD_STATE] Converted inventory list to stacked inventory ({len(current_player_data['inventory'])} items).")
+
         for p_key, p_default_value in DEFAULT_PLAYER_DATA.items():
             if p_key not in current_player_data:
                 print(f"[LOAD_STATE] Player data key '{p_key}' missing. Initializing with default.") # Changed from DEBUG
@@ -204,10 +253,21 @@ def load_game_state():
                 print(f"[LOAD_STATE] Player data sub-structure '{p_key}' is not a dict but should be. Resetting.") # Changed from DEBUG
                 current_player_data[p_key] = copy.deepcopy(p_default_value)
 
+        # 예전 형식: active_quests에 남아 있는 완료 퀘스트를 완료 보관함으로 이동
+        archived_quests = archive_completed_quests(current_player_data)
+        if archived_quests:
+            print(f"[LOAD_STATE] Moved {archived_quests} completed quests from active_quests to completed_quests.")
+
         state["player_data"] = current_player_data
         print(f"[LOAD_STATE] Processed player_data 'initial_setup_done': {state['player_data'].get('initial_setup_done')}, Stats: {state['player_data'].get('stats')}") # Changed from DEBUG and added stats
         
-        if "history" in state and isinstance(state["history"], list):
+        # 예전 형식: 사용자 턴마다 저장된 상태 블록을 제거 (다음 저장 때 정리된 기록으로 저장됨)
+        if isinstance(state.get("history"), list):
+            state["history"], migrated_turns = migrate_history(state["history"])
+            if migrated_turns:
+                print(f"[LOAD_STATE] Stripped stale status blocks from {migrated_turns} history turns.")
+        
+        if deserialize and "history" in state and isinstance(state["history"], list):
             # print(f"[LOAD_STATE_DEBUG] Deserializing history. Length: {len(state['history'])}") # Commented out, too verbose if not debugging history specifically
             state["history"] = deserialize_history(state["history"])
         
@@ -218,9 +278,15 @@ def load_game_state():
         traceback.print_exc()
         return copy.deepcopy(DEFAULT_GAME_STATE)
 
+def bump_state_version(state):
+    """상태가 바뀌었음을 표시합니다. 새 state_version을 반환합니다."""
+    state["state_version"] = state.get("state_version", 0) + 1
+    return state["state_version"]
+
 def save_game_state(state):
-    """게임을 Vercel KV에 저장합니다."""
-    print(f"[SAVE_STATE] Attempting to save game state to Vercel KV. Key: {GAME_STATE_KV_KEY}")
+    """게임을 설정된 저장소(Vercel KV 또는 SQLite)에 저장합니다."""
+    storage = get_storage()
+    print(f"[SAVE_STATE] Attempting to save game state to {storage.name} storage. Key: {GAME_STATE_KV_KEY}")
     if not state or not state.get("player_data"):
         print(f"[SAVE_STATE] Invalid or empty state provided. Aborting save.")
         return
@@ -228,22 +294,14 @@ def save_game_state(state):
     try:
         current_state_to_save = copy.deepcopy(state)
         if "history" in current_state_to_save: # Ensure history is properly serialized
-            # print(f"[SAVE_STATE_DEBUG] Serializing history before saving. Original history length: {len(current_state_to_save['history'])}") # Commented out
             current_state_to_save["history"] = serialize_history(current_state_to_save["history"])
-            # print(f"[SAVE_STATE_DEBUG] Serialized history length: {len(current_state_to_save['history'])}") # Commented out
 
-        state_json_string = json.dumps(current_state_to_save)
-        print(f"[SAVE_STATE] State to be saved (JSON string): {state_json_string[:500]}...") # Log snippet
+        storage.save_state(GAME_STATE_KV_KEY, current_state_to_save)
+        print(f"[SAVE_STATE] Successfully saved game state to {storage.name} storage. Key: {GAME_STATE_KV_KEY}")
 
-        kv_store.set(GAME_STATE_KV_KEY, state_json_string)
-        print(f"[SAVE_STATE] Successfully saved game state to Vercel KV. Key: {GAME_STATE_KV_KEY}")
-
-    except json.JSONDecodeError as e: # Mistake: should be json.JSONEncodeError if any, but dumps usually errors on non-serializable types
-        print(f"[SAVE_STATE] Error serializing state to JSON: {e}")
-        traceback.print_exc()
     except TypeError as e: # Catching TypeErrors from json.dumps for non-serializable objects
         print(f"[SAVE_STATE] Error: Non-serializable data found in game state: {e}")
         traceback.print_exc()
     except Exception as e:
-        print(f"[SAVE_STATE] Error saving game state to Vercel KV: {e}")
+        print(f"[SAVE_STATE] Error saving game state to {storage.name} storage: {e}")
         traceback.print_exc()
@@ -1,6 +1,5 @@
 # gemini_client.py
-from google import genai
-from google.genai import types
+# google.genai는 import 비용이 크므로 실제로 필요할 때 함수 안에서 import합니다 (콜드 스타트 단축).
 from .config import GEMINI_API_KEY, GEMINI_MODEL_NAME, THINKING_BUDGET
 
 # GM 기본 프롬프트
@@ -50,16 +49,26 @@ BASE_GM_PROMPT = """
 항상 플레이어를 격려하고 게임을 즐길 수 있도록 도와주세요!
 """
 
-INITIAL_HISTORY = [
-    types.Content(
-        role='user',
-        parts=[types.Part(text=BASE_GM_PROMPT)]
-    ),
-    types.Content(
-        role='model', 
-        parts=[types.Part(text="【GM】 안녕하세요, 모험가님! 인생 RPG의 세계에 오신 것을 환영합니다! 저는 당신의 여정을 함께할 게임 마스터입니다. 😊")]
-    )
-]
+INITIAL_GM_GREETING = "【GM】 안녕하세요, 모험가님! 인생 RPG의 세계에 오신 것을 환영합니다! 저는 당신의 여정을 함께할 게임 마스터입니다. 😊"
+
+_initial_history = None
+
+def get_initial_history():
+    """초기 대화 기록(GM 프롬프트 + 인사)을 반환합니다. 첫 호출 시 한 번만 생성합니다."""
+    global _initial_history
+    if _initial_history is None:
+        from google.genai import types
+        _initial_history = [
+            types.Content(
+                role='user',
+                parts=[types.Part(text=BASE_GM_PROMPT)]
+            ),
+            types.Content(
+                role='model', 
+                parts=[types.Part(text=INITIAL_GM_GREETING)]
+            )
+        ]
+    return _initial_history
 
 _client_instance = None
 
@@ -67,20 +76,48 @@ def get_gemini_client():
     """Gemini 클라이언트 인스턴스를 가져옵니다."""
     global _client_instance
     if _client_instance is None and GEMINI_API_KEY:
+        from google import genai
         _client_instance = genai.Client(api_key=GEMINI_API_KEY)
     return _client_instance
 
-def get_gm_response(client, user_prompt_with_context, history=None):
-    """GM 응답을 받아옵니다."""
+def set_gemini_client(client):
+    """Gemini 클라이언트를 교체합니다 (테스트/벤치마크용 스크립트 클라이언트 등).
+
+    client는 client.models.generate_content(model=..., contents=..., config=...)를 지원해야 합니다.
+    """
+    global _client_instance
+    _client_instance = client
+
+def append_turn(history, user_text, model_text):
+    """history(없으면 초기 히스토리) 뒤에 사용자 턴과 GM 응답을 붙인 새 목록을 반환합니다."""
+    from google.genai import types
+    contents = list(history) if history else list(get_initial_history())
+    contents.append(types.Content(role='user', parts=[types.Part(text=user_text)]))
+    contents.append(types.Content(role='model', parts=[types.Part(text=model_text)]))
+    return contents
+
+def get_gm_response(client, user_prompt_with_context, history=None, cached_content=None, cached_turns=0,
+                    history_text=None):
+    """GM 응답을 받아옵니다.
+
+    history_text: 대화 기록에 남길 사용자 턴 텍스트 (보통 플레이어의 원래 입력).
+    user_prompt_with_context(현재 상태 블록 포함)는 이번 요청에만 보내고, 기록에는 history_text를 저장합니다.
+    주어지지 않으면 user_prompt_with_context를 그대로 저장합니다.
+    cached_content: 히스토리 앞 cached_turns개 항목을 담은 Gemini 컨텍스트 캐시 이름.
+    주어지면 나머지 항목과 새 메시지만 보내고, 캐시 사용에 실패하면 캐시 없이 한 번 다시 보냅니다.
+    반환되는 히스토리는 항상 전체 대화입니다.
+    """
     if not client:
         return "【GM】 Gemini 클라이언트가 초기화되지 않았습니다.", []
     
+    from google.genai import types
+    
     try:
         # 전체 대화 기록 구성
         if history:
             contents = list(history)  # 기존 히스토리 복사
         else:
-            contents = list(INITIAL_HISTORY)  # 초기 히스토리 사용
+            contents = list(get_initial_history())  # 초기 히스토리 사용
         
         # 사용자 메시지 추가
         contents.append(types.Content(
@@ -115,11 +152,30 @@ def get_gm_response(client, user_prompt_with_context, history=None):
             ]
         )
         
-        response = client.models.generate_content(
-            model=GEMINI_MODEL_NAME,
-            contents=contents,
-            config=config
-        )
+        request_contents = contents
+        if cached_content:
+            request_contents = contents[cached_turns:]
+            config.cached_content = cached_content
+        try:
+            response = client.models.generate_content(
+                model=GEMINI_MODEL_NAME,
+                contents=request_contents,
+                config=config
+            )
+        except Exception as e:
+            if not cached_content:
+                raise
+            print(f"컨텍스트 캐시 사용 실패, 캐시 없이 다시 요청합니다: {e}")
+            config.cached_content = None
+            response = client.models.generate_content(
+                model=GEMINI_MODEL_NAME,
+                contents=contents,
+                config=config
+            )
+        
+        # 기록에는 상태 블록 없이 저장
+        if history_text is not None:
+            contents[-1] = types.Content(role='user', parts=[types.Part(text=history_text)])
         
         # 응답 추가
         contents.append(types.Content(
@@ -134,18 +190,5 @@ def get_gm_response(client, user_prompt_with_context, history=None):
         error_response = f"【GM】 오류가 발생했습니다: {str(e)}"
         
         # 오류 발생 시에도 히스토리 유지
-        if history:
-            contents = list(history)
-        else:
-            contents = list(INITIAL_HISTORY)
-        
-        contents.append(types.Content(
-            role='user',
-            parts=[types.Part(text=user_prompt_with_context)]
-        ))
-        contents.append(types.Content(
-            role='model',
-            parts=[types.Part(text=error_response)]
-        ))
-        
-        return error_response, contents
+        user_text = user_prompt_with_context if history_text is None else history_text
+        return error_response, append_turn(history, user_text, error_response)
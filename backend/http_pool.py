@@ -0,0 +1,87 @@
+# http_pool.py
+"""
+외부 HTTP 호출용 공유 연결 풀 (OpenAI 이미지 API, 생성된 이미지/캐시 원본 다운로드)
+
+요청마다 requests.post/get을 바로 부르면 매번 새 TCP/TLS 연결을 엽니다.
+여기서는 프로세스당 하나의 requests.Session(keep-alive)을 두고 호스트별 연결 풀을 재사용합니다.
+Vercel에서도 웜 인스턴스는 모듈 상태를 유지하므로 연속된 호출 사이에 연결이 재사용됩니다.
+재사용률은 요청 수/새 연결 수로 계산해 /api/metrics에 보고합니다. 호스트 수가 HTTP_POOL_HOSTS를 넘으면
+urllib3가 오래된 풀을 버리므로, 풀 자체의 카운터 대신 풀 클래스에서 모듈 누적 카운터를 올립니다 (줄지 않음).
+
+vercel_blob SDK는 자체 HTTP 호출을 사용하므로 이 풀을 거치지 않습니다.
+"""
+
+import threading
+
+from .config import HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE
+
+_session = None
+_session_lock = threading.Lock()
+_counts_lock = threading.Lock()
+_host_counts = {}   # "scheme://host" -> {"requests": n, "connections_opened": n}
+
+def _count(scheme, host, field):
+    with _counts_lock:
+        counts = _host_counts.setdefault(f"{scheme}://{host}", {"requests": 0, "connections_opened": 0})
+        counts[field] += 1
+
+def _counting_adapter():
+    """요청/새 연결을 모듈 카운터에 더하는 연결 풀을 쓰는 HTTPAdapter."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def counting(pool_class):
+        class CountingPool(pool_class):
+            def _new_conn(self):
+                _count(self.scheme, self.host, "connections_opened")
+                return super()._new_conn()
+
+            def _make_request(self, *args, **kwargs):
+                _count(self.scheme, self.host, "requests")
+                return super()._make_request(*args, **kwargs)
+        return CountingPool
+
+    class CountingAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": counting(HTTPConnectionPool),
+                "https": counting(HTTPSConnectionPool),
+            }
+
+    # 재시도는 하지 않음: 이미지 생성 POST는 비싸고 멱등하지 않음
+    return CountingAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+
+def get_session():
+    """공유 requests.Session을 반환합니다 (첫 사용 시 생성)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                session = requests.Session()
+                adapter = _counting_adapter()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+def post(url, **kwargs):
+    return get_session().post(url, **kwargs)
+
+def metrics():
+    """호스트별 누적 요청 수, 새로 연 연결 수, 연결 재사용률 (프로세스 시작 이후)."""
+    with _counts_lock:
+        hosts = {host: dict(counts) for host, counts in _host_counts.items()}
+    total_requests = sum(host["requests"] for host in hosts.values())
+    total_connections = sum(host["connections_opened"] for host in hosts.values())
+    reuse_rate = round(1 - total_connections / total_requests, 4) if total_requests else None
+    return {
+        "requests": total_requests,
+        "connections_opened": total_connections,
+        "reuse_rate": reuse_rate,
+        "hosts": hosts,
+    }
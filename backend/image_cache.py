@@ -0,0 +1,270 @@
+# image_cache.py
+"""
+Blob 이미지 캐시 인덱스와 용량 제한
+
+이미지는 프롬프트 해시별로 cached_images/<해시>.png(원본)와 <해시>_<티어>.<형식>(축소본)으로 저장됩니다.
+인덱스는 게임 상태와 같은 저장소의 get/set을 쓰며, 값 하나가 커지지 않도록 나눠 둡니다.
+- rpg_image_cache:<해시>: {"size": 원본+축소본 바이트, "last_access": 마지막 사용 시각,
+  "hits": 사용 횟수, "refs": 아이템 카탈로그에서 참조하는 수}. 업로드/참조 변경 때 이 키만 고칩니다.
+- rpg_image_cache_usage: {"bytes", "images"} 합계. 업로드마다 용량 초과 여부를 이것만 보고 판단합니다.
+
+캐시 히트(touch)는 메모리에 모았다가 IMAGE_CACHE_TOUCH_BATCH개나 IMAGE_CACHE_TOUCH_FLUSH_SECONDS초마다
+해시별 키에 한꺼번에 반영합니다 (요청 경로에서는 dict 갱신뿐).
+
+합계가 IMAGE_CACHE_MAX_BYTES나 IMAGE_CACHE_MAX_ENTRIES를 넘으면 enforce_quota가 Blob 목록을 페이지 단위로 읽어
+(인덱스 대신 실제 Blob 기준이라 인덱스에 빠진 이미지도 포함) LRU(마지막 사용 시각) 또는 LFU(사용 횟수) 순으로
+제한의 IMAGE_CACHE_EVICT_RATIO까지 지우고 합계를 목록 기준으로 다시 맞춥니다.
+여러 인스턴스가 동시에 합계를 고치면 일부 증가분이 빠질 수 있지만, 정리할 때마다 목록으로 바로잡힙니다.
+카탈로그가 참조하는(refs > 0) 이미지는 참조 없는 이미지를 다 지운 뒤에만 지웁니다.
+
+blob_store는 openai_image_client.get_blob_store()의 저장소이며, 여기서는 put/head 외에
+list(prefix=..., limit=..., cursor=...) -> {"blobs": [{"url", "pathname", "size"}...], "cursor", "hasMore"}와
+delete(URL 목록)을 사용합니다.
+"""
+
+import json
+import re
+import threading
+import time
+
+from . import game_state_manager as gsm
+from .config import (
+    IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_MAX_ENTRIES, IMAGE_CACHE_EVICTION, IMAGE_CACHE_EVICT_RATIO,
+    IMAGE_CACHE_PAGE_SIZE, IMAGE_CACHE_TOUCH_BATCH, IMAGE_CACHE_TOUCH_FLUSH_SECONDS
+)
+
+IMAGE_CACHE_ENTRY_PREFIX = "rpg_image_cache:"
+IMAGE_CACHE_USAGE_KEY = "rpg_image_cache_usage"
+IMAGE_CACHE_PREFIX = "cached_images/"
+
+# cached_images/<md5>.png, cached_images/<md5>_<티어>.<형식>
+_PATHNAME_RE = re.compile(r"cached_images/([0-9a-f]{32})(?:_[^/.]+)?\.\w+")
+
+# 같은 프로세스 안의 동시 갱신(이미지 동시 생성 스레드)을 직렬화
+_index_lock = threading.Lock()
+
+# 아직 저장하지 않은 캐시 히트 {해시: (마지막 사용 시각, 횟수)}
+_pending_touches = {}
+_last_touch_flush = time.monotonic()
+
+def prompt_hash_of(pathname_or_url):
+    """Blob pathname이나 URL에서 프롬프트 해시를 꺼냅니다. 캐시 이미지가 아니면 None."""
+    match = _PATHNAME_RE.search(pathname_or_url or "")
+    return match.group(1) if match else None
+
+def _load_json(key):
+    try:
+        raw = gsm.get_storage().get(key)
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        return raw if isinstance(raw, dict) else None
+    except Exception as e:
+        print(f"[IMAGE_CACHE] 인덱스 로드 실패 ({key}): {e}")
+        return None
+
+def _save_json(key, value):
+    try:
+        gsm.get_storage().set(key, json.dumps(value))
+    except Exception as e:
+        print(f"[IMAGE_CACHE] 인덱스 저장 실패 ({key}): {e}")
+
+def load_entry(prompt_hash):
+    """해시의 인덱스 항목 (없으면 None)."""
+    return _load_json(IMAGE_CACHE_ENTRY_PREFIX + prompt_hash)
+
+def _save_entry(prompt_hash, entry):
+    # 저장소에 삭제가 없으므로 지운 항목은 null로 둠 (load_entry가 None으로 읽음)
+    _save_json(IMAGE_CACHE_ENTRY_PREFIX + prompt_hash, entry)
+
+def _new_entry(now):
+    return {"size": 0, "last_access": now, "hits": 0, "refs": 0}
+
+def load_usage():
+    usage = _load_json(IMAGE_CACHE_USAGE_KEY) or {}
+    return {"bytes": usage.get("bytes", 0), "images": usage.get("images", 0)}
+
+def record_upload(prompt_hash, uploads):
+    """업로드한 Blob들을 인덱스와 합계에 더합니다. uploads: {pathname: (URL, 바이트 수)}"""
+    added = sum(size for _, size in uploads.values())
+    now = time.time()
+    with _index_lock:
+        entry = load_entry(prompt_hash) or _new_entry(now)
+        new_image = entry["size"] == 0
+        entry["size"] += added
+        entry["last_access"] = now
+        _save_entry(prompt_hash, entry)
+        usage = load_usage()
+        usage["bytes"] += added
+        usage["images"] += 1 if new_image else 0
+        _save_json(IMAGE_CACHE_USAGE_KEY, usage)
+
+def touch(pathname_or_url):
+    """캐시 히트를 기록합니다 (LRU 시각, LFU 횟수). 메모리에 모았다가 한꺼번에 저장합니다."""
+    prompt_hash = prompt_hash_of(pathname_or_url)
+    if not prompt_hash:
+        return
+    with _index_lock:
+        _, hits = _pending_touches.get(prompt_hash, (0, 0))
+        _pending_touches[prompt_hash] = (time.time(), hits + 1)
+        due = len(_pending_touches) >= IMAGE_CACHE_TOUCH_BATCH or \
+            time.monotonic() - _last_touch_flush >= IMAGE_CACHE_TOUCH_FLUSH_SECONDS
+    if due:
+        flush_touches()
+
+def flush_touches():
+    """모아 둔 캐시 히트를 해시별 항목에 반영합니다."""
+    global _last_touch_flush
+    with _index_lock:
+        touches = dict(_pending_touches)
+        _pending_touches.clear()
+        _last_touch_flush = time.monotonic()
+        for prompt_hash, (last_access, hits) in touches.items():
+            entry = load_entry(prompt_hash) or _new_entry(last_access)
+            entry["last_access"] = max(entry["last_access"], last_access)
+            entry["hits"] += hits
+            _save_entry(prompt_hash, entry)
+
+def change_refs(added_urls=(), removed_urls=()):
+    """아이템 카탈로그가 참조하는 이미지 URL이 바뀌었을 때 참조 수를 갱신합니다."""
+    changes = {}
+    for url, delta in [(url, 1) for url in added_urls] + [(url, -1) for url in removed_urls]:
+        prompt_hash = prompt_hash_of(url)
+        if prompt_hash:
+            changes[prompt_hash] = changes.get(prompt_hash, 0) + delta
+    now = time.time()
+    with _index_lock:
+        for prompt_hash, delta in changes.items():
+            if not delta:
+                continue
+            entry = load_entry(prompt_hash) or _new_entry(now)
+            entry["refs"] = max(0, entry["refs"] + delta)
+            _save_entry(prompt_hash, entry)
+
+def _eviction_key(entry):
+    # 참조 없는 이미지부터, 그 안에서는 정책에 따라 오래전에 쓴 것(LRU) / 적게 쓴 것(LFU)부터
+    if IMAGE_CACHE_EVICTION == "lfu":
+        return (entry["refs"] > 0, entry["hits"], entry["last_access"])
+    return (entry["refs"] > 0, entry["last_access"])
+
+def usage():
+    return dict(
+        load_usage(),
+        max_bytes=IMAGE_CACHE_MAX_BYTES,
+        max_images=IMAGE_CACHE_MAX_ENTRIES,
+        eviction=IMAGE_CACHE_EVICTION,
+    )
+
+def _listed_images(blob_store, limit=IMAGE_CACHE_PAGE_SIZE):
+    """Blob 목록을 해시별로 모읍니다. {해시: {"urls": [...], "size": 바이트}}"""
+    images = {}
+    for page in iter_pages(blob_store, limit):
+        for blob in page["blobs"]:
+            prompt_hash = prompt_hash_of(blob["pathname"])
+            if prompt_hash:
+                image = images.setdefault(prompt_hash, {"urls": [], "size": 0})
+                image["urls"].append(blob["url"])
+                image["size"] += blob["size"]
+    return images
+
+def enforce_quota(blob_store, keep=(), max_bytes=IMAGE_CACHE_MAX_BYTES, max_entries=IMAGE_CACHE_MAX_ENTRIES):
+    """합계가 제한을 넘었으면 제한의 IMAGE_CACHE_EVICT_RATIO까지 이미지를 지웁니다. 지운 이미지의 URL 목록을 반환합니다.
+
+    keep: 지우지 않을 프롬프트 해시 (방금 올린 이미지. LFU에서는 사용 횟수 0이라 가장 먼저 지워지므로)
+    """
+    current = load_usage()
+    if current["bytes"] <= max_bytes and current["images"] <= max_entries:
+        return []
+
+    flush_touches()
+    images = _listed_images(blob_store)
+    entries = {prompt_hash: load_entry(prompt_hash) for prompt_hash in images}
+    # 인덱스에 없는 이미지(예전 캐시, 다른 인스턴스와 어긋난 경우)는 가장 먼저 지움
+    missing = {"last_access": 0, "hits": 0, "refs": 0}
+    total = sum(image["size"] for image in images.values())
+    count = len(images)
+    target_bytes = int(max_bytes * IMAGE_CACHE_EVICT_RATIO)
+    target_count = int(max_entries * IMAGE_CACHE_EVICT_RATIO)
+
+    evicted_urls = []
+    for prompt_hash in sorted(images, key=lambda h: _eviction_key(entries[h] or missing)):
+        if total <= target_bytes and count <= target_count:
+            break
+        if prompt_hash in keep:
+            continue
+        try:
+            blob_store.delete(images[prompt_hash]["urls"])
+        except Exception as e:
+            print(f"[IMAGE_CACHE] 이미지 삭제 실패 ({prompt_hash}): {e}")
+            continue
+        evicted_urls += images[prompt_hash]["urls"]
+        total -= images[prompt_hash]["size"]
+        count -= 1
+        with _index_lock:
+            _save_entry(prompt_hash, None)
+
+    with _index_lock:
+        _save_json(IMAGE_CACHE_USAGE_KEY, {"bytes": total, "images": count})
+    print(f"[IMAGE_CACHE] 용량 초과로 이미지 파일 {len(evicted_urls)}개 삭제 (남은 용량 {total}B, 이미지 {count}개)")
+    return evicted_urls
+
+# --- Blob 목록/삭제 (페이지 단위) ---
+
+def list_page(blob_store, cursor=None, limit=IMAGE_CACHE_PAGE_SIZE):
+    """캐시 이미지 Blob 한 페이지. {"blobs": [...], "cursor": 다음 커서 또는 None, "has_more": bool}"""
+    result = blob_store.list(prefix=IMAGE_CACHE_PREFIX, limit=limit, cursor=cursor)
+    return {
+        "blobs": [
+            {"url": blob["url"], "pathname": blob["pathname"], "size": blob.get("size", 0)}
+            for blob in result.get("blobs", [])
+        ],
+        "cursor": result.get("cursor"),
+        "has_more": bool(result.get("hasMore")),
+    }
+
+def iter_pages(blob_store, limit=IMAGE_CACHE_PAGE_SIZE):
+    cursor = None
+    while True:
+        page = list_page(blob_store, cursor, limit)
+        yield page
+        if not page["has_more"] or not page["cursor"]:
+            return
+        cursor = page["cursor"]
+
+def delete_all(blob_store, limit=IMAGE_CACHE_PAGE_SIZE):
+    """캐시 이미지를 페이지 단위로 모두 지우고 인덱스를 비웁니다. 지운 Blob 수를 반환합니다."""
+    deleted = 0
+    # 지우면서 목록이 바뀌므로 커서 없이 첫 페이지를 반복해서 가져옴
+    while True:
+        page = list_page(blob_store, None, limit)
+        urls = [blob["url"] for blob in page["blobs"]]
+        if not urls:
+            break
+        blob_store.delete(urls)
+        deleted += len(urls)
+        with _index_lock:
+            for prompt_hash in {prompt_hash_of(blob["pathname"]) for blob in page["blobs"]} - {None}:
+                _save_entry(prompt_hash, None)
+        if not page["has_more"]:
+            break
+    with _index_lock:
+        _pending_touches.clear()
+        _save_json(IMAGE_CACHE_USAGE_KEY, {"bytes": 0, "images": 0})
+    print(f"[IMAGE_CACHE] 캐시 이미지 {deleted}개 삭제")
+    return deleted
+
+def rebuild_index(blob_store, limit=IMAGE_CACHE_PAGE_SIZE):
+    """Blob 목록으로 해시별 크기와 합계를 다시 맞춥니다. 사용 기록과 참조 수는 유지합니다."""
+    flush_touches()
+    images = _listed_images(blob_store, limit)
+    now = time.time()
+    with _index_lock:
+        for prompt_hash, image in images.items():
+            entry = load_entry(prompt_hash) or _new_entry(now)
+            if entry["size"] != image["size"]:
+                entry["size"] = image["size"]
+                _save_entry(prompt_hash, entry)
+        _save_json(IMAGE_CACHE_USAGE_KEY, {
+            "bytes": sum(image["size"] for image in images.values()),
+            "images": len(images),
+        })
+    return usage()
@@ -0,0 +1,126 @@
+# image_prewarm.py
+"""
+아이템 카드 이미지 프리워밍
+
+보상 태그([REWARD: ... 아이템: X])에 나온 아이템 이름을 세어 두었다가, 한가할 때
+가장 자주 나온 아이템과 상점 아이템(DEFAULT_SHOP_ITEMS)의 카드 이미지를 예산 안에서 미리 생성합니다.
+GM은 기본 프롬프트에 따라 "(이미지 생성: 아이템 이름, 게임 아이템 카드 스타일, 판타지풍, 빛나는 효과)"
+형식으로 이미지를 요청하므로, 같은 형식의 프롬프트로 만들어 두면 처음 획득할 때 바로 캐시 히트가 납니다.
+
+- record_reward_items(gm_text): 턴마다 보상 아이템 등장 횟수를 저장소에 누적
+- prewarm_item_images(): 캐시에 없는 상위 후보 이미지를 max_images개 / max_seconds초 안에서 생성
+- generate_item_images(prompts): 턴의 이미지 요청. GM 프롬프트는 매번 문구가 달라 그대로는 캐시 키가
+  맞지 않으므로, 프롬프트의 아이템 이름으로 미리 만든 이미지를 먼저 찾고 없을 때만 GM 프롬프트로 생성
+"""
+
+import json
+import time
+from collections import Counter
+
+from . import game_logic
+from . import game_state_manager as gsm
+from . import image_cache
+from . import item_catalog
+from . import openai_image_client
+from .config import IMAGE_PREWARM_MAX_IMAGES, IMAGE_PREWARM_MAX_SECONDS, IMAGE_PREWARM_CANDIDATES
+
+# 아이템 등장 횟수를 저장하는 키 (게임 상태와 같은 저장소의 get/set 사용)
+ITEM_COUNTS_KEY = "rpg_image_prewarm_item_counts"
+
+# BASE_GM_PROMPT의 아이템 이미지 요청 형식과 같아야 캐시 키(프롬프트 해시)가 일치합니다.
+ITEM_IMAGE_STYLE = "게임 아이템 카드 스타일, 판타지풍, 빛나는 효과"
+
+def item_image_prompt(item_name):
+    """GM이 아이템 드랍 시 쓰는 것과 같은 형식의 이미지 프롬프트를 만듭니다."""
+    return f"{item_name}, {ITEM_IMAGE_STYLE}"
+
+def item_name_from_prompt(prompt):
+    """GM 이미지 프롬프트("아이템 이름, 게임 아이템 카드 스타일, ...")의 아이템 이름."""
+    return prompt.split(",", 1)[0].strip()
+
+def find_item_image(prompt, tier=None):
+    """프롬프트의 아이템 이름으로 미리 만든 이미지가 있으면 URL, 없으면 None."""
+    item_name = item_name_from_prompt(prompt)
+    item_prompt = item_image_prompt(item_name) if item_name else None
+    if not item_prompt or item_prompt == prompt:
+        return None  # 같은 프롬프트면 generate_image가 캐시를 확인함
+    image_url = openai_image_client.cached_image_url(item_prompt, tier)
+    if image_url:
+        image_cache.touch(image_url)
+    return image_url
+
+def generate_item_image(prompt, tier=None):
+    """아이템 이름으로 미리 만든 이미지를 쓰고, 없으면 GM 프롬프트로 생성합니다. (url, error)"""
+    image_url = find_item_image(prompt, tier)
+    if image_url:
+        return image_url, None
+    return openai_image_client.generate_image(prompt, tier)
+
+def generate_item_images(prompts, tier=None):
+    """generate_item_image의 여러 프롬프트 버전. 생성이 필요한 것만 generate_images로 동시에 요청합니다."""
+    results = [None] * len(prompts)
+    missing = []
+    for index, prompt in enumerate(prompts):
+        image_url = find_item_image(prompt, tier)
+        if image_url:
+            results[index] = (image_url, None)
+        else:
+            missing.append(index)
+    generated = openai_image_client.generate_images([prompts[index] for index in missing], tier)
+    for index, result in zip(missing, generated):
+        results[index] = result
+    return results
+
+def load_item_counts():
+    """저장된 아이템 등장 횟수를 Counter로 반환합니다."""
+    try:
+        stored = gsm.get_storage().get(ITEM_COUNTS_KEY)
+        return Counter(json.loads(stored) if stored else {})
+    except Exception as e:
+        print(f"[PREWARM] 아이템 통계 로드 실패: {e}")
+        return Counter()
+
+def record_reward_items(gm_text):
+    """GM 응답의 보상 아이템을 등장 횟수에 더합니다. 기록한 아이템 목록을 반환합니다."""
+    items = game_logic.extract_reward_items(gm_text)
+    if not items:
+        return []
+    counts = load_item_counts()
+    counts.update(items)
+    try:
+        gsm.get_storage().set(ITEM_COUNTS_KEY, json.dumps(counts, ensure_ascii=False))
+    except Exception as e:
+        print(f"[PREWARM] 아이템 통계 저장 실패: {e}")
+    return items
+
+def candidate_items(counts=None, shop_items=None, limit=IMAGE_PREWARM_CANDIDATES):
+    """프리워밍 후보 아이템 이름을 우선순위 순으로 반환합니다 (많이 나온 보상 아이템 -> 상점 아이템)."""
+    counts = load_item_counts() if counts is None else counts
+    shop_items = gsm.DEFAULT_SHOP_ITEMS if shop_items is None else shop_items
+    candidates = [name for name, _ in counts.most_common()]
+    candidates += [item["name"] for item in shop_items if item.get("name")]
+    return list(dict.fromkeys(candidates))[:limit]
+
+def prewarm_item_images(max_images=IMAGE_PREWARM_MAX_IMAGES, max_seconds=IMAGE_PREWARM_MAX_SECONDS, shop_items=None):
+    """캐시에 없는 후보 아이템 이미지를 예산 안에서 생성합니다. 실행 요약 dict를 반환합니다."""
+    started = time.monotonic()
+    summary = {"checked": 0, "cached": 0, "generated": [], "failed": [], "budget_exhausted": False}
+    for item_name in candidate_items(shop_items=shop_items):
+        if len(summary["generated"]) >= max_images or time.monotonic() - started >= max_seconds:
+            summary["budget_exhausted"] = True
+            break
+        prompt = item_image_prompt(item_name)
+        summary["checked"] += 1
+        if openai_image_client.cached_image_url(prompt):
+            summary["cached"] += 1
+            continue
+        image_url, error = openai_image_client.generate_image(prompt)
+        if image_url:
+            summary["generated"].append(item_name)
+            item_catalog.learn_items([], {item_name: image_url})
+        else:
+            summary["failed"].append(item_name)
+            print(f"[PREWARM] {item_name} 이미지 생성 실패: {error}")
+    summary["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    print(f"[PREWARM] 확인 {summary['checked']}개, 캐시됨 {summary['cached']}개, 생성 {len(summary['generated'])}개")
+    return summary
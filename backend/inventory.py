@@ -0,0 +1,83 @@
+# inventory.py
+"""
+인벤토리
+
+player_data["inventory"]는 아이템 이름 -> {"count": 개수, "acquired_turn": 처음 얻은 턴}
+dict입니다 (JSON에서도 얻은 순서 유지). 같은 아이템을 또 받으면 개수만 늘어나고,
+추가/제거/사용은 이름으로 바로 처리합니다. 예전 저장 형식(이름 문자열 목록)은 migrate_inventory로 변환합니다.
+아이템 설명/이미지 같은 메타데이터는 item_catalog.py에 있습니다.
+"""
+
+import re
+
+# "물약 x2", "물약 ×2", "물약 2개" 형식의 수량
+_QUANTITY_RE = re.compile(r"^(.*?)\s*(?:[xX×]\s*(\d+)|(\d+)\s*개)$")
+
+def parse_item_quantity(text):
+    """보상 아이템 문자열에서 (이름, 수량)을 꺼냅니다. 수량이 없으면 1."""
+    text = text.strip()
+    match = _QUANTITY_RE.match(text)
+    if match and match.group(1):
+        return match.group(1).strip(), int(match.group(2) or match.group(3))
+    return text, 1
+
+# --- 인벤토리 ---
+
+def normalize_inventory(inventory):
+    """예전 형식(이름 목록)이나 손상된 값을 이름 -> 항목 dict로 바꿉니다. 중복된 이름은 개수로 합칩니다."""
+    if isinstance(inventory, dict):
+        return inventory
+    stacked = {}
+    for item in inventory or []:
+        name = item.get("name") if isinstance(item, dict) else item
+        if not name:
+            continue
+        entry = stacked.setdefault(name, {"count": 0, "acquired_turn": None})
+        entry["count"] += 1
+    return stacked
+
+def migrate_inventory(player_data):
+    """player_data의 인벤토리를 dict 형식으로 바꿉니다. 바뀌었으면 True."""
+    inventory = player_data.get("inventory")
+    if isinstance(inventory, dict):
+        return False
+    player_data["inventory"] = normalize_inventory(inventory)
+    return True
+
+def add_item(player_data, name, count=1, turn=None):
+    """아이템을 count개 추가합니다. 추가 후 개수를 반환합니다."""
+    inventory = player_data.setdefault("inventory", {})
+    entry = inventory.get(name)
+    if entry is None:
+        entry = inventory[name] = {"count": 0, "acquired_turn": turn}
+    entry["count"] += count
+    return entry["count"]
+
+def remove_item(player_data, name, count=1):
+    """아이템을 count개 제거합니다. 개수가 부족하면 아무것도 하지 않고 False. 0개가 되면 항목을 지웁니다."""
+    inventory = player_data.get("inventory") or {}
+    entry = inventory.get(name)
+    if entry is None or entry["count"] < count:
+        return False
+    entry["count"] -= count
+    if entry["count"] <= 0:
+        del inventory[name]
+    return True
+
+def use_item(player_data, name):
+    """아이템 하나를 사용(소모)합니다. 보유하지 않았으면 False."""
+    return remove_item(player_data, name, 1)
+
+def item_count(player_data, name):
+    entry = (player_data.get("inventory") or {}).get(name)
+    return entry["count"] if entry else 0
+
+def item_label(name, entry):
+    """목록에 표시할 이름 ("물약 x3", 한 개면 이름만)."""
+    count = entry.get("count", 1) if isinstance(entry, dict) else 1
+    return f"{name} x{count}" if count > 1 else name
+
+def inventory_lines(player_data):
+    """인벤토리를 얻은 순서대로 표시용 문자열 목록으로 만듭니다."""
+    inventory = normalize_inventory(player_data.get("inventory"))
+    return [item_label(name, entry) for name, entry in inventory.items()]
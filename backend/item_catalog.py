@@ -0,0 +1,84 @@
+# item_catalog.py
+"""
+아이템 카탈로그
+
+상점 아이템(DEFAULT_SHOP_ITEMS)과 [REWARD] 태그로 처음 알게 된 아이템, 그 카드 이미지 URL을 합친 목록입니다.
+보상으로 알게 된 아이템은 게임 상태와 같은 저장소의 get/set으로 저장합니다.
+인벤토리(inventory.py)에는 이름과 개수만 두고, 표시할 설명/이미지는 이 카탈로그에서 찾습니다.
+"""
+
+import json
+
+from . import game_state_manager as gsm
+from . import image_cache
+
+# 보상으로 알게 된 아이템 {이름: {"image_url": URL 또는 None}}
+ITEM_CATALOG_KEY = "rpg_item_catalog"
+
+def load_learned_items():
+    try:
+        raw = gsm.get_storage().get(ITEM_CATALOG_KEY)
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        return raw if isinstance(raw, dict) else {}
+    except Exception as e:
+        print(f"[ITEM_CATALOG] 카탈로그 로드 실패: {e}")
+        return {}
+
+def learn_items(item_names, image_urls=None):
+    """보상으로 나온 아이템과 카드 이미지 URL을 카탈로그에 기록합니다. 바뀐 것이 있을 때만 저장합니다.
+
+    image_urls: {아이템 이름: 이미지 URL}
+    """
+    image_urls = image_urls or {}
+    if not item_names and not image_urls:
+        return
+    learned = load_learned_items()
+    changed = False
+    added_urls, removed_urls = [], []
+    for name in item_names:
+        if name not in learned:
+            learned[name] = {"image_url": None}
+            changed = True
+    for name, url in image_urls.items():
+        entry = learned.setdefault(name, {"image_url": None})
+        if url and entry.get("image_url") != url:
+            if entry.get("image_url"):
+                removed_urls.append(entry["image_url"])
+            added_urls.append(url)
+            entry["image_url"] = url
+            changed = True
+    if not changed:
+        return
+    _save_learned_items(learned)
+    # 카탈로그가 참조하는 이미지는 캐시 용량 정리 때 나중에 지워지도록 참조 수 기록
+    image_cache.change_refs(added_urls, removed_urls)
+
+def _save_learned_items(learned):
+    try:
+        gsm.get_storage().set(ITEM_CATALOG_KEY, json.dumps(learned, ensure_ascii=False))
+    except Exception as e:
+        print(f"[ITEM_CATALOG] 카탈로그 저장 실패: {e}")
+
+def forget_image_urls(urls):
+    """이미지 캐시에서 지워진 URL을 카탈로그에서 뺍니다. urls가 None이면 모든 이미지 URL을 뺍니다."""
+    urls = None if urls is None else set(urls)
+    learned = load_learned_items()
+    changed = False
+    for entry in learned.values():
+        if entry.get("image_url") and (urls is None or entry["image_url"] in urls):
+            entry["image_url"] = None
+            changed = True
+    if changed:
+        _save_learned_items(learned)
+
+def build_catalog(shop_items=None):
+    """상점 아이템과 보상으로 알게 된 아이템을 합친 카탈로그 {이름: 정보}."""
+    catalog = {}
+    for item in shop_items if shop_items is not None else gsm.DEFAULT_SHOP_ITEMS:
+        catalog[item["name"]] = dict(item, source="shop", image_url=None)
+    for name, info in load_learned_items().items():
+        entry = catalog.setdefault(name, {"name": name, "source": "reward", "image_url": None})
+        if info.get("image_url"):
+            entry["image_url"] = info["image_url"]
+    return catalog
@@ -1,22 +1,47 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Header, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.concurrency import run_in_threadpool
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Dict, Any, Optional
 import copy
+import hmac
+import os
 
 # Assuming these modules are in the same directory or properly installed
 from . import game_state_manager as gsm
 from . import gemini_client as gem_client_module # Renamed to avoid conflict
 from . import openai_image_client
 from . import game_logic
+from . import image_prewarm
+from . import speculation
+from . import memory
+from . import response_cache
+from . import quest_store
+from . import item_catalog
+from . import game_session
+from . import http_pool
+from . import image_cache
+from .context_builder import build_gm_context
+from .state_patch import merge_patch
+from .config import (
+    ACHIEVEMENT_RULES_PATH, IMAGE_MAX_PER_TURN, CRON_SECRET, QUEST_ARCHIVE_PAGE_SIZE, RESPONSE_COMPRESSION_MIN_BYTES,
+    SESSION_WS_ENABLED
+)
 # from .config import GEMINI_API_KEY, OPENAI_API_KEY # Not directly used here if clients handle them
 
 # --- Pydantic Models ---
 
 class PlayerMessage(BaseModel):
     message: str
+    image_tier: Optional[str] = None # 아이템 이미지 축소본 티어 (config.IMAGE_VARIANT_TIERS), 없으면 원본
+    use_cache: bool = True # False면 응답 캐시를 건너뛰고 항상 Gemini에 요청
+    known_version: Optional[int] = None # 클라이언트가 가진 state_version. 현재 버전과 같으면 변경분(player_patch)만 응답
     # user_id: Optional[str] = None # Future consideration
 
+class TypingUpdate(BaseModel):
+    partial: str # 플레이어가 입력 중인 텍스트 (디바운스됨)
+
 class StatAllocation(BaseModel):
     stats: Dict[str, int] = Field(..., example={"힘": 10, "지능": 10, "의지력": 10, "체력": 10, "매력": 10})
 
@@ -24,6 +49,7 @@ class GameStateBase(BaseModel): # Common fields for game state
     player_data: Dict[str, Any]
     # Add other relevant game state parts if needed, e.g., game_turn, npcs
     game_turn: int
+    state_version: int = 0 # 저장할 때마다 증가. send_message의 player_patch 적용 기준
     npcs: List[Dict[str, Any]]
     shop_items: List[Dict[str, Any]]
 
@@ -32,125 +58,145 @@ class GameStateResponse(GameStateBase):
 
 class SendMessageResponse(BaseModel):
     gm_response: str
-    player_data: Dict[str, Any]
+    player_data: Optional[Dict[str, Any]] = None # 전체 플레이어 데이터 (known_version이 없거나 다를 때만)
+    player_patch: Optional[Dict[str, Any]] = None # 이번 턴 변경분 (JSON Merge Patch, state_patch.py)
+    base_version: Optional[int] = None # player_patch를 적용할 state_version
+    state_version: Optional[int] = None # 이번 턴 이후의 state_version
     quest_updates: Optional[List[str]] = None # Made optional as per game_logic.parse_gm_response
-    image_url: Optional[str] = None
+    image_url: Optional[str] = None # 첫 번째 이미지 (image_urls[0]), 이전 클라이언트 호환용
+    image_urls: Optional[List[str]] = None # 이번 턴에 드랍된 아이템 이미지 전부 (등장 순서)
     new_achievements: Optional[List[str]] = None # Made optional as per game_logic.check_achievements
     command_response: Optional[str] = None # For direct command output
 
 # --- FastAPI App Initialization ---
 app = FastAPI()
 
-# Initialize Gemini client
-gemini_initialized_client = gem_client_module.get_gemini_client()
-if not gemini_initialized_client:
-    # This print will go to server logs. Consider a more robust way to handle this.
-    print("CRITICAL ERROR: Gemini client could not be initialized. Check API key and configuration.")
-    # Depending on server setup, may want to raise an exception to stop startup
-    # raise RuntimeError("Gemini client failed to initialize.")
+# Compress large JSON responses (full state with history). Brotli is used when the optional
+# brotli-asgi package is installed (it also falls back to gzip for clients without "br").
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=RESPONSE_COMPRESSION_MIN_BYTES)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=RESPONSE_COMPRESSION_MIN_BYTES)
 
-# --- Helper Functions ---
+# State responses may be stored by the browser but must be revalidated (ETag) before reuse.
+STATE_CACHE_CONTROL = "private, no-cache"
 
-def build_gemini_context(user_input: str, player_data: Dict[str, Any], game_state: Dict[str, Any]) -> str:
-    """
-    Constructs the detailed prompt context for Gemini based on the current game state.
-    This is a simplified adaptation. A real implementation would be more complex.
-    """
-    # Basic context - can be greatly expanded
-    context = f"플레이어 이름: {player_data.get('name', '알 수 없음')}\n"
-    context += f"레벨: {player_data.get('level', 1)}\n"
-    context += f"경험치: {player_data.get('xp', 0)} / {player_data.get('xp_to_next_level', 100)}\n"
-    context += f"골드: {player_data.get('gold', 0)}\n"
-    context += "능력치:\n"
-    for stat, value in player_data.get('stats', {}).items():
-        context += f"  {stat}: {value}\n"
-    
-    context += f"현재 클래스: {player_data.get('current_class', '없음')}\n"
-    
-    active_quests = player_data.get('active_quests', [])
-    if active_quests:
-        context += "진행 중인 퀘스트:\n"
-        for quest in active_quests:
-            context += f"  - {quest.get('name', '이름 없는 퀘스트')}: {quest.get('description', '')}\n"
-            
-    # Include recent history if it helps Gemini understand flow (e.g. last few turns)
-    # For now, history is managed by gemini_client directly.
-    # If specific parts of history are needed for context, they could be extracted here.
-
-    # Include current game turn
-    context += f"현재 게임 턴: {game_state.get('game_turn', 0)}\n"
-
-    # The user's direct input
-    context += f"\n플레이어의 현재 행동 또는 대화: '{user_input}'\n"
-    
-    # General instruction to the LLM
-    context += "\n당신은 이 게임의 GM(게임 마스터)입니다. 플레이어의 행동에 따라 게임 세계를 묘사하고, NPC와 대화하며, 퀘스트를 진행하고, 전투를 관리해주세요. 상세하고 창의적인 답변을 생성해주세요. 필요한 경우 JSON 형식으로 게임 상태 변경을 지시할 수 있습니다 (예: {\"action\": \"add_item\", \"item_name\": \"HP 포션\"})."
-    
-    return context
+# The Gemini, KV and blob clients are created lazily on first use (see get_gemini_client,
+# gsm.get_kv_store, openai_image_client.get_blob_store) to keep cold starts fast.
+
+# Load extra achievement rule packs (data files, no code changes needed)
+if ACHIEVEMENT_RULES_PATH:
+    for rules_path in ACHIEVEMENT_RULES_PATH.split(os.pathsep):
+        if rules_path:
+            game_logic.load_achievement_rules(rules_path)
 
 # --- API Endpoints ---
 
+def require_cron_secret(authorization: Optional[str], detail: str):
+    """Guards cron/admin endpoints. Fails closed: 403 when CRON_SECRET is not configured, 401 on a wrong token."""
+    if not CRON_SECRET:
+        raise HTTPException(status_code=403, detail="CRON_SECRET이 설정되지 않아 관리용 엔드포인트를 사용할 수 없습니다.")
+    if not hmac.compare_digest(authorization or "", f"Bearer {CRON_SECRET}"):
+        raise HTTPException(status_code=401, detail=detail)
+
+def state_etag(game_state: Dict[str, Any]) -> str:
+    """Weak ETag for the full game state. Changes whenever the state is saved by a turn, reset or setup."""
+    return f'W/"{game_state.get("state_version", 0)}-{game_state.get("game_turn", 0)}-{len(game_state.get("history", []))}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak: the W/ prefix is ignored)."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+async def game_state_response(if_none_match: Optional[str], response: Response):
+    """
+    Full game state for initialize/state. Returns 304 Not Modified when the client's ETag
+    is current, so page reloads skip the (large) history payload.
+    """
+    await game_session.flush_active() # 열린 WebSocket 세션의 최신 상태를 먼저 저장
+    game_state = await run_in_threadpool(gsm.load_game_state, False) # History stays serialized; no Gemini types needed
+    etag = state_etag(game_state)
+    headers = {"ETag": etag, "Cache-Control": STATE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    # History is loaded as serialized dicts; serialize_history passes dicts through unchanged.
+    serialized_history_for_response = gsm.serialize_history(game_state["history"])
+
+    # Ensure all parts of DEFAULT_GAME_STATE are present
+    response_data = {
+        "player_data": game_state.get("player_data", gsm.DEFAULT_PLAYER_DATA),
+        "history": serialized_history_for_response,
+        "game_turn": game_state.get("game_turn", gsm.DEFAULT_GAME_STATE["game_turn"]),
+        "state_version": game_state.get("state_version", 0),
+        "npcs": game_state.get("npcs", gsm.DEFAULT_NPCS),
+        "shop_items": game_state.get("shop_items", gsm.DEFAULT_SHOP_ITEMS),
+    }
+    return GameStateResponse(**response_data)
+
 @app.post("/api/game/initialize", response_model=GameStateResponse)
-async def initialize_game():
+async def initialize_game(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Initializes the game state or loads an existing one.
     Returns the current game state, including player data and serialized history.
     """
     try:
-        game_state = await run_in_threadpool(gsm.load_game_state)
-        # load_game_state already deserializes history, so we need to re-serialize for response.
-        # However, our Pydantic model expects serialized history (List[Dict]).
-        # gsm.serialize_history is available if needed, but load_game_state should return
-        # history in a format that's ready for Pydantic after deserialization.
-        # Let's assume gsm.load_game_state returns history as List[Content]
-        # and gsm.serialize_history converts it to List[Dict]
-        
-        # The history from load_game_state is already deserialized Content objects.
-        # For the response, it needs to be a list of dicts.
-        serialized_history_for_response = gsm.serialize_history(game_state["history"])
-
-        # Ensure all parts of DEFAULT_GAME_STATE are present
-        response_data = {
-            "player_data": game_state.get("player_data", gsm.DEFAULT_PLAYER_DATA),
-            "history": serialized_history_for_response,
-            "game_turn": game_state.get("game_turn", gsm.DEFAULT_GAME_STATE["game_turn"]),
-            "npcs": game_state.get("npcs", gsm.DEFAULT_NPCS),
-            "shop_items": game_state.get("shop_items", gsm.DEFAULT_SHOP_ITEMS),
-        }
-        return GameStateResponse(**response_data)
+        return await game_state_response(if_none_match, response)
     except Exception as e:
         print(f"Error initializing game: {e}") # Log error
         raise HTTPException(status_code=500, detail=f"게임 초기화 중 오류 발생: {str(e)}")
 
 
 @app.get("/api/game/state", response_model=GameStateResponse)
-async def get_game_state():
+async def get_game_state(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Retrieves the current game state.
+    Supports If-None-Match: answers 304 when the state has not changed since the given ETag.
     """
     try:
-        game_state = await run_in_threadpool(gsm.load_game_state)
-        serialized_history_for_response = gsm.serialize_history(game_state["history"])
-        
-        response_data = {
-            "player_data": game_state.get("player_data", gsm.DEFAULT_PLAYER_DATA),
-            "history": serialized_history_for_response,
-            "game_turn": game_state.get("game_turn", gsm.DEFAULT_GAME_STATE["game_turn"]),
-            "npcs": game_state.get("npcs", gsm.DEFAULT_NPCS),
-            "shop_items": game_state.get("shop_items", gsm.DEFAULT_SHOP_ITEMS),
-        }
-        return GameStateResponse(**response_data)
+        return await game_state_response(if_none_match, response)
     except Exception as e:
         print(f"Error getting game state: {e}") # Log error
         raise HTTPException(status_code=500, detail=f"게임 상태 로드 중 오류 발생: {str(e)}")
 
+@app.get("/api/items/catalog", response_model=Dict[str, Any])
+async def get_item_catalog():
+    """
+    Returns the item catalog: shop items plus items learned from [REWARD] tags, with card image URLs.
+    """
+    try:
+        await game_session.flush_active()
+        game_state = await run_in_threadpool(gsm.load_game_state, False)
+        return await run_in_threadpool(item_catalog.build_catalog, game_state.get("shop_items"))
+    except Exception as e:
+        print(f"Error building item catalog: {e}")
+        raise HTTPException(status_code=500, detail=f"아이템 카탈로그 로드 중 오류 발생: {str(e)}")
+
+@app.get("/api/game/quests/completed", response_model=Dict[str, Any])
+async def get_completed_quests(page: int = 1, page_size: int = QUEST_ARCHIVE_PAGE_SIZE):
+    """
+    Returns one page of the completed-quest archive, most recently completed first.
+    """
+    try:
+        await game_session.flush_active()
+        game_state = await run_in_threadpool(gsm.load_game_state, False)
+        return quest_store.completed_quests_page(game_state.get("player_data", {}), page, page_size)
+    except Exception as e:
+        print(f"Error getting completed quests: {e}")
+        raise HTTPException(status_code=500, detail=f"완료 퀘스트 로드 중 오류 발생: {str(e)}")
+
 @app.post("/api/game/character_creation", response_model=Dict[str, Any])
 async def create_character(payload: StatAllocation):
     """
     Sets the initial stats for the player character.
     Assumes basic validation for now.
     """
-    game_state = await run_in_threadpool(gsm.load_game_state)
+    await game_session.flush_active()
+    game_state = await run_in_threadpool(gsm.load_game_state, False) # Stats only; history stays serialized
     player_data = game_state.get("player_data")
 
     if player_data.get("initial_setup_done", False):
@@ -176,7 +222,9 @@ async def create_character(payload: StatAllocation):
     player_data["initial_setup_done"] = True # Mark setup as done
     game_state["player_data"] = player_data
 
+    gsm.bump_state_version(game_state)
     await run_in_threadpool(gsm.save_game_state, game_state)
+    await game_session.reload_active()
     return player_data
 
 
@@ -188,27 +236,69 @@ async def reset_game():
     try:
         # Create a deep copy of the default state to avoid modifying the constant
         game_state_to_save = copy.deepcopy(gsm.DEFAULT_GAME_STATE)
+        # 버전은 초기화해도 이어서 증가시켜, 초기화 전 버전을 가진 클라이언트가 패치를 잘못 적용하지 않게 함
+        await game_session.flush_active()
+        previous_state = await run_in_threadpool(gsm.load_game_state, False)
+        game_state_to_save["state_version"] = previous_state.get("state_version", 0)
+        gsm.bump_state_version(game_state_to_save)
         # Ensure history is in the correct format (empty list of dicts if needed by save_game_state's serialize)
         # DEFAULT_GAME_STATE['history'] is already an empty list, which is fine.
         # serialize_history will handle it if it's Content objects or dicts.
         await run_in_threadpool(gsm.save_game_state, game_state_to_save)
+        await game_session.reload_active()
         return {"message": "게임이 성공적으로 초기화되었습니다."}
     except Exception as e:
         print(f"Error resetting game: {e}") # Log error
         raise HTTPException(status_code=500, detail=f"게임 초기화 중 오류 발생: {str(e)}")
 
 
-@app.post("/api/game/send_message", response_model=SendMessageResponse)
-async def send_message(payload: PlayerMessage):
+@app.post("/api/game/typing", response_model=Dict[str, Any])
+async def player_typing(payload: TypingUpdate):
     """
-    Processes a player's message, interacts with the game logic and Gemini,
-    and returns the game's response.
+    Speculative mode hook, called (debounced) while the player types.
+    Warms the Gemini context cache for the current history and, for inputs the
+    player submits often, starts generating the GM reply in the background.
+    Returns {"enabled": False} immediately when speculation is turned off.
     """
-    if not gemini_initialized_client:
-        raise HTTPException(status_code=503, detail="Gemini 클라이언트가 초기화되지 않았습니다. 서버 로그를 확인해주세요.")
+    if not speculation.is_enabled():
+        return {"enabled": False}
+    gemini_client = gem_client_module.get_gemini_client()
+    if not gemini_client:
+        return {"enabled": True, "prefix_cached": False, "speculating": False}
 
+    await game_session.flush_active()
     game_state = await run_in_threadpool(gsm.load_game_state)
-    
+    if not game_state.get("player_data", {}).get("initial_setup_done", False):
+        return {"enabled": True, "prefix_cached": False, "speculating": False}
+
+    prefix_cached = await run_in_threadpool(speculation.warm_prefix_cache, gemini_client, game_state["history"])
+    speculating = speculation.speculate_reply(gemini_client, payload.partial, game_state)
+    return {"enabled": True, "prefix_cached": prefix_cached, "speculating": speculating}
+
+
+def player_state_fields(payload: PlayerMessage, game_state: Dict[str, Any], player_data_before: Dict[str, Any], base_version: int) -> Dict[str, Any]:
+    """
+    Player state part of a send_message response: only this turn's patch when the client
+    already holds base_version, otherwise the full player_data (resync).
+    """
+    fields = {"state_version": game_state.get("state_version", 0)}
+    if payload.known_version is not None and payload.known_version == base_version:
+        fields["base_version"] = base_version
+        fields["player_patch"] = merge_patch(player_data_before, game_state["player_data"])
+    else:
+        fields["player_data"] = game_state["player_data"]
+    return fields
+
+async def play_turn(game_state: Dict[str, Any], payload: PlayerMessage):
+    """
+    Applies one player message to game_state in place (commands, Gemini, rewards, images,
+    achievements) and builds the response. Shared by the HTTP endpoint and the WebSocket session.
+    Returns (response, state_changed); persisting the state is up to the caller.
+    """
+    gemini_client = gem_client_module.get_gemini_client()
+    if not gemini_client:
+        raise HTTPException(status_code=503, detail="Gemini 클라이언트가 초기화되지 않았습니다. 서버 로그를 확인해주세요.")
+
     # Prevent interaction if character creation is not done
     if not game_state.get("player_data", {}).get("initial_setup_done", False) and \
        not payload.message.startswith("/"):
@@ -217,45 +307,74 @@ async def send_message(payload: PlayerMessage):
         # If process_command doesn't handle them, they go to Gemini.
         raise HTTPException(status_code=400, detail="캐릭터 초기 설정을 먼저 완료해주세요. 채팅은 캐릭터 생성 후 가능합니다. '/시작' 또는 '/도움말' 명령어를 사용하거나, UI에서 'Character Creation' 버튼을 눌러 스탯을 분배하세요.")
 
+    # 추측 실행 모드: 턴 증가 전 상태로 미리 생성한 응답과 대조
+    spec_state_hash = speculation.state_hash(game_state) if speculation.is_enabled() else None
+
+    # 이번 턴 변경분(player_patch) 계산용
+    base_version = game_state.get("state_version", 0)
+    player_data_before = copy.deepcopy(game_state["player_data"])
+
     game_state["game_turn"] = game_state.get("game_turn", 0) + 1
     player_input = payload.message
 
     # 1. Process Command
-    command_response_text, is_command = game_logic.process_command(player_input, game_state["player_data"], game_state)
-    
-    if is_command:
-        if command_response_text is not None:
-            # Some commands might modify state (e.g., /equip), others just return info (/stat)
-            # process_command should handle state changes internally if they are simple,
-            # or return data for main endpoint to handle.
-            # For now, assume process_command updates game_state["player_data"] if necessary.
-            await run_in_threadpool(gsm.save_game_state, game_state) # Save if command changed state
-            return SendMessageResponse(
-                gm_response="", # No GM response for commands unless it's info
-                player_data=game_state["player_data"],
-                command_response=command_response_text,
-                # quest_updates, image_url, new_achievements can be None or empty
-            )
-        else: # Command was processed but returned no text (e.g. internal state change)
-            await run_in_threadpool(gsm.save_game_state, game_state)
-            return SendMessageResponse(
-                gm_response="명령이 처리되었습니다.", # Generic confirmation
-                player_data=game_state["player_data"],
-            )
+    # process_command returns (text, state_changed); text is None when the input is not a command.
+    command_response_text, state_changed = game_logic.process_command(player_input, game_state["player_data"], game_state)
+
+    if command_response_text is not None:
+        if state_changed:
+            gsm.bump_state_version(game_state) # Save only if the command changed state
+        return SendMessageResponse(
+            gm_response="", # No GM response for commands
+            command_response=command_response_text,
+            **player_state_fields(payload, game_state, player_data_before, base_version),
+        ), state_changed
 
     # 2. Build Context for Gemini (if not a command that fully handled the turn)
     # game_state["history"] here is List[Content] from load_game_state
-    context = build_gemini_context(player_input, game_state["player_data"], game_state)
+    # 상태 블록은 이번 요청에만 붙이고, 기록에는 player_input만 남김 (history_text)
+    # 전체 히스토리 대신 최근 대화 창만 보내고, 창 밖의 관련 기록은 스니펫으로 붙임
+    history_window, _, memory_snippets = await run_in_threadpool(
+        memory.recall_for_turn, game_state["history"], game_state["player_data"], player_input
+    )
+    context = build_gm_context(player_input, game_state["player_data"], game_state, memory_snippets)
 
     # 3. Get GM Response (Ensure non-blocking)
+    # 같은 상태에서 같은 입력이면 캐시된 응답 재사용 (요청별로 끌 수 있음)
+    cache_key = None
+    if payload.use_cache and response_cache.is_enabled():
+        cache_key = response_cache.cache_key(player_input, game_state["player_data"], game_state["history"], memory_snippets)
+    cached_reply = response_cache.get(cache_key)
+
     try:
-        # gemini_client.get_gm_response is synchronous, so run in threadpool
-        raw_gm_response, updated_history_content_objects = await run_in_threadpool(
-            gem_client_module.get_gm_response,
-            gemini_initialized_client, 
-            context, 
-            game_state["history"] # Pass Content objects (which are fine for threadpool)
-        )
+        speculated = None
+        cached_content, cached_turns = None, 0
+        if cached_reply is None and speculation.is_enabled():
+            speculation.record_submission(player_input)
+            # 미리 생성된 응답이 있으면 사용 (진행 중이면 기다림), 없으면 데워 둔 컨텍스트 캐시 사용
+            speculated = await run_in_threadpool(speculation.take_reply, player_input, spec_state_hash)
+            cached_content, cached_turns = speculation.prefix_cache_for(history_window)
+        if cached_reply is not None:
+            print(f"[RESPONSE_CACHE] 캐시된 GM 응답 사용: {player_input[:30]}")
+            raw_gm_response = cached_reply
+            updated_history_content_objects = gem_client_module.append_turn(game_state["history"], player_input, cached_reply)
+        elif speculated:
+            # 미리 생성한 응답의 히스토리는 이미 전체 대화
+            raw_gm_response, updated_history_content_objects = speculated
+        else:
+            # gemini_client.get_gm_response is synchronous, so run in threadpool
+            raw_gm_response, updated_window = await run_in_threadpool(
+                gem_client_module.get_gm_response,
+                gemini_client,
+                context, 
+                history_window, # Pass Content objects (which are fine for threadpool)
+                cached_content,
+                cached_turns,
+                player_input
+            )
+            updated_history_content_objects = memory.extend_history(game_state["history"], history_window, updated_window)
+        if cached_reply is None:
+            response_cache.put(cache_key, raw_gm_response)
         game_state["history"] = updated_history_content_objects # Store Content objects
     except Exception as e:
         print(f"Error getting GM response from Gemini: {e}")
@@ -263,39 +382,166 @@ async def send_message(payload: PlayerMessage):
 
     # 4. Parse GM Response & Update Game Logic
     # parse_gm_response_for_updates might modify game_state["player_data"] directly
-    updates_from_gm = game_logic.parse_gm_response_for_updates(raw_gm_response, game_state["player_data"], game_state)
+    # changed_fields collects which player_data fields this turn touched
+    changed_fields = set()
+    updates_from_gm = game_logic.parse_gm_response_for_updates(raw_gm_response, game_state["player_data"], game_state, changed_fields)
 
     # 5. Image Generation (Async, if needed)
-    image_url: Optional[str] = None
-    image_prompt = game_logic.extract_image_prompt(raw_gm_response)
-    if image_prompt:
+    # 한 턴에 여러 아이템이 드랍되면 프롬프트마다 이미지를 만들고, 요청은 제한된 동시성으로 보냄
+    image_urls: List[str] = []
+    item_image_urls: Dict[str, str] = {} # 아이템 이름 -> 카드 이미지 URL (아이템 카탈로그용)
+    image_prompts = game_logic.extract_image_prompts(raw_gm_response)[:IMAGE_MAX_PER_TURN]
+    if image_prompts:
         try:
-            # Use run_in_threadpool for the synchronous openai_image_client.generate_image
-            image_url, img_error = await run_in_threadpool(openai_image_client.generate_image, image_prompt)
-            if img_error:
-                print(f"OpenAI Image Generation Error: {img_error}") # Log error
-                # Optionally, inform user about image error, but not critical for gameplay
-            elif image_url:
-                 print(f"Generated image URL: {image_url}")
+            # Use run_in_threadpool for the synchronous image_prewarm.generate_item_images
+            # (아이템 이름으로 미리 만든 이미지를 먼저 찾고, 없는 것만 생성)
+            image_results = await run_in_threadpool(image_prewarm.generate_item_images, image_prompts, payload.image_tier)
+            for prompt, (image_url, img_error) in zip(image_prompts, image_results):
+                if img_error:
+                    print(f"OpenAI Image Generation Error ({prompt}): {img_error}") # Log error
+                    # Optionally, inform user about image error, but not critical for gameplay
+                elif image_url:
+                    print(f"Generated image URL: {image_url}")
+                    image_urls.append(image_url)
+                    # GM 형식: "(이미지 생성: 아이템 이름, 게임 아이템 카드 스타일, ...)"
+                    item_image_urls[image_prewarm.item_name_from_prompt(prompt)] = image_url
         except Exception as e:
             print(f"Error during image generation call: {e}")
 
 
     # 6. Check Achievements
     # check_achievements might modify game_state["player_data"] (e.g., add to 'achievements' list)
-    new_achievements = game_logic.check_achievements(game_state["player_data"], game_state)
+    # Only rules depending on fields changed this turn are evaluated.
+    new_achievements = game_logic.check_achievements(game_state["player_data"], game_state, changed_fields)
 
-    # 7. Save Game State
-    # History is already updated with Content objects. save_game_state will serialize it.
-    await run_in_threadpool(gsm.save_game_state, game_state)
+    # 7. Mark the state as changed (the caller saves it; history is serialized on save)
+    gsm.bump_state_version(game_state)
+    # 보상 아이템 등장 횟수 기록 (이미지 프리워밍 후보 선정용)
+    reward_items = await run_in_threadpool(image_prewarm.record_reward_items, raw_gm_response)
+    # 보상으로 처음 나온 아이템과 카드 이미지를 아이템 카탈로그에 기록
+    await run_in_threadpool(item_catalog.learn_items, reward_items, item_image_urls)
 
     # 8. Return Response
     return SendMessageResponse(
         gm_response=raw_gm_response,
-        player_data=game_state["player_data"],
-        quest_updates=updates_from_gm.get("quests", []) if updates_from_gm else [], # Example structure
-        image_url=image_url,
+        **player_state_fields(payload, game_state, player_data_before, base_version),
+        quest_updates=updates_from_gm or [], # parse_gm_response_for_updates returns a list of update strings
+        image_url=image_urls[0] if image_urls else None,
+        image_urls=image_urls,
         new_achievements=new_achievements
-    )
+    ), True
+
+async def play_session_turn(session, payload: PlayerMessage):
+    """Plays a turn on the open session's in-memory state; the session saves it later (write-behind)."""
+    async with session.lock:
+        # HTTP 경로에서는 저장하지 않은 턴이 버려지므로, 메모리 상태에서도 턴 번호를 되돌려 같게 맞춤
+        game_turn = session.state.get("game_turn", 0)
+        try:
+            response, state_changed = await play_turn(session.state, payload)
+        except Exception:
+            session.state["game_turn"] = game_turn
+            raise
+        if state_changed:
+            session.mark_dirty()
+            await session.after_turn()
+        else:
+            session.state["game_turn"] = game_turn
+        return response
+
+@app.post("/api/game/send_message", response_model=SendMessageResponse)
+async def send_message(payload: PlayerMessage):
+    """
+    Processes a player's message, interacts with the game logic and Gemini,
+    and returns the game's response.
+    While a WebSocket session is open, the turn is applied to its in-memory state instead
+    (saved by the session's write-behind).
+    """
+    session = game_session.get_active()
+    if session is not None:
+        return await play_session_turn(session, payload)
+
+    game_state = await run_in_threadpool(gsm.load_game_state)
+    response, state_changed = await play_turn(game_state, payload)
+    if state_changed:
+        await run_in_threadpool(gsm.save_game_state, game_state)
+    return response
+
+@app.websocket("/api/game/ws")
+async def game_websocket(websocket: WebSocket):
+    """
+    Persistent game session. Each client message is a PlayerMessage as JSON; each reply is
+    {"type": "turn", ...SendMessageResponse} or {"type": "error", "detail": ...}.
+    Turns are applied to in-memory state and written behind (see game_session.py).
+    Not available on Vercel serverless functions; clients fall back to HTTP.
+    """
+    if not SESSION_WS_ENABLED:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    session = await game_session.open_session()
+    try:
+        await websocket.send_json({"type": "hello", "state_version": session.state.get("state_version", 0)})
+        while True:
+            data = await websocket.receive_json()
+            try:
+                payload = PlayerMessage(**data)
+                response = await play_session_turn(session, payload)
+                await websocket.send_json({"type": "turn", **jsonable_encoder(response)})
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "detail": e.detail})
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": f"잘못된 메시지 형식입니다: {e}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await game_session.close_session(session)
+
 
 # --- Optional: Add more utility endpoints or WebSocket for real-time ---
+
+@app.get("/api/metrics", response_model=Dict[str, Any])
+async def get_metrics():
+    """Returns in-process statistics: GM response cache hit rate/size/evictions and HTTP connection reuse."""
+    return {"response_cache": response_cache.metrics(), "http_pool": http_pool.metrics()}
+
+@app.get("/api/images/prewarm", response_model=Dict[str, Any])
+async def prewarm_item_images(authorization: Optional[str] = Header(None)):
+    """
+    Pre-generates card images for the most frequent reward items and shop items
+    that are not cached yet, within the configured image/time budget.
+    Intended for Vercel Cron (see vercel.json "crons").
+    """
+    require_cron_secret(authorization, "인증되지 않은 프리워밍 요청입니다.")
+    try:
+        return await run_in_threadpool(image_prewarm.prewarm_item_images)
+    except Exception as e:
+        print(f"Error pre-warming item images: {e}")
+        raise HTTPException(status_code=500, detail=f"이미지 프리워밍 중 오류 발생: {str(e)}")
+
+@app.get("/api/images/cache", response_model=Dict[str, Any])
+async def list_cached_images(cursor: Optional[str] = None, rebuild: bool = False, authorization: Optional[str] = Header(None)):
+    """
+    Returns one page of cached item images (pass the returned cursor for the next page) and cache usage.
+    With rebuild=true the cache index is first re-synced from the blob store listing.
+    """
+    require_cron_secret(authorization, "인증되지 않은 이미지 캐시 요청입니다.")
+    try:
+        if rebuild:
+            await run_in_threadpool(image_cache.rebuild_index, openai_image_client.get_blob_store())
+        return await run_in_threadpool(openai_image_client.get_cached_images, cursor)
+    except Exception as e:
+        print(f"Error listing cached images: {e}")
+        raise HTTPException(status_code=500, detail=f"이미지 캐시 목록 조회 중 오류 발생: {str(e)}")
+
+@app.delete("/api/images/cache", response_model=Dict[str, Any])
+async def clear_cached_images(authorization: Optional[str] = Header(None)):
+    """
+    Deletes every cached item image (paging through the blob store) and clears the cache index.
+    """
+    require_cron_secret(authorization, "인증되지 않은 이미지 캐시 요청입니다.")
+    try:
+        deleted = await run_in_threadpool(openai_image_client.clear_image_cache)
+        return {"deleted": deleted}
+    except Exception as e:
+        print(f"Error clearing image cache: {e}")
+        raise HTTPException(status_code=500, detail=f"이미지 캐시 삭제 중 오류 발생: {str(e)}")
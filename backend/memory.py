@@ -0,0 +1,201 @@
+# memory.py
+"""
+지난 대화/완료 퀘스트 검색 메모리 (BM25, 외부 의존성 없음)
+
+긴 히스토리를 매 턴 전부 보내는 대신:
+- 최근 대화 창(recent_window)만 Gemini 요청에 포함하고,
+- 창 밖의 지난 턴과 완료된 퀘스트는 BM25 색인에서 이번 입력과 관련된 상위 k개만 골라
+  토큰 예산 안에서 컨텍스트에 붙입니다 (recall).
+
+색인은 프로세스 메모리에 두고, 히스토리에 턴이 추가될 때마다 새 턴만 색인합니다.
+(히스토리 앞부분이 바뀌면(초기화 등) 처음부터 다시 색인)
+한국어는 형태소 분석 없이 어절 + 한글 2-gram으로 토큰화하므로 "퀀트 강의"와 "퀀트강의를"도 매칭됩니다.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+
+from .context_builder import INITIAL_HISTORY_TURNS, strip_status_block
+from .config import (
+    MEMORY_ENABLED, MEMORY_RECENT_ENTRIES, MEMORY_WINDOW_STEP, MEMORY_TOP_K,
+    MEMORY_TOKEN_BUDGET, MEMORY_SNIPPET_MAX_CHARS
+)
+
+# BM25 파라미터
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"\w+")
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+def tokenize(text):
+    """어절(소문자) + 한글 어절의 글자 2-gram."""
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and _HANGUL_RE.search(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+def estimate_tokens(text):
+    """대략적인 토큰 수 (한글 위주 텍스트는 약 2자당 1토큰)."""
+    return len(text) // 2 + 1
+
+def _entry_text(entry):
+    if isinstance(entry, dict):
+        role, parts = entry.get("role"), entry.get("parts", [])
+    else:
+        role, parts = entry.role, entry.parts or []
+    return role, "\n".join(part if isinstance(part, str) else getattr(part, "text", None) or "" for part in parts)
+
+class MemoryIndex:
+    """증분 BM25 색인. 문서는 (종류, 출처 키, 텍스트)입니다."""
+
+    def __init__(self):
+        self.docs = []          # [(kind, source, text)]
+        self.doc_lengths = []
+        self.postings = {}      # term -> {doc_id: tf}
+        self.total_length = 0
+
+    def add(self, kind, source, text):
+        tokens = tokenize(text)
+        doc_id = len(self.docs)
+        self.docs.append((kind, source, text))
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        return doc_id
+
+    def search(self, query, k=MEMORY_TOP_K, accept=None):
+        """query와 관련된 문서를 점수 순으로 최대 k개 반환합니다 ([(점수, doc_id)]).
+
+        accept(doc_id)가 False인 문서는 제외합니다.
+        """
+        if not self.docs:
+            return []
+        n_docs = len(self.docs)
+        avg_length = self.total_length / n_docs or 1.0
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        ranked = [(score, doc_id) for doc_id, score in scores.most_common() if accept is None or accept(doc_id)]
+        return ranked[:k]
+
+class GameMemory:
+    """게임 하나의 히스토리/퀘스트 색인. sync()로 새로 추가된 턴과 퀘스트만 색인합니다."""
+
+    def __init__(self):
+        self.index = MemoryIndex()
+        self.indexed_entries = INITIAL_HISTORY_TURNS  # 이 인덱스 전까지의 히스토리 항목을 색인함
+        self.last_entry_digest = None
+        self.indexed_quests = set()
+        self._lock = threading.Lock()
+
+    def _digest(self, history, count):
+        if count <= INITIAL_HISTORY_TURNS or count > len(history):
+            return None
+        return hashlib.sha256(_entry_text(history[count - 1])[1].encode()).hexdigest()
+
+    def sync(self, history, player_data):
+        with self._lock:
+            # 히스토리 앞부분이 바뀌었으면 처음부터 다시 색인
+            if self.indexed_entries > len(history) or \
+                    self._digest(history, self.indexed_entries) != self.last_entry_digest:
+                self.__init__()
+            # 사용자 턴 + GM 응답을 한 문서로 (응답까지 있는 턴만)
+            i = self.indexed_entries
+            while i + 1 < len(history):
+                user_role, user_text = _entry_text(history[i])
+                model_role, model_text = _entry_text(history[i + 1])
+                if user_role == "user" and model_role == "model":
+                    self.index.add("turn", i, f"플레이어: {strip_status_block(user_text)}\nGM: {model_text}")
+                    i += 2
+                else:
+                    i += 1
+            self.indexed_entries = i
+            self.last_entry_digest = self._digest(history, i)
+
+            for quest in player_data.get("completed_quests", []):
+                key = (quest.get("name"), quest.get("completed_turn"))
+                if key in self.indexed_quests:
+                    continue
+                self.indexed_quests.add(key)
+                self.index.add("quest", key, f"완료한 퀘스트: {quest.get('name', '')} - {quest.get('description', '')}")
+
+    def recall(self, query, before_entry, k=MEMORY_TOP_K, token_budget=MEMORY_TOKEN_BUDGET):
+        """query와 관련된 스니펫을 토큰 예산 안에서 반환합니다.
+
+        before_entry 이후의 턴은 최근 대화 창으로 이미 보내므로 제외합니다.
+        """
+        def accept(doc_id):
+            kind, source, _ = self.index.docs[doc_id]
+            return kind != "turn" or source < before_entry
+
+        with self._lock:
+            ranked = self.index.search(query, k=k, accept=accept)
+            snippets = []
+            used = 0
+            for _, doc_id in ranked:
+                text = self.index.docs[doc_id][2]
+                if len(text) > MEMORY_SNIPPET_MAX_CHARS:
+                    text = text[:MEMORY_SNIPPET_MAX_CHARS].rstrip() + "…"
+                cost = estimate_tokens(text)
+                if used + cost > token_budget:
+                    continue
+                snippets.append(text)
+                used += cost
+            return snippets
+
+_memory = None
+_memory_lock = threading.Lock()
+
+def get_memory():
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = GameMemory()
+        return _memory
+
+def recent_window(history):
+    """Gemini에 보낼 대화 창: 초기 프롬프트 두 항목 + 최근 항목들.
+
+    창의 시작 위치를 MEMORY_WINDOW_STEP 단위로 맞춰, 몇 턴 동안은 요청의 앞부분이 같게 유지합니다
+    (컨텍스트 캐시 재사용). (창, 창이 시작하는 히스토리 인덱스)를 반환합니다.
+    """
+    history = list(history or [])
+    if not MEMORY_ENABLED or len(history) <= INITIAL_HISTORY_TURNS + MEMORY_RECENT_ENTRIES:
+        return history, INITIAL_HISTORY_TURNS
+    start = len(history) - MEMORY_RECENT_ENTRIES
+    start -= (start - INITIAL_HISTORY_TURNS) % MEMORY_WINDOW_STEP
+    # 사용자 턴에서 시작해야 user/model 순서가 유지됨
+    if start > INITIAL_HISTORY_TURNS and _entry_text(history[start])[0] != "user":
+        start -= 1
+    return history[:INITIAL_HISTORY_TURNS] + history[start:], start
+
+def extend_history(history, window, updated_window):
+    """창으로 보낸 요청 결과(updated_window)의 새 항목을 전체 히스토리에 붙입니다."""
+    history = list(history or [])
+    new_entries = updated_window[len(window):]
+    if not history:
+        # 첫 턴: get_gm_response가 초기 히스토리를 채워서 돌려줌
+        return list(updated_window)
+    return history + list(new_entries)
+
+def recall_for_turn(history, player_data, user_input):
+    """이번 턴의 최근 창과 관련 기억 스니펫을 반환합니다 ((창, 창 시작 인덱스, 스니펫 목록))."""
+    window, start = recent_window(history)
+    if not MEMORY_ENABLED or start <= INITIAL_HISTORY_TURNS:
+        return window, start, []
+    memory = get_memory()
+    memory.sync(list(history), player_data)
+    return window, start, memory.recall(user_input, before_entry=start)
@@ -1,35 +1,171 @@
 # openai_image_client.py
-import requests
+# requests, vercel_blob, PIL은 이미지 생성 시에만 필요하므로 함수 안에서 import합니다 (콜드 스타트 단축).
+# HTTP 호출은 연결을 재사용하는 공유 세션(http_pool)을 사용합니다.
 import os # os.path is still used for blob pathname construction
+import io
 import hashlib
 import base64
-from vercel_blob import put, head as vercel_head
+from . import http_pool
+from . import image_cache
+from . import item_catalog
 from .config import (
     OPENAI_API_KEY, OPENAI_IMAGE_MODEL, OPENAI_IMAGE_API_URL,
-    DEFAULT_IMAGE_SIZE, DEFAULT_NUM_IMAGES, DEFAULT_IMAGE_QUALITY
+    DEFAULT_IMAGE_SIZE, DEFAULT_NUM_IMAGES, DEFAULT_IMAGE_QUALITY,
+    IMAGE_VARIANT_TIERS, IMAGE_VARIANT_FORMAT, IMAGE_MAX_CONCURRENCY
     # IMAGE_CACHE_DIR is removed as it's no longer used
 )
 
-def generate_image(prompt_text):
-    """OpenAI GPT-Image-1을 사용하여 이미지를 생성하고 Vercel Blob에 캐시합니다."""
-    if not OPENAI_API_KEY:
-        return None, "OpenAI API 키가 설정되지 않았습니다."
+# put(pathname=..., body=..., add_random_suffix=...)와 head(pathname)를 제공하는 Blob 저장소.
+# 기본값은 vercel_blob 모듈(첫 사용 시 import)이며, 테스트/벤치마크에서는 인메모리 저장소로 교체할 수 있습니다.
+_blob_store = None
 
-    prompt_hash = hashlib.md5(prompt_text.encode()).hexdigest()
-    blob_pathname = f"cached_images/{prompt_hash}.png"
+def get_blob_store():
+    """이미지 캐시에 사용할 Blob 저장소를 반환합니다."""
+    global _blob_store
+    if _blob_store is None:
+        import vercel_blob
+        _blob_store = vercel_blob
+    return _blob_store
+
+def set_blob_store(store):
+    """이미지 캐시에 사용할 Blob 저장소를 교체합니다."""
+    global _blob_store
+    _blob_store = store
+
+def _variant_format():
+    """축소본 인코딩 형식. AVIF는 Pillow에 인코더가 있을 때만 사용합니다."""
+    from PIL import Image
+    if IMAGE_VARIANT_FORMAT == "avif":
+        Image.init()
+        if ".avif" in Image.registered_extensions():
+            return "avif"
+        print("AVIF 인코더가 없어 WebP로 축소본을 만듭니다.")
+    return "webp"
+
+def _variant_pathname(prompt_hash, tier, image_format):
+    return f"cached_images/{prompt_hash}_{tier}.{image_format}"
+
+def encode_image_variants(image_data, tiers=None, image_format=None):
+    """원본 이미지 바이트로 티어별 축소본을 만듭니다. {티어: 인코딩된 바이트}를 반환합니다.
+
+    큰 티어부터 줄여 나가며 직전 결과를 다시 축소하므로 원본 디코딩은 한 번뿐입니다.
+    """
+    from PIL import Image
+    tiers = IMAGE_VARIANT_TIERS if tiers is None else tiers
+    image_format = image_format or _variant_format()
+
+    image = Image.open(io.BytesIO(image_data))
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    variants = {}
+    for tier, spec in sorted(tiers.items(), key=lambda item: -item[1]["size"]):
+        image.thumbnail((spec["size"], spec["size"]), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format.upper(), quality=spec["quality"])
+        variants[tier] = buffer.getvalue()
+    return variants
+
+def _store_variants(blob_store, prompt_hash, image_data):
+    """원본 옆에 티어별 축소본을 업로드합니다. {티어: URL}을 반환하며, 실패한 티어는 빠집니다."""
+    try:
+        image_format = _variant_format()
+        variants = encode_image_variants(image_data, image_format=image_format)
+    except Exception as e:
+        print(f"이미지 축소본 생성 실패 (원본만 사용): {e}")
+        return {}
+
+    urls = {}
+    uploads = {}
+    for tier, body in variants.items():
+        pathname = _variant_pathname(prompt_hash, tier, image_format)
+        try:
+            urls[tier] = blob_store.put(pathname=pathname, body=body, add_random_suffix=False)['url']
+            uploads[pathname] = (urls[tier], len(body))
+        except Exception as e:
+            print(f"이미지 축소본 업로드 실패 ({pathname}): {e}")
+    if uploads:
+        image_cache.record_upload(prompt_hash, uploads)
+    print(f"이미지 축소본 업로드: {', '.join(f'{tier} {len(variants[tier])}B' for tier in urls)} (원본 {len(image_data)}B)")
+    return urls
+
+def _upload_image(blob_store, prompt_hash, image_data, tier):
+    """원본과 축소본을 업로드하고, 요청한 티어(없거나 실패하면 원본)의 URL을 반환합니다."""
+    pathname = f"cached_images/{prompt_hash}.png"
+    blob_result = blob_store.put(pathname=pathname, body=image_data, add_random_suffix=False)
+    image_cache.record_upload(prompt_hash, {pathname: (blob_result['url'], len(image_data))})
+    variant_urls = _store_variants(blob_store, prompt_hash, image_data)
+    _enforce_cache_quota(blob_store, prompt_hash)
+    return variant_urls.get(tier) or blob_result['url']
+
+def _enforce_cache_quota(blob_store, prompt_hash):
+    """캐시 용량 제한을 적용합니다. 지워진 이미지는 아이템 카탈로그에서도 뺍니다."""
+    try:
+        evicted_urls = image_cache.enforce_quota(blob_store, keep=(prompt_hash,))
+        if evicted_urls:
+            item_catalog.forget_image_urls(evicted_urls)
+    except Exception as e:
+        print(f"이미지 캐시 용량 정리 실패: {e}")
 
-    # Vercel Blob 캐시 확인
+def _cached_blob_url(blob_store, pathname):
+    """Blob 캐시에 pathname이 있으면 URL을, 없으면 None을 반환합니다."""
     try:
-        head_result = vercel_head(blob_pathname)
+        head_result = blob_store.head(pathname)
         if head_result:
             print(f"이미지 캐시 히트 (Vercel Blob): {head_result['url']}")
-            return head_result['url'], None
+            return head_result['url']
     except Exception as e: # Typically, vercel_blob.errors.NotFoundError if not found
         if "NotFoundError" in str(type(e)) or "BlobNotFoundError" in str(type(e)) or (hasattr(e, 'status_code') and e.status_code == 404):
-            print(f"이미지 캐시 미스 (Vercel Blob): {blob_pathname}")
+            print(f"이미지 캐시 미스 (Vercel Blob): {pathname}")
         else:
             print(f"Vercel Blob 캐시 확인 중 오류: {e}")
             # Continue to generate image, but log this error
+    return None
+
+def cached_image_url(prompt_text, tier=None):
+    """이미지를 생성하지 않고 Blob 캐시만 확인합니다. 있으면 URL, 없으면 None."""
+    prompt_hash = hashlib.md5(prompt_text.encode()).hexdigest()
+    if tier:
+        pathname = _variant_pathname(prompt_hash, tier, _variant_format())
+    else:
+        pathname = f"cached_images/{prompt_hash}.png"
+    return _cached_blob_url(get_blob_store(), pathname)
+
+def generate_image(prompt_text, tier=None):
+    """OpenAI GPT-Image-1을 사용하여 이미지를 생성하고 Vercel Blob에 캐시합니다.
+
+    tier가 IMAGE_VARIANT_TIERS의 키이면 해당 크기/품질의 축소본 URL을, None이면 원본 PNG URL을 반환합니다.
+    """
+    if tier is not None and tier not in IMAGE_VARIANT_TIERS:
+        return None, f"지원하지 않는 이미지 티어입니다: {tier} (가능: {', '.join(IMAGE_VARIANT_TIERS)})"
+    if not OPENAI_API_KEY:
+        return None, "OpenAI API 키가 설정되지 않았습니다."
+
+    import requests
+    blob_store = get_blob_store()
+
+    prompt_hash = hashlib.md5(prompt_text.encode()).hexdigest()
+    blob_pathname = f"cached_images/{prompt_hash}.png"
+
+    # Vercel Blob 캐시 확인 (요청한 축소본 -> 원본 순)
+    if tier:
+        cached_url = _cached_blob_url(blob_store, _variant_pathname(prompt_hash, tier, _variant_format()))
+        if cached_url:
+            image_cache.touch(cached_url)
+            return cached_url, None
+    cached_url = _cached_blob_url(blob_store, blob_pathname)
+    if cached_url:
+        image_cache.touch(cached_url)
+        if not tier:
+            return cached_url, None
+        # 축소본이 없는 예전 캐시: 원본을 받아 축소본만 만들어 둠
+        try:
+            original = http_pool.get(cached_url, timeout=30)
+            original.raise_for_status()
+            variant_url = _store_variants(blob_store, prompt_hash, original.content).get(tier)
+            _enforce_cache_quota(blob_store, prompt_hash)
+            return variant_url or cached_url, None
+        except Exception as e:
+            print(f"캐시된 원본으로 축소본 생성 실패: {e}")
+            return cached_url, None
 
     headers = {
         "Authorization": f"Bearer {OPENAI_API_KEY}",
@@ -56,7 +192,7 @@ def generate_image(prompt_text):
     }
     
     try:
-        response = requests.post(OPENAI_IMAGE_API_URL, headers=headers, json=payload, timeout=60)
+        response = http_pool.post(OPENAI_IMAGE_API_URL, headers=headers, json=payload, timeout=60)
         
         if response.status_code == 200:
             data = response.json()
@@ -66,9 +202,9 @@ def generate_image(prompt_text):
                 
                 # Vercel Blob에 업로드
                 try:
-                    blob_result = put(pathname=blob_pathname, body=image_data, add_random_suffix=False)
-                    print(f"이미지 업로드 성공 (Vercel Blob): {blob_result['url']}")
-                    return blob_result['url'], None
+                    image_url = _upload_image(blob_store, prompt_hash, image_data, tier)
+                    print(f"이미지 업로드 성공 (Vercel Blob): {image_url}")
+                    return image_url, None
                 except Exception as e:
                     return None, f"Vercel Blob 업로드 실패: {str(e)}"
             else:
@@ -76,13 +212,13 @@ def generate_image(prompt_text):
                 if data.get("data") and len(data["data"]) > 0 and data["data"][0].get("url"):
                     image_url_from_openai = data["data"][0]["url"]
                     # To store in Vercel Blob, we need the image bytes
-                    img_response = requests.get(image_url_from_openai, timeout=30)
+                    img_response = http_pool.get(image_url_from_openai, timeout=30)
                     if img_response.status_code == 200:
                         image_data_from_url = img_response.content
                         try:
-                            blob_result = put(pathname=blob_pathname, body=image_data_from_url, add_random_suffix=False)
-                            print(f"이미지(URL fallback) 업로드 성공 (Vercel Blob): {blob_result['url']}")
-                            return blob_result['url'], None
+                            image_url = _upload_image(blob_store, prompt_hash, image_data_from_url, tier)
+                            print(f"이미지(URL fallback) 업로드 성공 (Vercel Blob): {image_url}")
+                            return image_url, None
                         except Exception as e:
                             return None, f"Vercel Blob 업로드 실패 (URL fallback): {str(e)}"
                     else:
@@ -104,15 +240,39 @@ def generate_image(prompt_text):
     except Exception as e:
         return None, f"OpenAI 이미지 생성 중 알 수 없는 오류: {str(e)}"
 
-# The following functions are removed as they operate on the old local cache.
-# def get_cached_images():
-#     """캐시된 이미지 목록을 반환합니다."""
-#     # Vercel Blob listing might be different, e.g., using list_blobs(prefix="cached_images/")
-#     # This function is out of scope for the current refactoring.
-#     return []
-
-# def clear_image_cache():
-#     """이미지 캐시를 삭제합니다."""
-#     # Vercel Blob deletion would use del_blobs or similar.
-#     # This function is out of scope for the current refactoring.
-#     pass
+def generate_images(prompts, tier=None, max_concurrency=IMAGE_MAX_CONCURRENCY):
+    """여러 프롬프트의 이미지를 생성합니다. 프롬프트 순서대로 (url, error) 목록을 반환합니다.
+
+    같은 프롬프트는 한 번만 요청하고, 각 요청은 generate_image의 Blob 캐시 확인을 거칩니다.
+    gpt-image-1의 n 파라미터는 한 프롬프트의 변형만 만들기 때문에, 서로 다른 아이템은
+    프롬프트별 요청을 최대 max_concurrency개까지 동시에 보냅니다.
+    """
+    unique_prompts = list(dict.fromkeys(prompts))
+    if not unique_prompts:
+        return []
+    if len(unique_prompts) == 1 or max_concurrency <= 1:
+        results = {prompt: generate_image(prompt, tier) for prompt in unique_prompts}
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(unique_prompts))) as executor:
+            futures = {prompt: executor.submit(generate_image, prompt, tier) for prompt in unique_prompts}
+            results = {}
+            for prompt, future in futures.items():
+                try:
+                    results[prompt] = future.result()
+                except Exception as e:
+                    results[prompt] = (None, f"이미지 생성 중 오류: {e}")
+    return [results[prompt] for prompt in prompts]
+
+def get_cached_images(cursor=None, limit=None):
+    """캐시된 이미지 Blob 한 페이지와 캐시 사용량을 반환합니다. 다음 페이지는 반환된 cursor로 요청합니다."""
+    blob_store = get_blob_store()
+    page = image_cache.list_page(blob_store, cursor, limit or image_cache.IMAGE_CACHE_PAGE_SIZE)
+    page["usage"] = image_cache.usage()
+    return page
+
+def clear_image_cache():
+    """캐시된 이미지를 모두 삭제합니다. 삭제한 Blob 수를 반환합니다."""
+    deleted = image_cache.delete_all(get_blob_store())
+    item_catalog.forget_image_urls(None)
+    return deleted
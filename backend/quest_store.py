@@ -0,0 +1,118 @@
+# quest_store.py
+"""
+퀘스트 저장소
+
+player_data["active_quests"]에는 진행 중인 퀘스트만 두고, 완료된 퀘스트는
+player_data["completed_quests"] 보관함으로 옮깁니다 (최근 QUEST_ARCHIVE_MAX개까지만 보관).
+GM 컨텍스트와 GUI 퀘스트 탭은 active_quests만 그리므로 완료된 퀘스트가 쌓여도 길어지지 않습니다.
+
+QuestStore는 player_data를 감싸 이름 인덱스와 상태별 묶음을 만들어, 태그를 처리할 때마다
+목록을 처음부터 훑지 않고 이름으로 바로 찾습니다. 인덱스는 JSON으로 저장되지 않으므로
+player_data를 바꾸는 작업(태그 파싱 한 번)마다 새로 만듭니다.
+"""
+
+from collections import defaultdict
+
+from .config import QUEST_ARCHIVE_MAX, QUEST_ARCHIVE_PAGE_SIZE
+
+COMPLETED_STATUS = "완료"
+
+class QuestStore:
+    def __init__(self, player_data):
+        self.player_data = player_data
+        self.active = player_data.setdefault("active_quests", [])
+        self.archive = player_data.setdefault("completed_quests", [])
+        self._by_name = {}
+        self._by_status = defaultdict(dict)   # 상태 -> {이름: 퀘스트} (추가 순서 유지)
+        for quest in self.active:
+            self._index(quest)
+
+    def _index(self, quest):
+        self._by_name[quest.get("name")] = quest
+        self._by_status[quest.get("status", "진행중")][quest.get("name")] = quest
+
+    def _unindex(self, quest):
+        self._by_name.pop(quest.get("name"), None)
+        bucket = self._by_status.get(quest.get("status", "진행중"))
+        if bucket is not None:
+            bucket.pop(quest.get("name"), None)
+
+    def get(self, name):
+        return self._by_name.get(name)
+
+    def by_status(self, status):
+        """해당 상태인 진행 중 퀘스트 목록."""
+        return list(self._by_status.get(status, {}).values())
+
+    def add(self, name, description, status="진행중", turn=None):
+        """새 퀘스트를 추가합니다. 같은 이름의 진행 중 퀘스트가 있으면 False."""
+        if name in self._by_name:
+            return False
+        if status == COMPLETED_STATUS:
+            # 처음부터 완료 상태로 추가된 퀘스트는 바로 보관함으로
+            self._archive({"name": name, "description": description, "status": status}, turn)
+            return True
+        quest = {"name": name, "description": description, "status": status}
+        self.active.append(quest)
+        self._index(quest)
+        return True
+
+    def update(self, name, status, description, turn=None):
+        """퀘스트 상태/설명을 바꿉니다. 완료 상태로 바뀌면 보관함으로 옮깁니다. 없으면 False."""
+        quest = self._by_name.get(name)
+        if quest is None:
+            return False
+        if status == COMPLETED_STATUS:
+            quest["description"] = description
+            return self.complete(name, turn) is not None
+        self._unindex(quest)
+        quest["status"] = status
+        quest["description"] = description
+        self._index(quest)
+        return True
+
+    def complete(self, name, turn=None):
+        """퀘스트를 완료 처리해 보관함으로 옮깁니다. 완료된 퀘스트(없으면 None)를 반환합니다."""
+        quest = self._by_name.get(name)
+        if quest is None:
+            return None
+        self._unindex(quest)
+        self.active.remove(quest)
+        return self._archive(quest, turn)
+
+    def _archive(self, quest, turn):
+        quest["status"] = COMPLETED_STATUS
+        if turn is not None:
+            quest["completed_turn"] = turn
+        self.archive.append(quest)
+        # 오래된 완료 퀘스트부터 버림
+        if len(self.archive) > QUEST_ARCHIVE_MAX:
+            del self.archive[:len(self.archive) - QUEST_ARCHIVE_MAX]
+        return quest
+
+def archive_completed_quests(player_data):
+    """active_quests에 남아 있는 완료 퀘스트(예전 저장 형식)를 보관함으로 옮깁니다. 옮긴 수를 반환합니다."""
+    active = player_data.get("active_quests") or []
+    finished = [quest for quest in active if quest.get("status") == COMPLETED_STATUS]
+    if not finished:
+        return 0
+    player_data["active_quests"] = [quest for quest in active if quest.get("status") != COMPLETED_STATUS]
+    store = QuestStore(player_data)
+    for quest in finished:
+        store._archive(quest, None)
+    return len(finished)
+
+def completed_quests_page(player_data, page=1, page_size=QUEST_ARCHIVE_PAGE_SIZE):
+    """완료 퀘스트 보관함의 한 페이지 (최근 완료 순)."""
+    archive = player_data.get("completed_quests") or []
+    page = max(1, page)
+    page_size = max(1, min(page_size, QUEST_ARCHIVE_MAX))
+    newest_first = archive[::-1]
+    start = (page - 1) * page_size
+    return {
+        "quests": newest_first[start:start + page_size],
+        "page": page,
+        "page_size": page_size,
+        "total": len(archive),
+        "has_more": start + page_size < len(archive),
+    }
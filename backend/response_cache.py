@@ -0,0 +1,126 @@
+# response_cache.py
+"""
+GM 응답 캐시 (정확히 같은 입력 + 같은 상태일 때만 재사용)
+
+"/api/game/reset" 직후의 첫 인사나 "오늘 뭐 해야 해?"처럼 같은 상태에서 같은 입력이 반복되면
+Gemini 호출 없이 이전 응답을 돌려줍니다. 키는 다음을 합친 해시입니다.
+- 정규화된 입력 (공백/대소문자 무시)
+- 응답에 영향을 주는 상태: 턴 번호를 뺀 플레이어 상태 블록, 불러온 지난 기록 스니펫
+- 직전 GM 응답: "응", "계속"처럼 짧거나 앞 대화에 기대는 입력일 때만
+  (그런 대답이 다른 질문의 답으로 재사용되지 않게 함. 다른 입력에 넣으면 같은 질문도 매번 키가 달라짐)
+- 모델 이름, 추론 예산, GM 기본 프롬프트
+
+캐시된 응답도 parse_gm_response_for_updates를 그대로 거치므로 보상/퀘스트 처리는 같습니다.
+보상을 받으면 상태가 바뀌어 키가 달라지므로 같은 보상이 반복 지급되지는 않습니다.
+"/도움말" 같은 명령어는 process_command가 Gemini 없이 처리하므로 이 캐시를 거치지 않습니다.
+
+항목은 TTL이 지나면 버리고, 최대 개수를 넘으면 가장 오래 쓰지 않은 항목부터 버립니다 (LRU).
+인스턴스 메모리에만 있으므로 서버리스 환경에서는 같은 웜 인스턴스 안에서만 효과가 있습니다.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .context_builder import build_status_block
+from .gemini_client import BASE_GM_PROMPT
+from .speculation import normalize_input
+from .config import (
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_CONTEXT_MAX_CHARS,
+    GEMINI_MODEL_NAME, THINKING_BUDGET
+)
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # 키 -> (GM 응답, 저장 시각)
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+# 모델/프롬프트 설정이 바뀌면 모든 키가 달라지도록 키에 포함
+_CONFIG_DIGEST = hashlib.sha256(
+    f"{GEMINI_MODEL_NAME}|{THINKING_BUDGET}|{BASE_GM_PROMPT}".encode()
+).hexdigest()
+
+# 길이와 상관없이 직전 GM 응답에 기대는 입력 (normalize_input 기준)
+_CONTEXT_DEPENDENT_INPUTS = {
+    "응", "네", "예", "아니", "아니요", "그래", "좋아", "계속", "계속해", "계속해줘", "다음", "그걸로",
+    "그거", "왜", "ok", "yes", "no", "continue",
+}
+
+def is_enabled():
+    return RESPONSE_CACHE_ENABLED
+
+def _last_model_text(history):
+    for entry in reversed(history or []):
+        if isinstance(entry, dict):
+            role, parts = entry.get("role"), entry.get("parts", [])
+        else:
+            role, parts = entry.role, entry.parts or []
+        if role == "model":
+            return "\n".join(part if isinstance(part, str) else getattr(part, "text", None) or "" for part in parts)
+    return ""
+
+def is_context_dependent(normalized):
+    """정규화된 입력이 직전 GM 응답 없이는 뜻이 정해지지 않는지 ("응", "계속" 등)."""
+    bare = normalized.strip(" .!?~")
+    return len(bare) <= RESPONSE_CACHE_CONTEXT_MAX_CHARS or bare in _CONTEXT_DEPENDENT_INPUTS
+
+def cache_key(user_input, player_data, history, memory_snippets=None):
+    """입력, 응답에 영향을 주는 상태, 모델 설정으로 캐시 키를 만듭니다."""
+    normalized = normalize_input(user_input)
+    if not normalized or normalized.startswith("/"):
+        return None
+    state_slice = {
+        "status": build_status_block(player_data),   # game_state 없이: 턴 번호 제외
+        "memory": list(memory_snippets or []),
+    }
+    if is_context_dependent(normalized):
+        state_slice["last_reply"] = _last_model_text(history)
+    payload = json.dumps([normalized, state_slice, _CONFIG_DIGEST], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get(key):
+    """캐시된 GM 응답을 반환합니다. 없거나 만료되었으면 None."""
+    if key is None:
+        return None
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and now - entry[1] > RESPONSE_CACHE_TTL_SECONDS:
+            del _entries[key]
+            _stats["expired"] += 1
+            entry = None
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry[0]
+
+def put(key, gm_response):
+    """GM 응답을 저장합니다. 오류 안내 응답은 저장하지 않습니다."""
+    if key is None or not gm_response or gm_response.startswith("【GM】 오류가 발생했습니다"):
+        return
+    with _lock:
+        _entries[key] = (gm_response, time.monotonic())
+        _entries.move_to_end(key)
+        _stats["stores"] += 1
+        while len(_entries) > RESPONSE_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+def metrics():
+    """적중률 등 캐시 통계를 반환합니다."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            enabled=RESPONSE_CACHE_ENABLED,
+            size=len(_entries),
+            max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+            hit_rate=round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        )
@@ -0,0 +1,203 @@
+# speculation.py
+"""
+추측 실행(speculative) 모드 - config.SPECULATION_ENABLED로 켭니다 (기본 꺼짐).
+
+플레이어가 입력하는 동안 웹 클라이언트가 디바운스된 부분 입력을 /api/game/typing으로 보내면:
+1. 지금까지의 히스토리(다음 턴에도 바뀌지 않는 접두부)를 Gemini 컨텍스트 캐시에 올려 둡니다.
+   send_message는 캐시된 접두부를 빼고 새 턴만 보내므로 입력 처리 시간이 줄어듭니다.
+2. 부분 입력이 자주 제출되던 입력(예: "오늘 명상 10분 했어요")과 같으면 그 입력의 GM 응답을
+   백그라운드에서 미리 생성합니다.
+3. 제출 시 입력과 게임 상태 해시가 모두 같은 응답이 있으면 그대로(진행 중이면 기다려서) 사용하고,
+   상태가 바뀌었으면 모두 버립니다.
+
+상태는 인스턴스 메모리에만 있으므로, 서버리스 환경에서는 typing 요청과 send_message가
+같은 웜 인스턴스에 도착한 경우에만 효과가 있습니다.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from . import gemini_client as gem_client_module
+from . import memory
+from .context_builder import build_gm_context
+from .config import (
+    SPECULATION_ENABLED, SPECULATION_MIN_REPEATS, SPECULATION_MAX_PENDING, SPECULATION_TTL_SECONDS,
+    SPECULATION_CACHE_MIN_CHARS, SPECULATION_CACHE_TTL_SECONDS, GEMINI_MODEL_NAME
+)
+
+_lock = threading.Lock()
+_executor = None
+_input_counts = Counter()   # 정규화된 제출 입력 -> 제출 횟수
+_speculations = {}          # (정규화된 입력, 상태 해시) -> (Future, 생성 시각)
+_prefix_cache = None        # {"key": 히스토리 키, "name": 캐시 이름, "turns": 항목 수, "expires": 만료 시각}
+
+MAX_TRACKED_INPUTS = 500
+
+def is_enabled():
+    return SPECULATION_ENABLED
+
+def normalize_input(text):
+    """공백과 대소문자 차이를 무시한 입력 키."""
+    return " ".join(text.split()).lower()
+
+def _entry_text(entry):
+    if isinstance(entry, dict):
+        parts = entry.get("parts", [])
+    else:
+        parts = entry.parts or []
+    return "\n".join(part if isinstance(part, str) else getattr(part, "text", None) or "" for part in parts)
+
+def _history_key(history):
+    """히스토리 길이와 마지막 항목 해시. 접두부가 같은지 판단하는 데 사용합니다."""
+    if not history:
+        return (0, "")
+    return (len(history), hashlib.sha256(_entry_text(history[-1]).encode()).hexdigest())
+
+def state_hash(game_state):
+    """GM 응답에 영향을 주는 상태(플레이어 데이터, 턴, 히스토리)의 해시."""
+    snapshot = {
+        "player_data": game_state.get("player_data"),
+        "game_turn": game_state.get("game_turn", 0),
+        "history": _history_key(game_state.get("history", [])),
+    }
+    return hashlib.sha256(json.dumps(snapshot, ensure_ascii=False, sort_keys=True, default=str).encode()).hexdigest()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+    return _executor
+
+def record_submission(message):
+    """제출된 입력을 셉니다. 자주 제출된 입력만 응답을 미리 생성합니다."""
+    with _lock:
+        _input_counts[normalize_input(message)] += 1
+        if len(_input_counts) > MAX_TRACKED_INPUTS:
+            kept = _input_counts.most_common(MAX_TRACKED_INPUTS // 2)
+            _input_counts.clear()
+            _input_counts.update(dict(kept))
+
+# --- 컨텍스트 캐시 (안정적인 접두부) ---
+
+def prefix_cache_for(history):
+    """history 앞부분을 담은 유효한 컨텍스트 캐시가 있으면 (캐시 이름, 항목 수), 없으면 (None, 0)."""
+    with _lock:
+        cache = _prefix_cache
+    if not cache or cache["expires"] <= time.monotonic():
+        return None, 0
+    turns = cache["turns"]
+    if len(history) < turns or _history_key(history[:turns]) != cache["key"]:
+        return None, 0
+    return cache["name"], turns
+
+def warm_prefix_cache(client, history):
+    """다음 턴에 보낼 대화 창(memory.recent_window) 전체를 컨텍스트 캐시에 올립니다.
+    이미 같은 캐시가 있으면 아무것도 하지 않습니다.
+
+    반환값: 사용할 수 있는 캐시가 있으면 True.
+    """
+    global _prefix_cache
+    history = memory.recent_window(history or gem_client_module.get_initial_history())[0]
+    if sum(len(_entry_text(entry)) for entry in history) < SPECULATION_CACHE_MIN_CHARS:
+        return False
+    if prefix_cache_for(history)[1] == len(history):
+        return True
+
+    from google.genai import types
+    try:
+        cache = client.caches.create(
+            model=GEMINI_MODEL_NAME,
+            config=types.CreateCachedContentConfig(
+                contents=history,
+                ttl=f"{SPECULATION_CACHE_TTL_SECONDS}s",
+            ),
+        )
+    except Exception as e:
+        print(f"[SPECULATION] 컨텍스트 캐시 생성 실패: {e}")
+        return False
+
+    with _lock:
+        previous, _prefix_cache = _prefix_cache, {
+            "key": _history_key(history),
+            "name": cache.name,
+            "turns": len(history),
+            # 만료 직전의 캐시를 쓰지 않도록 여유를 둠
+            "expires": time.monotonic() + SPECULATION_CACHE_TTL_SECONDS * 0.9,
+        }
+    if previous:
+        try:
+            client.caches.delete(name=previous["name"])
+        except Exception as e:
+            print(f"[SPECULATION] 이전 컨텍스트 캐시 삭제 실패: {e}")
+    print(f"[SPECULATION] 컨텍스트 캐시 생성: {cache.name} ({len(history)}개 항목)")
+    return True
+
+# --- 응답 미리 생성 ---
+
+def _prune_locked(now):
+    for key, (_, created) in list(_speculations.items()):
+        if now - created > SPECULATION_TTL_SECONDS:
+            del _speculations[key]
+
+def _generate(client, message, game_state):
+    # send_message와 같은 순서: 턴 증가 후 컨텍스트 구성
+    turn_state = dict(game_state)
+    turn_state["game_turn"] = game_state.get("game_turn", 0) + 1
+    history = turn_state["history"]
+    window, _, memory_snippets = memory.recall_for_turn(history, turn_state["player_data"], message)
+    context = build_gm_context(message, turn_state["player_data"], turn_state, memory_snippets)
+    cached_content, cached_turns = prefix_cache_for(window)
+    gm_response, updated_window = gem_client_module.get_gm_response(
+        client, context, window, cached_content=cached_content, cached_turns=cached_turns,
+        history_text=message
+    )
+    return gm_response, memory.extend_history(history, window, updated_window)
+
+def speculate_reply(client, message, game_state):
+    """message가 자주 제출되던 입력이면 GM 응답을 백그라운드에서 미리 생성합니다. 시작했으면 True."""
+    normalized = normalize_input(message)
+    if not normalized or normalized.startswith("/"):
+        return False
+    key = (normalized, state_hash(game_state))
+    now = time.monotonic()
+    with _lock:
+        _prune_locked(now)
+        if _input_counts[normalized] < SPECULATION_MIN_REPEATS or key in _speculations \
+                or len(_speculations) >= SPECULATION_MAX_PENDING:
+            return False
+        snapshot = copy.deepcopy({k: v for k, v in game_state.items() if k != "history"})
+        snapshot["history"] = list(game_state.get("history", []))
+        future = _get_executor().submit(_generate, client, message, snapshot)
+        _speculations[key] = (future, now)
+    print(f"[SPECULATION] 응답 미리 생성 시작: {normalized[:30]}")
+    return True
+
+def take_reply(message, current_state_hash):
+    """제출된 입력과 상태가 일치하는 미리 생성 응답을 꺼냅니다 ((응답, 히스토리) 또는 None).
+
+    상태가 곧 바뀌므로 나머지 미리 생성 응답은 모두 버립니다. 진행 중인 생성은 끝날 때까지 기다립니다.
+    """
+    key = (normalize_input(message), current_state_hash)
+    with _lock:
+        _prune_locked(time.monotonic())
+        entry = _speculations.pop(key, None)
+        for _, (other_future, _) in _speculations.items():
+            other_future.cancel()
+        _speculations.clear()
+    if entry is None:
+        return None
+    try:
+        gm_response, history = entry[0].result()
+    except Exception as e:
+        print(f"[SPECULATION] 미리 생성한 응답 사용 실패: {e}")
+        return None
+    # get_gm_response는 API 오류를 오류 안내 응답으로 바꿔 돌려주므로, 그런 응답은 재사용하지 않음
+    if not history or gm_response.startswith("【GM】 오류가 발생했습니다"):
+        return None
+    print(f"[SPECULATION] 미리 생성한 응답 사용: {key[0][:30]}")
+    return gm_response, history
@@ -0,0 +1,41 @@
+# state_patch.py
+"""
+플레이어 데이터 변경분 (JSON Merge Patch, RFC 7386)
+
+send_message는 매 턴 player_data 전체 대신 이번 턴에 바뀐 부분만 돌려줍니다.
+- dict 필드(stats, inventory 등)는 바뀐 키만 담고, 없어진 키는 null로 표시합니다.
+- 그 밖의 값(목록 포함)은 바뀌었으면 새 값 전체를 담습니다.
+클라이언트는 자신이 가진 state_version이 응답의 base_version과 같을 때만 패치를 적용하고,
+다르면 전체 상태를 다시 받습니다. (값 자체가 null인 필드는 패치에서 "삭제"로 보이지만,
+클라이언트는 없는 필드를 null과 같게 취급하므로 문제없습니다.)
+"""
+
+def merge_patch(before, after):
+    """before를 after로 만드는 merge patch. 바뀐 것이 없으면 빈 dict."""
+    patch = {}
+    for key, value in after.items():
+        if key not in before:
+            patch[key] = value
+            continue
+        old_value = before[key]
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            nested = merge_patch(old_value, value)
+            if nested:
+                patch[key] = nested
+        elif value != old_value:
+            patch[key] = value
+    for key in before:
+        if key not in after:
+            patch[key] = None
+    return patch
+
+def apply_merge_patch(target, patch):
+    """target(dict)에 merge patch를 적용합니다 (제자리 수정). target을 반환합니다."""
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            apply_merge_patch(target[key], value)
+        else:
+            target[key] = value
+    return target
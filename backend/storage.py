@@ -0,0 +1,177 @@
+# storage.py
+"""
+게임 상태 저장소 백엔드
+
+모든 백엔드는 KV와 같은 get/set 인터페이스와, 게임 상태 전용 load_state/save_state를 제공합니다.
+- KVStorage: Vercel KV (상태 전체를 하나의 JSON 문자열로 저장)
+- SQLiteStorage: 로컬 SQLite(WAL). 상태 섹션 테이블과 턴 번호로 인덱싱된 히스토리 테이블에
+  변경된 부분만 트랜잭션으로 저장합니다. 데스크톱 클라이언트처럼 네트워크 없이 쓰는 경우용.
+"""
+
+import json
+import sqlite3
+import threading
+
+
+class KVStorage:
+    """Vercel KV 저장소. kv_getter는 호출 시 get/set을 가진 KV 클라이언트를 반환해야 합니다."""
+
+    name = "kv"
+
+    def __init__(self, kv_getter):
+        self._kv_getter = kv_getter
+
+    def get(self, key):
+        return self._kv_getter().get(key)
+
+    def set(self, key, value):
+        return self._kv_getter().set(key, value)
+
+    def load_state(self, key):
+        """저장된 상태를 반환합니다. KV는 JSON 문자열(또는 None)을 그대로 돌려줍니다."""
+        return self.get(key)
+
+    def save_state(self, key, state):
+        """직렬화된(JSON 호환) 상태 dict 전체를 저장합니다."""
+        self.set(key, json.dumps(state))
+
+
+class SQLiteStorage:
+    """SQLite(WAL 모드) 저장소.
+
+    - state_sections: (game_key, section) -> 상태의 최상위 키별 JSON
+    - history: (game_key, turn) -> 대화 기록 한 줄. 바뀌거나 새로 추가된 턴만 씁니다.
+    - kv: KV와 같은 get/set용 일반 키-값 테이블
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state_sections ("
+                " game_key TEXT NOT NULL, section TEXT NOT NULL, data TEXT NOT NULL,"
+                " PRIMARY KEY (game_key, section))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " game_key TEXT NOT NULL, turn INTEGER NOT NULL, role TEXT NOT NULL, parts TEXT NOT NULL,"
+                " PRIMARY KEY (game_key, turn))"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT)")
+        # game_key -> {section: 마지막으로 저장한 JSON}. 바뀌지 않은 섹션은 다시 쓰지 않음
+        self._saved_sections = {}
+        # game_key -> [(role, parts JSON)]: 마지막으로 저장/로드한 히스토리 행. 달라진 행만 다시 씀
+        self._saved_history = {}
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+        return True
+
+    def load_state(self, key):
+        """섹션과 히스토리를 모아 상태 dict를 만듭니다. 저장된 상태가 없으면 None."""
+        with self._lock:
+            sections = self._conn.execute(
+                "SELECT section, data FROM state_sections WHERE game_key = ?", (key,)
+            ).fetchall()
+            if not sections:
+                return None
+            rows = self._conn.execute(
+                "SELECT role, parts FROM history WHERE game_key = ? ORDER BY turn", (key,)
+            ).fetchall()
+
+        self._saved_sections[key] = dict(sections)
+        self._saved_history[key] = list(rows)
+        state = {section: json.loads(data) for section, data in sections}
+        state["history"] = [{"role": role, "parts": json.loads(parts)} for role, parts in rows]
+        return state
+
+    def save_state(self, key, state):
+        """바뀐 섹션과 바뀌거나 새로 추가된 히스토리 턴만 하나의 트랜잭션으로 저장합니다."""
+        encoded_history = [
+            (entry["role"], json.dumps(list(entry["parts"]), ensure_ascii=False))
+            for entry in state.get("history", [])
+        ]
+        encoded_sections = {
+            section: json.dumps(value, ensure_ascii=False)
+            for section, value in state.items() if section != "history"
+        }
+        saved_sections = self._saved_sections.get(key, {})
+        changed_sections = [
+            (key, section, data) for section, data in encoded_sections.items()
+            if saved_sections.get(section) != data
+        ]
+
+        with self._lock, self._conn:
+            if changed_sections:
+                self._conn.executemany(
+                    "INSERT INTO state_sections (game_key, section, data) VALUES (?, ?, ?)"
+                    " ON CONFLICT(game_key, section) DO UPDATE SET data = excluded.data",
+                    changed_sections,
+                )
+            # 다른 프로세스가 저장한 섹션도 지우도록 DB에 있는 섹션 이름과 비교
+            stored_section_names = {
+                row[0] for row in self._conn.execute(
+                    "SELECT section FROM state_sections WHERE game_key = ?", (key,)
+                )
+            }
+            removed_sections = stored_section_names - set(encoded_sections)
+            if removed_sections:
+                self._conn.executemany(
+                    "DELETE FROM state_sections WHERE game_key = ? AND section = ?",
+                    [(key, section) for section in removed_sections],
+                )
+
+            saved_history = self._saved_history.get(key)
+            if saved_history is None:
+                # 이 프로세스에서 처음 저장하는 키: DB의 행과 비교
+                saved_history = self._conn.execute(
+                    "SELECT role, parts FROM history WHERE game_key = ? ORDER BY turn", (key,)
+                ).fetchall()
+            # 앞부분이 고쳐진 턴(예: migrate_history)은 UPDATE, 새 턴은 INSERT, 줄어든 만큼은 DELETE
+            changed_rows = [
+                (key, turn, role, parts)
+                for turn, (role, parts) in enumerate(encoded_history)
+                if turn >= len(saved_history) or tuple(saved_history[turn]) != (role, parts)
+            ]
+            if len(saved_history) > len(encoded_history):
+                self._conn.execute(
+                    "DELETE FROM history WHERE game_key = ? AND turn >= ?", (key, len(encoded_history))
+                )
+            if changed_rows:
+                self._conn.executemany(
+                    "INSERT INTO history (game_key, turn, role, parts) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(game_key, turn) DO UPDATE SET role = excluded.role, parts = excluded.parts",
+                    changed_rows,
+                )
+
+        self._saved_sections[key] = encoded_sections
+        self._saved_history[key] = encoded_history
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def import_game_data_json(json_path, storage, key):
+    """기존 game_data.json(직렬화된 상태)을 저장소로 가져옵니다. 가져온 히스토리 턴 수를 반환합니다."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if not isinstance(state, dict) or "player_data" not in state:
+        raise ValueError(f"{json_path}는 게임 상태 파일 형식이 아닙니다.")
+    storage.save_state(key, state)
+    return len(state.get("history", []))
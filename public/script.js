@@ -22,6 +22,7 @@ document.addEventListener('DOMContentLoaded', () => {
     
     const itemImageEl = document.getElementById('item-image');
     const itemImagePlaceholderEl = document.getElementById('item-image-placeholder');
+    const itemImageGalleryEl = document.getElementById('item-image-gallery');
 
     // Action Buttons (for future tasks, but good to have references)
     const characterCreationButtonEl = document.getElementById('character-creation-button');
@@ -30,6 +31,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // 2. API Base URL
     const API_BASE_URL = '/api'; // Adjust if your dev server runs on a different port
+    const ITEM_IMAGE_TIER = 'small'; // 아이템 이미지는 약 300px로 표시되므로 축소본(WebP)을 요청
 
     // 5. UI Update Functions (Part 1: addMessageToChat - needed early)
     function addMessageToChat(message, type) {
@@ -76,19 +78,60 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // 5. UI Update Functions (Part 4: Inventory)
-    function updateInventoryUI(inventoryArray) {
-        inventoryListEl.innerHTML = ''; // Clear existing items
-        if (inventoryArray && inventoryArray.length > 0) {
-            inventoryArray.forEach(item => {
-                const li = document.createElement('li');
-                // Assuming item is a string or an object with a 'name' property
-                li.textContent = typeof item === 'string' ? item : `${item.name} (${item.effect || 'no effect'})`;
-                inventoryListEl.appendChild(li);
+    // inventory: { 아이템 이름: { count, acquired_turn } } (예전 형식의 이름 배열도 허용)
+    // 이름별 <li>를 재사용해 개수가 바뀐 항목만 텍스트를 바꾸고, 없어진 항목만 지움
+    const inventoryItemEls = new Map();
+    let inventoryEmptyEl = null;
+
+    function inventoryEntries(inventory) {
+        if (Array.isArray(inventory)) {
+            const counts = new Map();
+            inventory.forEach(item => {
+                const name = typeof item === 'string' ? item : item.name;
+                counts.set(name, (counts.get(name) || 0) + 1);
             });
-        } else {
-            const li = document.createElement('li');
-            li.textContent = 'Your inventory is empty.';
-            inventoryListEl.appendChild(li);
+            return Array.from(counts, ([name, count]) => [name, { count }]);
+        }
+        return Object.entries(inventory || {});
+    }
+
+    function updateInventoryUI(inventory) {
+        const entries = inventoryEntries(inventory);
+        const seen = new Set();
+        let previousEl = null;
+        entries.forEach(([name, entry]) => {
+            seen.add(name);
+            const count = (entry && entry.count) || 1;
+            const label = count > 1 ? `${name} x${count}` : name;
+            let li = inventoryItemEls.get(name);
+            if (!li) {
+                li = document.createElement('li');
+                inventoryItemEls.set(name, li);
+            }
+            if (li.textContent !== label) {
+                li.textContent = label;
+            }
+            // 얻은 순서 유지: 제자리에 있지 않을 때만 옮김
+            const expectedNext = previousEl ? previousEl.nextSibling : inventoryListEl.firstChild;
+            if (li !== expectedNext) {
+                inventoryListEl.insertBefore(li, expectedNext);
+            }
+            previousEl = li;
+        });
+        inventoryItemEls.forEach((li, name) => {
+            if (!seen.has(name)) {
+                li.remove();
+                inventoryItemEls.delete(name);
+            }
+        });
+
+        if (entries.length === 0 && !inventoryEmptyEl) {
+            inventoryEmptyEl = document.createElement('li');
+            inventoryEmptyEl.textContent = 'Your inventory is empty.';
+            inventoryListEl.appendChild(inventoryEmptyEl);
+        } else if (entries.length > 0 && inventoryEmptyEl) {
+            inventoryEmptyEl.remove();
+            inventoryEmptyEl = null;
         }
     }
 
@@ -122,11 +165,21 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // 5. UI Update Functions (Part 6: Item Image)
-    function updateItemImage(imageUrl) {
-        if (imageUrl) {
-            itemImageEl.src = imageUrl;
+    // imageUrls: 이번 턴에 드랍된 아이템 이미지 목록. 첫 번째는 큰 이미지, 나머지는 갤러리에 표시
+    function updateItemImage(imageUrls) {
+        const urls = Array.isArray(imageUrls) ? imageUrls : (imageUrls ? [imageUrls] : []);
+        itemImageGalleryEl.innerHTML = '';
+        if (urls.length > 0) {
+            itemImageEl.src = urls[0];
             itemImageEl.style.display = 'block';
             itemImagePlaceholderEl.style.display = 'none';
+            urls.slice(1).forEach(url => {
+                const img = document.createElement('img');
+                img.src = url;
+                img.alt = 'Item image';
+                img.loading = 'lazy';
+                itemImageGalleryEl.appendChild(img);
+            });
         } else {
             itemImageEl.src = '#'; // Clear src
             itemImageEl.style.display = 'none';
@@ -134,21 +187,98 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // 로컬 플레이어 상태. send_message는 known_version이 서버 버전과 같으면 변경분(player_patch, JSON Merge Patch)만
+    // 돌려주므로 여기에 적용하고 바뀐 패널만 다시 그림. 버전이 어긋나면 /game/state로 전체 상태를 다시 받음
+    let playerData = null;
+    let stateVersion = null;
+    const STATS_PANEL_FIELDS = ['level', 'xp', 'xp_to_next_level', 'gold', 'stat_points', 'stats'];
+
+    function applyMergePatch(target, patch) {
+        Object.entries(patch).forEach(([key, value]) => {
+            if (value === null) {
+                delete target[key];
+            } else if (typeof value === 'object' && !Array.isArray(value)
+                       && target[key] && typeof target[key] === 'object' && !Array.isArray(target[key])) {
+                applyMergePatch(target[key], value);
+            } else {
+                target[key] = value;
+            }
+        });
+        return target;
+    }
+
+    // changedFields: 바뀐 player_data 필드 이름 목록 (null이면 전부 다시 그림)
+    function renderPlayerPanels(changedFields) {
+        if (!playerData) return;
+        const changed = field => !changedFields || changedFields.includes(field);
+        if (STATS_PANEL_FIELDS.some(changed)) {
+            updatePlayerStatsUI(playerData);
+        }
+        if (changed('inventory')) {
+            updateInventoryUI(playerData.inventory);
+        }
+        if (changed('active_quests')) {
+            updateQuestsUI(playerData.active_quests);
+        }
+    }
+
+    function setPlayerState(data, version) {
+        playerData = data;
+        stateVersion = (version === undefined) ? null : version;
+        renderPlayerPanels(null);
+    }
+
+    // 전체 게임 상태는 ETag와 함께 localStorage에 보관하고, 조건부 요청(If-None-Match)으로 확인.
+    // 바뀌지 않았으면 서버는 304만 보내므로 새로고침/재연결 시 히스토리를 다시 받지 않음
+    const STATE_CACHE_KEY = 'lifeRpgGameState';
+
+    function loadCachedGameState() {
+        try {
+            const cached = JSON.parse(localStorage.getItem(STATE_CACHE_KEY));
+            return cached && cached.etag && cached.state ? cached : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    async function fetchGameState() {
+        const cached = loadCachedGameState();
+        const response = await fetch(`${API_BASE_URL}/game/state`, {
+            headers: cached ? { 'If-None-Match': cached.etag } : {},
+            cache: 'no-store', // 304 처리를 브라우저 캐시가 아니라 여기서 직접 함
+        });
+        if (response.status === 304 && cached) {
+            return cached.state;
+        }
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => null); // Try to parse error, default to null
+            throw new Error(`Loading game state failed: ${response.status} ${response.statusText}. ${errorData ? errorData.detail : ''}`);
+        }
+        const gameState = await response.json();
+        const etag = response.headers.get('ETag');
+        if (etag) {
+            try {
+                localStorage.setItem(STATE_CACHE_KEY, JSON.stringify({ etag, state: gameState }));
+            } catch (error) {
+                console.warn("Could not cache game state:", error); // 저장 공간 부족 등
+            }
+        }
+        return gameState;
+    }
+
+    async function resyncPlayerState() {
+        const gameState = await fetchGameState();
+        setPlayerState(gameState.player_data, gameState.state_version);
+    }
+
     // 3. initializeGame() Function
     async function initializeGame() {
         addMessageToChat("Initializing game...", "system-message");
         try {
-            const response = await fetch(`${API_BASE_URL}/game/initialize`, { method: 'POST' });
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => null); // Try to parse error, default to null
-                throw new Error(`Initialization failed: ${response.status} ${response.statusText}. ${errorData ? errorData.detail : ''}`);
-            }
-            const gameState = await response.json();
+            const gameState = await fetchGameState();
 
             // Assuming gameState has player_data, history, npcs, shop_items
-            updatePlayerStatsUI(gameState.player_data);
-            updateInventoryUI(gameState.player_data.inventory); // inventory is part of player_data
-            updateQuestsUI(gameState.player_data.active_quests); // active_quests is part of player_data
+            setPlayerState(gameState.player_data, gameState.state_version); // stats, inventory, quests
             
             // Initialize image display (likely no image at start)
             updateItemImage(null); 
@@ -165,6 +295,63 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // 게임 세션 WebSocket. 연결되어 있으면 턴을 여기로 보내고(서버는 메모리 상태에 적용 후 지연 저장),
+    // 연결할 수 없는 환경(서버리스 배포 등)이거나 끊기면 HTTP send_message로 돌아감.
+    // 서버는 한 연결의 메시지를 순서대로 처리하므로 응답도 보낸 순서대로 옴
+    let gameSocket = null;
+    const pendingTurns = [];
+
+    function connectGameSocket() {
+        if (!('WebSocket' in window)) return;
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        let socket;
+        try {
+            socket = new WebSocket(`${protocol}//${window.location.host}${API_BASE_URL}/game/ws`);
+        } catch (error) {
+            return;
+        }
+        socket.onmessage = event => {
+            const data = JSON.parse(event.data);
+            if (data.type === 'hello') {
+                gameSocket = socket;
+                return;
+            }
+            const pending = pendingTurns.shift();
+            if (!pending) return;
+            if (data.type === 'error') {
+                pending.reject(new Error(data.detail));
+            } else {
+                pending.resolve(data);
+            }
+        };
+        socket.onclose = () => {
+            if (gameSocket === socket) gameSocket = null;
+            // 응답을 받지 못한 턴은 실패로 처리 (서버에 적용됐을 수 있으므로 다시 보내지 않음)
+            while (pendingTurns.length) {
+                pendingTurns.shift().reject(new Error("Connection to the game server was lost."));
+            }
+        };
+    }
+
+    async function requestTurn(body) {
+        if (gameSocket && gameSocket.readyState === WebSocket.OPEN) {
+            return new Promise((resolve, reject) => {
+                pendingTurns.push({ resolve, reject });
+                gameSocket.send(JSON.stringify(body));
+            });
+        }
+        const response = await fetch(`${API_BASE_URL}/game/send_message`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        });
+        if (!response.ok) {
+             const errorData = await response.json().catch(() => null); // Try to parse JSON error response
+             throw new Error(errorData ? errorData.detail : `Message send failed: ${response.status} ${response.statusText}`);
+        }
+        return response.json();
+    }
+
     // 4. sendMessage() Function
     async function sendMessage() {
         const messageText = playerInputEl.value.trim();
@@ -172,19 +359,10 @@ document.addEventListener('DOMContentLoaded', () => {
 
         addMessageToChat(`${messageText}`, 'player-message'); // Displayed as "You: messageText" by style
         playerInputEl.value = ''; // Clear input field
+        clearTimeout(typingTimer); // 제출했으므로 대기 중인 입력 알림은 보내지 않음
 
         try {
-            const response = await fetch(`${API_BASE_URL}/game/send_message`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: messageText })
-            });
-
-            if (!response.ok) {
-                 const errorData = await response.json().catch(() => null); // Try to parse JSON error response
-                 throw new Error(errorData ? errorData.detail : `Message send failed: ${response.status} ${response.statusText}`);
-            }
-            const data = await response.json();
+            const data = await requestTurn({ message: messageText, image_tier: ITEM_IMAGE_TIER, known_version: stateVersion });
 
             if(data.command_response) {
                  addMessageToChat(data.command_response, 'system-message');
@@ -201,10 +379,16 @@ document.addEventListener('DOMContentLoaded', () => {
                 data.new_achievements.forEach(ach => addMessageToChat(`Achievement unlocked: ${ach.name || ach}!`, 'system-message'));
             }
             
-            updatePlayerStatsUI(data.player_data);
-            updateInventoryUI(data.player_data.inventory);
-            updateQuestsUI(data.player_data.active_quests);
-            updateItemImage(data.image_url);
+            if (data.player_data) {
+                setPlayerState(data.player_data, data.state_version);
+            } else if (data.player_patch && playerData && data.base_version === stateVersion) {
+                applyMergePatch(playerData, data.player_patch);
+                stateVersion = data.state_version;
+                renderPlayerPanels(Object.keys(data.player_patch));
+            } else {
+                await resyncPlayerState(); // 버전 불일치: 전체 상태를 다시 받음
+            }
+            updateItemImage(data.image_urls || data.image_url);
 
         } catch (error) {
             console.error("Send Message Error:", error);
@@ -212,6 +396,26 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // 추측 실행 모드: 입력이 잠시 멈추면 서버가 컨텍스트 캐시를 데우고 응답을 미리 만들 수 있도록 알림.
+    // 서버에서 꺼져 있으면({enabled: false}) 이후로는 보내지 않음
+    const TYPING_DEBOUNCE_MS = 600;
+    let typingTimer = null;
+    let speculationEnabled = true;
+    function notifyTyping() {
+        const partial = playerInputEl.value.trim();
+        if (!speculationEnabled || partial.length < 2 || partial.startsWith('/')) return;
+        fetch(`${API_BASE_URL}/game/typing`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ partial })
+        })
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                if (data && data.enabled === false) speculationEnabled = false;
+            })
+            .catch(() => {}); // 최적화용 요청이므로 실패는 무시
+    }
+
     // Event Listeners
     sendButtonEl.addEventListener('click', sendMessage);
     playerInputEl.addEventListener('keypress', (event) => {
@@ -219,9 +423,13 @@ document.addEventListener('DOMContentLoaded', () => {
             sendMessage();
         }
     });
+    playerInputEl.addEventListener('input', () => {
+        clearTimeout(typingTimer);
+        typingTimer = setTimeout(notifyTyping, TYPING_DEBOUNCE_MS);
+    });
 
     // Initial game load
-    initializeGame();
+    initializeGame().then(connectGameSocket);
 
     // --- Character Creation Modal Logic ---
     const characterCreationModalEl = document.getElementById('character-creation-modal');
@@ -335,7 +543,8 @@ document.addEventListener('DOMContentLoaded', () => {
             }
 
             const updatedPlayerData = await response.json();
-            updatePlayerStatsUI(updatedPlayerData); // Update main UI
+            // 서버 버전이 올라갔으므로 버전은 모름으로 두고, 다음 메시지에서 전체 상태를 받음
+            setPlayerState(updatedPlayerData, null); // Update main UI
             // If initializeGame also updates global state, ensure consistency or reload full state
             // For now, just update the stats shown.
             addMessageToChat("Character stats successfully set!", "system-message");
@@ -381,10 +590,11 @@ document.addEventListener('DOMContentLoaded', () => {
 - Reset Game: Click 'Reset Game' to start over (requires confirmation).
 
 [Slash Commands (Type in input field)]
-  (Note: The backend currently supports /능력치분배, /능력치설정, /스탯, /인벤토리.
+  (Note: The backend currently supports /능력치분배, /능력치설정, /스탯, /인벤토리, /사용.
    The frontend doesn't explicitly parse these, but the backend will respond if you send them.)
 - /스탯 : Shows your current stats (GM will respond).
 - /인벤토리 : Shows your inventory (GM will respond).
+- /사용 [item] : Uses (consumes) one of an inventory item.
         `;
         alert(helpText);
     });
@@ -419,7 +629,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Review and Refine UI Update Functions (already implemented with clearing and empty states)
     // updatePlayerStatsUI: Updates textContent, so implicitly clears old. Handles nullish values for defaults.
-    // updateInventoryUI: Sets inventoryListEl.innerHTML = ''; Clears old. Handles empty array.
+    // updateInventoryUI: Reuses one <li> per item name; removes items that are gone. Handles empty inventory.
     // updateQuestsUI: Sets questsListEl.innerHTML = ''; Clears old. Handles empty array.
     // These functions seem robust enough for reset scenarios.
     // One addition to initializeGame: clear chat before loading history.
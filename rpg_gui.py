@@ -6,16 +6,302 @@ import threading
 import queue
 import sys
 import copy
+import time
+import io
+import os
+import json
+import hashlib
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from config import WINDOW_WIDTH, WINDOW_HEIGHT, CHAT_DISPLAY_WIDTH, CHAT_DISPLAY_HEIGHT, check_api_keys
+from config import WINDOW_WIDTH, WINDOW_HEIGHT, CHAT_DISPLAY_WIDTH, CHAT_DISPLAY_HEIGHT, IMAGE_MAX_PER_TURN, check_api_keys
 from game_state_manager import load_game_state, save_game_state, DEFAULT_GAME_STATE, deserialize_history
 from gemini_client import get_gemini_client, get_gm_response
-from openai_image_client import generate_image
+from context_builder import build_gm_context, strip_status_block, INITIAL_HISTORY_TURNS
+from image_prewarm import record_reward_items, prewarm_item_images, generate_item_image as generate_item_card
+from memory import recall_for_turn, extend_history
+from inventory import inventory_lines
 from game_logic import (
-    parse_gm_response_for_updates, extract_image_prompt, 
-    process_command, check_achievements
+    parse_gm_response_for_updates, extract_image_prompts, 
+    process_command, check_achievements, register_command
 )
 
+# 이미지 생성 스레드 수 (GM 턴과 별도)
+IMAGE_WORKERS = 2
+
+# 아이템 이미지 로더 설정
+IMAGE_TIER = "small"  # 패널 크기(약 300px)에 맞는 축소본을 받음 (config.IMAGE_VARIANT_TIERS)
+THUMBNAIL_SIZE = (300, 300)
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"  # 내용 해시로 이름 붙인 썸네일 디스크 캐시
+IMAGE_MEMORY_CACHE_SIZE = 32             # 메모리에 유지할 디코딩된 썸네일 수
+IMAGE_FETCH_TIMEOUT_SECONDS = 30
+IMAGE_HTTP_POOL_SIZE = 4
+
+# 한가할 때 자주 나오는 아이템 이미지를 미리 생성 (image_prewarm)
+IDLE_PREWARM_SECONDS = 60     # 마지막 턴 이후 이만큼 입력이 없으면 프리워밍 시작
+IDLE_PREWARM_MAX_IMAGES = 1   # 한 번의 유휴 구간에서 새로 생성할 최대 이미지 수
+
+# 채팅 스크롤백 설정
+CHAT_MAX_MESSAGES = 200      # 채팅창에 유지할 최대 메시지 수 (넘으면 위에서부터 제거)
+CHAT_INITIAL_MESSAGES = 60   # 시작 시 저장된 히스토리에서 보여줄 최근 메시지 수
+CHAT_LOAD_CHUNK = 20         # 위로 스크롤할 때 한 번에 불러올 이전 메시지 수
+CHAT_REPLAY_CHUNK = 10       # 시작 시 한 번의 after 콜백에서 그릴 메시지 수
+
+# 퀘스트 탭 레이아웃 (diff 갱신 시 줄 번호 계산용)
+QUEST_HEADER_LINES = 2  # "=== 진행 중인 퀘스트 ===" + 빈 줄
+QUEST_BLOCK_LINES = 3   # 이름 + 상태 + 빈 줄
+
+# 저장 파이프라인 설정
+SAVE_DEBOUNCE_SECONDS = 0.5       # 마지막 저장 요청 후 이 시간 동안 새 요청이 없으면 저장
+SAVE_FLUSH_TIMEOUT_SECONDS = 3.0  # 종료 시 대기 중인 저장을 기다리는 최대 시간
+CLOSE_TURN_WAIT_SECONDS = 5.0     # 종료 시 진행 중인 턴이 끝나기를 기다리는 최대 시간
+
+# 워커 스레드 -> UI 스레드 알림용 가상 이벤트
+QUEUE_EVENT = "<<QueueUpdated>>"
+
+class NotifyingQueue(queue.Queue):
+    """put할 때마다 notify를 호출하는 큐 (UI 스레드를 깨우는 용도)."""
+    def __init__(self, notify):
+        super().__init__()
+        self._notify = notify
+        
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self._notify()
+
+def diff_range(old, new):
+    """두 목록의 공통 앞/뒷부분을 제외한 변경 구간을 (시작, old 끝, new 끝)으로 반환합니다."""
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+def history_entry_message(history, index):
+    """대화 기록 항목을 채팅창에 표시할 (메시지, 태그)로 변환합니다. 표시하지 않을 항목은 None.
+
+    기본 GM 프롬프트와 첫 인사(처음 INITIAL_HISTORY_TURNS개 항목)는 건너뛰고,
+    예전 형식으로 상태 블록째 저장된 사용자 항목은 플레이어 입력만 표시합니다.
+    """
+    def entry_text(entry):
+        if isinstance(entry, dict):
+            role, parts = entry.get("role"), entry.get("parts", [])
+        else:
+            role, parts = entry.role, entry.parts or []
+        texts = [part if isinstance(part, str) else getattr(part, "text", None) or "" for part in parts]
+        return role, "\n".join(texts)
+    
+    if index < INITIAL_HISTORY_TURNS:
+        return None
+    role, text = entry_text(history[index])
+    if role == "user":
+        return f"플레이어: {strip_status_block(text)}", "player"
+    return text, "gm"
+
+class ImageLoader:
+    """아이템 이미지를 백그라운드 스레드에서 받아 디코딩/축소하고 캐시합니다.
+
+    - URL은 연결을 재사용하는 requests.Session으로 받습니다 (로컬 경로도 허용).
+    - JPEG는 Image.draft로 축소 디코딩하고, thumbnail은 reducing_gap으로 먼저 정수배 축소합니다.
+    - 디스크 캐시: 원본 내용의 sha256으로 이름 붙인 썸네일 PNG + URL -> 해시 인덱스(index.json)
+    - 메모리 캐시: 소스별로 디코딩이 끝난(PhotoImage로 바로 만들 수 있는) PIL 이미지 LRU
+
+    PhotoImage는 Tk 스레드에서만 만들 수 있으므로 load()는 PIL 이미지를 반환합니다.
+    """
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, size=THUMBNAIL_SIZE, memory_items=IMAGE_MEMORY_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.size = tuple(size)
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = None
+        self._index_path = os.path.join(cache_dir, "index.json")
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+            
+    def load(self, source):
+        """source(URL 또는 파일 경로)의 썸네일을 반환합니다. 워커 스레드에서 호출하세요."""
+        image = self._memory_get(source)
+        if image is not None:
+            return image
+        
+        # URL -> 내용 해시 인덱스로 다운로드 없이 디스크 캐시 확인
+        digest = self._index.get(source)
+        image = self._read_thumbnail(digest) if digest else None
+        if image is None:
+            data = self._fetch(source)
+            digest = hashlib.sha256(data).hexdigest()
+            # 같은 내용을 다른 URL로 받은 경우에도 썸네일을 재사용
+            image = self._read_thumbnail(digest)
+            if image is None:
+                image = self._decode_thumbnail(data)
+                self._write_thumbnail(digest, image)
+            self._remember(source, digest)
+        
+        self._memory_put(source, image)
+        return image
+        
+    def _thumbnail_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}_{self.size[0]}x{self.size[1]}.png")
+        
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=IMAGE_HTTP_POOL_SIZE, pool_maxsize=IMAGE_HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+        
+    def _fetch(self, source):
+        if source.startswith(("http://", "https://")):
+            response = self._get_session().get(source, timeout=IMAGE_FETCH_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            return response.content
+        with open(source, "rb") as f:
+            return f.read()
+            
+    def _decode_thumbnail(self, data):
+        img = Image.open(io.BytesIO(data))
+        if img.format == "JPEG":
+            # DCT 단계에서 목표 크기에 가깝게 축소 디코딩
+            img.draft("RGB", self.size)
+        img.thumbnail(self.size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img.load()
+        return img
+        
+    def _read_thumbnail(self, digest):
+        try:
+            img = Image.open(self._thumbnail_path(digest))
+            img.load()
+            return img
+        except (OSError, ValueError):
+            return None
+            
+    def _write_thumbnail(self, digest, image):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._thumbnail_path(digest)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            image.save(temp_path, format="PNG")
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"[IMAGE_LOADER] 썸네일 캐시 저장 실패: {e}")
+            
+    def _remember(self, source, digest):
+        with self._lock:
+            if self._index.get(source) == digest:
+                return
+            self._index[source] = digest
+            index = dict(self._index)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{self._index_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(temp_path, self._index_path)
+        except OSError as e:
+            print(f"[IMAGE_LOADER] 썸네일 인덱스 저장 실패: {e}")
+            
+    def _memory_get(self, source):
+        with self._lock:
+            image = self._memory.get(source)
+            if image is not None:
+                self._memory.move_to_end(source)
+            return image
+            
+    def _memory_put(self, source, image):
+        with self._lock:
+            self._memory[source] = image
+            self._memory.move_to_end(source)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+class BackgroundSaver:
+    """게임 상태를 전용 백그라운드 스레드에서 저장합니다.
+
+    저장 요청이 몰리면 가장 최근 스냅샷 하나만 남기고(coalescing),
+    마지막 요청 후 debounce초가 지나면 저장합니다. UI 스레드는 I/O를 기다리지 않습니다.
+    """
+    def __init__(self, save_func, debounce=SAVE_DEBOUNCE_SECONDS):
+        self.save_func = save_func
+        self.debounce = debounce
+        self._cond = threading.Condition()
+        self._pending = None
+        self._requested_at = 0.0
+        self._saving = False
+        self._flushing = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="game-state-saver", daemon=True)
+        self._thread.start()
+        
+    def request_save(self, state):
+        """현재 상태의 스냅샷을 저장 대기열에 올립니다 (이전 대기 스냅샷은 대체됨)."""
+        snapshot = copy.deepcopy(state)
+        with self._cond:
+            self._pending = snapshot
+            self._requested_at = time.monotonic()
+            self._cond.notify_all()
+            
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                # 디바운스: 새 요청이 계속 들어오면 마지막 요청 기준으로 다시 기다림
+                while not self._flushing and not self._stopped:
+                    remaining = self._requested_at + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                snapshot, self._pending = self._pending, None
+                self._saving = True
+            try:
+                self.save_func(snapshot)
+            except Exception as e:
+                print(f"[SAVE_WORKER] 게임 저장 실패: {e}")
+            finally:
+                with self._cond:
+                    self._saving = False
+                    self._cond.notify_all()
+                    
+    def flush(self, timeout=SAVE_FLUSH_TIMEOUT_SECONDS):
+        """대기 중인 저장을 즉시 수행하고 끝날 때까지 최대 timeout초 기다립니다. 완료 여부를 반환합니다."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                while self._pending is not None or self._saving:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing = False
+                
+    def stop(self, timeout=SAVE_FLUSH_TIMEOUT_SECONDS):
+        """대기 중인 저장을 마무리하고 저장 스레드를 종료합니다."""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        return flushed
+
 class CharacterCreationDialog:
     def __init__(self, parent, callback):
         self.parent = parent
@@ -201,23 +487,80 @@ class RPGGameGUI:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # 큐 설정
-        self.message_queue = queue.Queue()
-        self.image_queue = queue.Queue()
-        
-        # 게임 상태
+        # 워커가 큐에 넣으면 가상 이벤트로 UI 스레드를 깨움 (폴링 없음)
+        self.ui_event_lock = threading.Lock()
+        self.ui_event_pending = False
+        self.ui_state_dirty = False
+        self.queue_status_dirty = False
+        self.message_queue = NotifyingQueue(self.notify_ui)
+        self.image_queue = NotifyingQueue(self.notify_ui)
+        
+        # 턴 실행기: 입력은 한 번에 하나씩 순서대로 처리, 이미지는 별도 풀에서 생성
+        self.turn_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gm-turn")
+        self.image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="item-image")
+        self.pending_turns = []               # (future, cancel_event), 제출 순서
+        self.turn_lock = threading.Lock()     # pending_turns 보호
+        
+        # 게임 상태 (저장은 백그라운드 스레드에서 디바운스 후 수행)
+        self.saver = BackgroundSaver(save_game_state)
+        self.image_loader = ImageLoader()
         self.game_state = load_game_state()
         self.player_data = self.game_state["player_data"]
         self.gemini_client = None
         self.conversation_history = []
         
+        # GUI 전용 명령어 등록
+        self.register_gui_commands()
+        
+        # 마지막으로 그린 위젯 내용 (update_ui는 달라진 부분만 갱신)
+        self.rendered_labels = {}
+        self.rendered_inventory = []
+        self.rendered_quests = None
+        
+        # 채팅창 스크롤백: 표시 중인 메시지 (태그 이름, 히스토리 인덱스 또는 None), 위에서부터 순서대로
+        self.chat_records = deque()
+        self.chat_message_count = 0
+        self.history_loaded_from = 0   # 이보다 앞의 히스토리 항목은 채팅창에 없음 (스크롤 시 로드)
+        self.loading_older = False
+        self.replaying_history = False
+        
         # UI 구성
         self.setup_ui()
         
         # 게임 초기화
         self.initialize_game()
         
-        # 큐 처리 시작
-        self.process_queues()
+        # 큐 처리: 워커가 보내는 가상 이벤트에 반응
+        self.root.bind(QUEUE_EVENT, self.process_queues)
+        
+        # 유휴 시간 이미지 프리워밍
+        self.prewarm_after_id = None
+        self.prewarm_future = None
+        self.schedule_idle_prewarm()
+        
+    def register_gui_commands(self):
+        """GUI 전용 명령어를 공용 명령어 레지스트리에 등록합니다."""
+        register_command("/종료", self._command_exit, usage="/종료")
+        register_command("/도움말", self._command_help, usage="/도움말")
+        register_command("/초기화", self._command_reset, usage="/초기화")
+        register_command("/캐릭터생성", self._command_character_creation, usage="/캐릭터생성")
+        
+    def _command_exit(self, args, player_data, game_state):
+        self.message_queue.put(("【GM】 게임을 저장하고 종료합니다. 다음에 또 만나요!", "gm"))
+        self.root.after(1000, self.on_closing)
+        return "", False
+        
+    def _command_help(self, args, player_data, game_state):
+        self.root.after(0, self.show_help)
+        return "", False
+        
+    def _command_reset(self, args, player_data, game_state):
+        self.root.after(0, self.confirm_reset)
+        return "", False
+        
+    def _command_character_creation(self, args, player_data, game_state):
+        self.root.after(0, self.show_character_creation)
+        return "", False
         
     def setup_ui(self):
         """UI를 설정합니다."""
@@ -245,6 +588,8 @@ class RPGGameGUI:
             insertbackground='white'
         )
         self.chat_display.pack(fill=tk.BOTH, expand=True, padx=(0, 5))
+        # 맨 위로 스크롤하면 이전 메시지를 불러오도록 스크롤 콜백을 감쌈
+        self.chat_display.configure(yscrollcommand=self.on_chat_scroll)
         
         # 태그 설정
         self.chat_display.tag_config("gm", foreground="#FFD700")
@@ -260,9 +605,15 @@ class RPGGameGUI:
         self.input_field.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
         self.input_field.bind('<Return>', self.send_message)
         
+        self.cancel_button = ttk.Button(input_frame, text="취소", command=self.cancel_turns, state='disabled')
+        self.cancel_button.pack(side=tk.RIGHT, padx=(5, 0))
+        
         self.send_button = ttk.Button(input_frame, text="전송", command=self.send_message)
         self.send_button.pack(side=tk.RIGHT)
         
+        self.queue_label = ttk.Label(input_frame, text="", width=14)
+        self.queue_label.pack(side=tk.RIGHT, padx=(0, 5))
+        
         # 오른쪽 영역 (정보 패널)
         right_frame = ttk.Frame(main_frame, width=350)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=(5, 0))
@@ -385,6 +736,12 @@ class RPGGameGUI:
         else:
             self.conversation_history = []  # Initialize as empty list; get_gm_response will use INITIAL_HISTORY
         
+        # 최근 대화는 창이 뜬 뒤 조금씩 나눠서 채팅창에 다시 그림
+        self.history_loaded_from = len(self.conversation_history)
+        if self.history_loaded_from:
+            self.replaying_history = True
+            self.root.after(0, self.replay_history_chunk, CHAT_INITIAL_MESSAGES)
+        
         # 환영 메시지
         if self.game_state.get("game_turn", 0) == 0:
             welcome_message = """【GM】 인생 RPG의 세계에 오신 것을 환영합니다, 모험가님! 😊
@@ -419,7 +776,7 @@ class RPGGameGUI:
         self.update_ui()
         
     def send_message(self, event=None):
-        """메시지를 전송합니다."""
+        """메시지를 전송합니다. 턴은 전용 실행기에서 입력 순서대로 하나씩 처리됩니다."""
         user_input = self.input_field.get().strip()
         if not user_input:
             return
@@ -427,42 +784,87 @@ class RPGGameGUI:
         self.input_field.delete(0, tk.END)
         self.display_message(f"플레이어: {user_input}", "player")
         
-        # 백그라운드 스레드에서 처리
-        threading.Thread(target=self.process_message, args=(user_input,), daemon=True).start()
-        
-    def process_message(self, user_input):
-        """메시지를 처리합니다."""
-        try:
-            # 게임 턴 증가
-            self.game_state["game_turn"] = self.game_state.get("game_turn", 0) + 1
-            self.player_data["last_activity"] = user_input
+        with self.turn_lock:
+            if self.pending_turns:
+                self.display_message(f"【SYSTEM】 입력이 대기열에 추가되었습니다. (앞선 턴 {len(self.pending_turns)}개)", "system")
+            cancel_event = threading.Event()
+            future = self.turn_executor.submit(self.process_message, user_input, cancel_event)
+            turn = (future, cancel_event)
+            self.pending_turns.append(turn)
+        future.add_done_callback(lambda _f, t=turn: self._on_turn_done(t))
+        self.update_queue_status()
+        
+    def _on_turn_done(self, turn):
+        with self.turn_lock:
+            if turn in self.pending_turns:
+                self.pending_turns.remove(turn)
+        self.queue_status_dirty = True
+        self.notify_ui()
+        
+    def update_queue_status(self):
+        """대기 중/진행 중인 턴 수를 표시합니다."""
+        with self.turn_lock:
+            count = len(self.pending_turns)
+        if count:
+            self.queue_label.config(text=f"처리 중 1 · 대기 {count - 1}" if count > 1 else "처리 중")
+            self.cancel_button.config(state='normal')
+        else:
+            self.queue_label.config(text="")
+            self.cancel_button.config(state='disabled')
+        self.schedule_idle_prewarm()
             
-            # 명령어 처리
-            if user_input.lower() == "/종료":
-                self.message_queue.put(("【GM】 게임을 저장하고 종료합니다. 다음에 또 만나요!", "gm"))
-                self.root.after(1000, self.on_closing)
-                return
+    def schedule_idle_prewarm(self):
+        """턴이 없으면 IDLE_PREWARM_SECONDS 후 프리워밍을 예약하고, 턴이 있으면 예약을 취소합니다."""
+        if self.prewarm_after_id is not None:
+            self.root.after_cancel(self.prewarm_after_id)
+            self.prewarm_after_id = None
+        if not self.pending_turns:
+            self.prewarm_after_id = self.root.after(IDLE_PREWARM_SECONDS * 1000, self.start_idle_prewarm)
             
-            elif user_input.lower() == "/도움말":
-                self.root.after(0, self.show_help)
-                return
+    def start_idle_prewarm(self):
+        self.prewarm_after_id = None
+        if self.pending_turns or (self.prewarm_future and not self.prewarm_future.done()):
+            return
+        # 이미지 풀에서 실행: 예산(IDLE_PREWARM_MAX_IMAGES) 안에서 캐시에 없는 후보만 생성
+        self.prewarm_future = self.image_executor.submit(prewarm_item_images, IDLE_PREWARM_MAX_IMAGES)
             
-            elif user_input.lower() == "/초기화":
-                self.root.after(0, self.confirm_reset)
+    def cancel_turns(self):
+        """대기 중인 입력을 모두 취소하고, 진행 중인 턴은 결과를 버리도록 표시합니다."""
+        with self.turn_lock:
+            turns = list(self.pending_turns)
+        cancelled = 0
+        for future, cancel_event in turns:
+            cancel_event.set()
+            if future.cancel() or not future.done():
+                cancelled += 1
+        if cancelled:
+            self.display_message(f"【SYSTEM】 턴 {cancelled}개를 취소했습니다.", "system")
+        self.update_queue_status()
+        
+    def process_message(self, user_input, cancel_event=None):
+        """메시지를 처리합니다.
+
+        턴 실행기 스레드(단일 소비자)에서 입력 순서대로 하나씩 실행되므로, 게임 상태를 바꾸는
+        작업은 모두 이 스레드에서만 일어납니다.
+        """
+        cancel_event = cancel_event or threading.Event()
+        try:
+            if cancel_event.is_set():
                 return
             
-            elif user_input.lower() == "/캐릭터생성":
-                self.root.after(0, self.show_character_creation)
-                return
+            # 게임 턴 증가 (GM 응답 중에 취소되면 아래에서 되돌림)
+            previous_turn_fields = (self.game_state.get("game_turn", 0), self.player_data.get("last_activity"),
+                                    self.player_data.get("initial_setup_done"))
+            self.game_state["game_turn"] = previous_turn_fields[0] + 1
+            self.player_data["last_activity"] = user_input
             
-            # 능력치 분배 처리
-            command_result, is_command = process_command(user_input, self.player_data)
-            if is_command:
-                self.message_queue.put((f"【SYSTEM】 {command_result}", "system"))
-                self.root.after(0, self.update_ui)
-                return
-            elif command_result:  # 명령어였지만 실행되지 않은 경우
-                self.message_queue.put((f"【SYSTEM】 {command_result}", "system"))
+            # 명령어 처리 (공용 + GUI 전용 명령어 레지스트리)
+            command_result, state_changed = process_command(user_input, self.player_data, self.game_state)
+            if command_result is not None:
+                if command_result:
+                    self.message_queue.put((f"【SYSTEM】 {command_result}", "system"))
+                if state_changed:
+                    self.request_ui_update()
                 return
             
             # 초기 설정 완료 체크
@@ -470,100 +872,168 @@ class RPGGameGUI:
                 if any(keyword in user_input for keyword in ["목표", "할 일", "퀘스트", "과제"]):
                     self.player_data["initial_setup_done"] = True
             
-            # GM에게 보낼 컨텍스트 구성
-            context = self.build_context(user_input)
+            # GM에게 보낼 컨텍스트 구성 (최근 대화 창 + 창 밖의 관련 기록 스니펫)
+            history_window, _, memory_snippets = recall_for_turn(self.conversation_history, self.player_data, user_input)
+            context = self.build_context(user_input, memory_snippets)
             
             # GM 응답 받기 - CORRECTED SECTION
-            gm_response_text, updated_history = get_gm_response(
+            gm_response_text, updated_window = get_gm_response(
                 self.gemini_client,      # Use the main gemini client
                 context,
-                self.conversation_history  # Pass the current conversation history
+                history_window,          # 최근 대화 창만 전달
+                history_text=user_input     # 기록에는 상태 블록 없이 원래 입력만 저장
             )
-            self.message_queue.put((gm_response_text, "gm"))
+            updated_history = extend_history(self.conversation_history, history_window, updated_window)
+            if cancel_event.is_set():
+                # 진행 중에 취소된 턴: 응답과 히스토리를 반영하지 않고 턴 번호/마지막 활동도 되돌림
+                (self.game_state["game_turn"], self.player_data["last_activity"],
+                 self.player_data["initial_setup_done"]) = previous_turn_fields
+                self.message_queue.put(("【SYSTEM】 취소된 턴의 GM 응답을 버렸습니다.", "system"))
+                return
+            
             self.conversation_history = updated_history     # Update the conversation history
+            self.message_queue.put((gm_response_text, "gm", len(updated_history) - 1))
             
             # 게임 상태 업데이트 (use gm_response_text)
-            updates = parse_gm_response_for_updates(gm_response_text, self.player_data)
+            changed_fields = set()
+            updates = parse_gm_response_for_updates(gm_response_text, self.player_data, self.game_state, changed_fields)
+            record_reward_items(gm_response_text)
             if updates:
                 update_msg = "【SYSTEM】 " + ", ".join(updates)
                 self.message_queue.put((update_msg, "system"))
-                # 퀘스트가 추가되었으면 UI 즉시 업데이트
-                if any("퀘스트 추가" in update for update in updates):
-                    self.root.after(0, self.update_ui)
-            
-            # 이미지 생성 확인 (use gm_response_text)
-            image_prompt = extract_image_prompt(gm_response_text)
-            if image_prompt:
-                self.message_queue.put(("【SYSTEM】 아이템 이미지를 생성하는 중...", "system"))
-                # Consider running generate_image in a separate thread if it's blocking
-                image_path, error = generate_image(image_prompt)
-                if image_path:
-                    self.image_queue.put(image_path)
-                    self.message_queue.put(("【SYSTEM】 아이템 이미지가 생성되었습니다!", "system"))
-                else:
-                    self.message_queue.put((f"【SYSTEM】 이미지 생성 실패: {error}", "error"))
+            
+            # 이미지 생성은 별도 풀에서 실행해 다음 GM 응답을 지연시키지 않음 (여러 아이템은 풀 크기만큼 동시에)
+            image_prompts = extract_image_prompts(gm_response_text)[:IMAGE_MAX_PER_TURN]
+            if image_prompts:
+                self.message_queue.put((f"【SYSTEM】 아이템 이미지 {len(image_prompts)}개를 생성하는 중...", "system"))
+                for image_prompt in image_prompts:
+                    self.image_executor.submit(self.generate_item_image, image_prompt)
             
             # 업적 확인
-            new_achievements = check_achievements(self.player_data)
+            new_achievements = check_achievements(self.player_data, self.game_state, changed_fields)
             if new_achievements:
                 for achievement in new_achievements:
                     self.message_queue.put((f"【SYSTEM】 업적 달성! '{achievement}' 칭호를 획득했습니다!", "system"))
             
-            self.root.after(0, self.update_ui)
+            self.request_ui_update()
             
-            # 게임 저장 - CORRECTED SECTION
+            # 게임 저장 (백그라운드 저장 스레드로 전달)
             self.game_state["history"] = self.conversation_history # Save the updated history
-            save_game_state(self.game_state)
+            self.saver.request_save(self.game_state)
             
         except Exception as e:
             self.message_queue.put((f"【ERROR】 처리 중 오류 발생: {str(e)}", "error"))
             
-    def build_context(self, user_input):
-        """GM에게 보낼 컨텍스트를 구성합니다."""
-        title = self.player_data.get("title", "")
+    def generate_item_image(self, image_prompt):
+        """이미지 생성 풀에서 아이템 이미지를 생성합니다."""
+        try:
+            image_url, error = generate_item_card(image_prompt, tier=IMAGE_TIER)
+            if image_url:
+                # 다운로드/디코딩/축소는 이 워커 스레드에서, UI 스레드는 PhotoImage만 만듦
+                self.image_queue.put(self.image_loader.load(image_url))
+                self.message_queue.put(("【SYSTEM】 아이템 이미지가 생성되었습니다!", "system"))
+            else:
+                self.message_queue.put((f"【SYSTEM】 이미지 생성 실패: {error}", "error"))
+        except Exception as e:
+            self.message_queue.put((f"【SYSTEM】 이미지 생성 실패: {str(e)}", "error"))
+            
+    def build_context(self, user_input, memory_snippets=None):
+        """GM에게 보낼 컨텍스트를 구성합니다 (상태 블록은 이번 요청에만 포함)."""
+        return build_gm_context(user_input, self.player_data, self.game_state, memory_snippets)
         
-        # 현재 퀘스트 정보 구성
-        quest_info = ""
-        if self.player_data.get('active_quests'):
-            quest_info = "현재 진행 중인 퀘스트:\n"
-            for i, quest in enumerate(self.player_data['active_quests'], 1):
-                quest_info += f"  {i}. {quest.get('name', '이름 없음')} - {quest.get('status', '진행중')}\n"
-                quest_info += f"     설명: {quest.get('description', '설명 없음')}\n"
+    def display_message(self, message, tag="gm", history_index=None):
+        """채팅 디스플레이에 메시지를 추가합니다.
+
+        history_index는 이 메시지에 해당하는 대화 기록 항목 인덱스입니다. 스크롤백 한도를 넘어
+        위에서 잘려 나간 메시지는 이 인덱스를 기준으로 스크롤할 때 다시 불러옵니다.
+        """
+        at_bottom = self.chat_display.yview()[1] >= 1.0
+        record_tag = self.next_chat_tag()
+        self.chat_display.insert(tk.END, message + "\n\n", (tag, record_tag))
+        self.chat_records.append((record_tag, history_index))
+        
+        # 이전 기록을 읽는 중이 아닐 때만 위에서부터 잘라냄 (보던 위치가 밀리지 않도록)
+        if at_bottom:
+            while len(self.chat_records) > CHAT_MAX_MESSAGES:
+                self.trim_oldest_message()
+            self.chat_display.see(tk.END)
+            
+    def next_chat_tag(self):
+        self.chat_message_count += 1
+        return f"msg{self.chat_message_count}"
+        
+    def trim_oldest_message(self):
+        """채팅창 맨 위 메시지를 제거합니다."""
+        record_tag, history_index = self.chat_records.popleft()
+        ranges = self.chat_display.tag_ranges(record_tag)
+        if ranges:
+            self.chat_display.delete(ranges[0], ranges[-1])
+        self.chat_display.tag_delete(record_tag)
+        if history_index is not None:
+            self.history_loaded_from = max(self.history_loaded_from, history_index + 1)
+            
+    def load_older_messages(self, count):
+        """채팅창 맨 위에 이전 대화 기록을 최대 count개 붙입니다. 불러온 메시지 수를 반환합니다."""
+        history = self.conversation_history
+        index = min(self.history_loaded_from, len(history))
+        messages = []
+        while index > 0 and len(messages) < count:
+            index -= 1
+            message = history_entry_message(history, index)
+            if message:
+                messages.append((message, index))
+        self.history_loaded_from = index
+        if not messages:
+            return 0
+        
+        # 화면 위치 유지: 기존 맨 위 메시지를 기준으로 다시 스크롤
+        at_bottom = self.chat_display.yview()[1] >= 1.0
+        anchor = self.chat_records[0][0] if self.chat_records else None
+        for (text, tag), history_index in messages:  # 최신 -> 오래된 순으로 맨 앞에 삽입
+            record_tag = self.next_chat_tag()
+            self.chat_display.insert("1.0", text + "\n\n", (tag, record_tag))
+            self.chat_records.appendleft((record_tag, history_index))
+        if at_bottom:
+            self.chat_display.see(tk.END)
+        elif anchor:
+            self.chat_display.yview(f"{anchor}.first")
+        return len(messages)
+        
+    def replay_history_chunk(self, remaining):
+        """시작 시 저장된 대화를 CHAT_REPLAY_CHUNK개씩 나눠 그립니다 (창이 바로 뜨도록)."""
+        loaded = self.load_older_messages(min(CHAT_REPLAY_CHUNK, remaining))
+        remaining -= loaded
+        if loaded and remaining > 0 and self.history_loaded_from > 0:
+            self.root.after(1, self.replay_history_chunk, remaining)
         else:
-            quest_info = "현재 진행 중인 퀘스트: 없음"
-        
-        return f"""
---- 현재 플레이어 상태 ---
-{title}레벨: {self.player_data['level']} (XP: {self.player_data['xp']}/{self.player_data['xp_to_next_level']})
-골드: {self.player_data['gold']}G
-능력치: 힘 {self.player_data['stats']['힘']}, 지능 {self.player_data['stats']['지능']}, 의지력 {self.player_data['stats']['의지력']}, 체력 {self.player_data['stats']['체력']}, 매력 {self.player_data['stats']['매력']}
-보유 스탯 포인트: {self.player_data['stat_points']}
-인벤토리: {', '.join(self.player_data['inventory']) if self.player_data['inventory'] else '비어있음'}
-업적: {', '.join(self.player_data['achievements']) if self.player_data['achievements'] else '없음'}
-
-{quest_info}
-
---- 퀘스트 관리 안내 ---
-새 퀘스트 추가: [QUEST_ADD: 퀘스트이름 | 설명 | 상태]
-퀘스트 완료: [QUEST_COMPLETE: 퀘스트이름]
-퀘스트 업데이트: [QUEST_UPDATE: 퀘스트이름 | 새상태 | 새설명]
-보상 지급: [REWARD: XP +30, 골드 +15, 아이템: 아이템이름]
----
-플레이어: {user_input}
-"""
-        
-    def display_message(self, message, tag="gm"):
-        """채팅 디스플레이에 메시지를 추가합니다."""
-        self.chat_display.insert(tk.END, message + "\n\n", tag)
-        self.chat_display.see(tk.END)
-        
-    def display_image(self, image_path):
-        """이미지를 표시합니다."""
+            self.replaying_history = False
+            
+    def on_chat_scroll(self, first, last):
+        """채팅창 스크롤 콜백. 맨 위에 닿으면 이전 메시지를 불러옵니다."""
+        self.chat_display.vbar.set(first, last)
+        if float(first) <= 0.0 and float(last) < 1.0 and self.history_loaded_from > 0 \
+                and not self.loading_older and not self.replaying_history:
+            self.loading_older = True
+            self.root.after_idle(self.load_older_on_scroll)
+            
+    def load_older_on_scroll(self):
         try:
-            img = Image.open(image_path)
-            # 이미지 크기 조정
-            img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
+            self.load_older_messages(CHAT_LOAD_CHUNK)
+        finally:
+            self.loading_older = False
+            
+    def clear_chat(self):
+        """채팅창과 스크롤백 상태를 비웁니다."""
+        self.chat_display.delete(1.0, tk.END)
+        for record_tag, _ in self.chat_records:
+            self.chat_display.tag_delete(record_tag)
+        self.chat_records.clear()
+        self.history_loaded_from = 0
+        
+    def display_image(self, image):
+        """이미지 로더가 축소해 둔 이미지를 표시합니다."""
+        try:
+            photo = ImageTk.PhotoImage(image)
             
             self.image_label.configure(image=photo, text="")
             self.image_label.image = photo  # 참조 유지
@@ -571,47 +1041,93 @@ class RPGGameGUI:
             self.message_queue.put((f"【ERROR】 이미지 표시 오류: {str(e)}", "error"))
             
     def update_ui(self):
-        """UI를 업데이트합니다."""
+        """UI를 업데이트합니다. 이전에 그린 값과 달라진 위젯만 갱신합니다."""
         # 레벨, XP, 골드 업데이트
         title = self.player_data.get("title", "")
-        self.level_label.config(text=f"{title}레벨: {self.player_data['level']}")
-        self.xp_label.config(text=f"XP: {self.player_data['xp']}/{self.player_data['xp_to_next_level']}")
-        self.gold_label.config(text=f"골드: {self.player_data['gold']}G")
+        self.set_label(self.level_label, f"{title}레벨: {self.player_data['level']}")
+        self.set_label(self.xp_label, f"XP: {self.player_data['xp']}/{self.player_data['xp_to_next_level']}")
+        self.set_label(self.gold_label, f"골드: {self.player_data['gold']}G")
         
         # 능력치 업데이트
         for stat_name, label in self.stats_labels.items():
-            label.config(text=str(self.player_data['stats'][stat_name]))
-        
-        self.stat_points_label.config(text=f"사용 가능 포인트: {self.player_data['stat_points']}")
-        
-        # 인벤토리 업데이트
-        self.inventory_listbox.delete(0, tk.END)
-        for item in self.player_data['inventory']:
-            self.inventory_listbox.insert(tk.END, item)
+            self.set_label(label, str(self.player_data['stats'][stat_name]))
+        
+        self.set_label(self.stat_points_label, f"사용 가능 포인트: {self.player_data['stat_points']}")
+        
+        # 인벤토리 업데이트 (바뀐 행만 삭제/삽입)
+        items = inventory_lines(self.player_data)
+        start, old_end, new_end = diff_range(self.rendered_inventory, items)
+        if old_end > start:
+            self.inventory_listbox.delete(start, old_end - 1)
+        for offset, item in enumerate(items[start:new_end]):
+            self.inventory_listbox.insert(start + offset, item)
+        self.rendered_inventory = items
             
-        # 퀘스트 업데이트
+        # 퀘스트 업데이트 (바뀐 퀘스트 블록만 교체)
+        quests = self.player_data.get('active_quests') or []
+        blocks = [
+            f"{i}. {quest.get('name', '이름 없음')}\n   상태: {quest.get('status', '진행중')}\n\n"
+            for i, quest in enumerate(quests, 1)
+        ]
+        if self.rendered_quests is None or bool(blocks) != bool(self.rendered_quests):
+            self.render_quests(blocks)
+        else:
+            start, old_end, new_end = diff_range(self.rendered_quests, blocks)
+            # 블록 하나는 3줄, 머리글은 2줄
+            first_line = QUEST_HEADER_LINES + 1 + start * QUEST_BLOCK_LINES
+            if old_end > start:
+                last_line = QUEST_HEADER_LINES + 1 + old_end * QUEST_BLOCK_LINES
+                self.quest_text.delete(f"{first_line}.0", f"{last_line}.0")
+            if new_end > start:
+                self.quest_text.insert(f"{first_line}.0", "".join(blocks[start:new_end]))
+            self.rendered_quests = blocks
+            
+    def set_label(self, label, text):
+        """라벨 텍스트가 달라졌을 때만 위젯을 갱신합니다."""
+        if self.rendered_labels.get(label) != text:
+            label.config(text=text)
+            self.rendered_labels[label] = text
+            
+    def render_quests(self, blocks):
+        """퀘스트 탭 전체를 다시 그립니다 (빈 목록 <-> 목록 전환 시)."""
         self.quest_text.delete(1.0, tk.END)
-        if self.player_data.get('active_quests') and len(self.player_data['active_quests']) > 0:
+        if blocks:
             self.quest_text.insert(tk.END, "=== 진행 중인 퀘스트 ===\n\n")
-            for i, quest in enumerate(self.player_data['active_quests'], 1):
-                quest_name = quest.get('name', '이름 없음')
-                quest_status = quest.get('status', '진행중')
-                self.quest_text.insert(tk.END, f"{i}. {quest_name}\n")
-                self.quest_text.insert(tk.END, f"   상태: {quest_status}\n\n")
+            self.quest_text.insert(tk.END, "".join(blocks))
         else:
             self.quest_text.insert(tk.END, "GM에게 목표를 알려주면 퀘스트로 변환해드립니다!\n\n")
             self.quest_text.insert(tk.END, "예시:\n")
             self.quest_text.insert(tk.END, "• '오늘 운동 30분 하기'\n")
             self.quest_text.insert(tk.END, "• '영어 공부 1시간'\n")
             self.quest_text.insert(tk.END, "• '방 정리하기'\n")
+        self.rendered_quests = blocks
+        
+    def notify_ui(self):
+        """워커 스레드에서 UI 스레드를 깨웁니다. 이미 처리 대기 중인 이벤트가 있으면 합칩니다."""
+        with self.ui_event_lock:
+            if self.ui_event_pending:
+                return
+            self.ui_event_pending = True
+        try:
+            self.root.event_generate(QUEUE_EVENT, when="tail")
+        except (tk.TclError, RuntimeError):
+            # 창이 이미 닫힌 경우
+            pass
+            
+    def request_ui_update(self):
+        """게임 상태가 바뀌었음을 알립니다. 여러 번 호출돼도 UI 갱신은 한 번만 일어납니다."""
+        self.ui_state_dirty = True
+        self.notify_ui()
+        
+    def process_queues(self, event=None):
+        """큐에 있는 메시지와 이미지를 처리합니다 (QUEUE_EVENT 핸들러)."""
+        with self.ui_event_lock:
+            self.ui_event_pending = False
             
-    def process_queues(self):
-        """큐에 있는 메시지와 이미지를 처리합니다."""
         # 메시지 큐 처리
         try:
             while True:
-                message, tag = self.message_queue.get_nowait()
-                self.display_message(message, tag)
+                self.display_message(*self.message_queue.get_nowait())
         except queue.Empty:
             pass
             
@@ -623,23 +1139,29 @@ class RPGGameGUI:
         except queue.Empty:
             pass
             
-        # 100ms 후에 다시 실행
-        self.root.after(100, self.process_queues)
+        if self.ui_state_dirty:
+            self.ui_state_dirty = False
+            self.update_ui()
+        if self.queue_status_dirty:
+            self.queue_status_dirty = False
+            self.update_queue_status()
         
     def show_character_creation(self):
         """캐릭터 생성 다이얼로그를 표시합니다."""
+        def apply_stats(stats):
+            # 턴 실행기에서 실행: 진행 중인 턴과 상태 변경이 겹치지 않음
+            self.player_data["stats"].update(stats)
+            self.saver.request_save(self.game_state)
+            self.request_ui_update()
+            
         def on_character_created(stats):
             if stats:
                 # 능력치 적용
-                self.player_data["stats"].update(stats)
-                self.update_ui()
+                self.turn_executor.submit(apply_stats, stats)
                 
                 # 시스템 메시지 표시
                 stats_text = ", ".join([f"{stat} {value}" for stat, value in stats.items()])
                 self.display_message(f"【SYSTEM】 캐릭터가 생성되었습니다! 능력치: {stats_text}", "system")
-                
-                # 게임 저장
-                save_game_state(self.game_state)
         
         CharacterCreationDialog(self.root, on_character_created)
     
@@ -687,21 +1209,43 @@ class RPGGameGUI:
     def confirm_reset(self):
         """게임 초기화를 확인합니다."""
         if messagebox.askyesno("초기화 확인", "정말로 모든 게임 진행 상황을 초기화하시겠습니까?"):
-            self.game_state = copy.deepcopy(DEFAULT_GAME_STATE)
-            self.player_data = self.game_state["player_data"]
-            self.conversation_history = []  # Reset conversation history
+            # 대기 중인 입력은 버리고, 초기화는 턴 실행기에서 진행 중인 턴 다음에 실행
+            self.cancel_turns()
             
-            self.chat_display.delete(1.0, tk.END)
-            self.display_message("【GM】 게임이 초기화되었습니다. 새로운 모험을 시작해봅시다!", "gm")
+            def reset_state():
+                self.game_state = copy.deepcopy(DEFAULT_GAME_STATE)
+                self.player_data = self.game_state["player_data"]
+                self.conversation_history = []  # Reset conversation history
+                self.saver.request_save(self.game_state)
+                self.request_ui_update()
             
-            self.update_ui()
-            save_game_state(self.game_state)
+            self.turn_executor.submit(reset_state)
+            
+            self.clear_chat()
+            self.display_message("【GM】 게임이 초기화되었습니다. 새로운 모험을 시작해봅시다!", "gm")
             
     def on_closing(self):
         """프로그램 종료 시 호출됩니다."""
-        # Corrected: Save self.conversation_history which is List[Content]
-        self.game_state["history"] = self.conversation_history
-        save_game_state(self.game_state)
+        # 창을 먼저 숨기고, 대기 중인 턴은 취소
+        self.root.withdraw()
+        self.cancel_turns()
+        
+        # 마지막 스냅샷은 턴 실행기에서 만듦: 진행 중인 턴이 상태를 바꾸는 도중에 복사하지 않도록
+        # 그 턴이 끝난 뒤에 실행됨 (제한 시간을 넘기면 마지막으로 끝난 턴이 요청한 저장만 반영)
+        def final_save():
+            # Corrected: Save self.conversation_history which is List[Content]
+            self.game_state["history"] = self.conversation_history
+            self.saver.request_save(self.game_state)
+        final_save_future = self.turn_executor.submit(final_save)
+        self.turn_executor.shutdown(wait=False)
+        self.image_executor.shutdown(wait=False)
+        try:
+            final_save_future.result(timeout=CLOSE_TURN_WAIT_SECONDS)
+        except Exception as e:
+            print(f"[SAVE_WORKER] 진행 중인 턴이 끝나지 않아 마지막 스냅샷을 건너뜁니다: {e!r}")
+        # 대기 중인 저장은 제한 시간 안에서만 기다림
+        if not self.saver.stop(timeout=SAVE_FLUSH_TIMEOUT_SECONDS):
+            print("[SAVE_WORKER] 종료 전 저장이 제한 시간 안에 끝나지 않았습니다.")
         self.root.destroy()
         
     def run(self):
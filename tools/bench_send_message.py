@@ -0,0 +1,185 @@
+# bench_send_message.py
+"""
+send_message 벤치마크 (가짜 KV / 가짜 Gemini / 로컬 이미지 API 스텁 사용)
+
+실제 서비스 없이 backend.main.send_message를 직접 호출하여
+히스토리 길이, 동시 세션 수, 응답 크기별 처리량과 p50/p99 지연 시간을 측정합니다.
+결과를 기준 파일로 저장해 두고 이후 실행에서 회귀를 검사할 수 있습니다.
+
+사용 예:
+python tools/bench_send_message.py
+python tools/bench_send_message.py --history 0 200 1000 --concurrency 1 8 --payload 500 4000
+python tools/bench_send_message.py --save-baseline tools/bench_baseline.json
+python tools/bench_send_message.py --compare tools/bench_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fakes import FakeImageAPIServer, InMemoryBlobStore, InMemoryKV, ScriptedGeminiClient
+
+SCRIPTED_REPLIES = [
+    "【GM】 훌륭합니다, 모험가님! 오늘의 수련을 기록해 두겠습니다.\n[QUEST_UPDATE: 매일 명상 | 진행중 | 오늘도 10분 명상 완료]",
+    "【GM】 퀘스트를 완수하셨군요!\n[QUEST_COMPLETE: 매일 명상]\n[REWARD: XP +30, 골드 +15]",
+    "【GM】 새로운 도전이 시작됩니다!\n[QUEST_ADD: 독서 20분 | 20분간 책 읽기 | 진행중]",
+    "【GM】 좋습니다! 계속 이렇게만 해주세요. ✨",
+]
+
+
+def _image_reply(index):
+    item = f"벤치 아이템 {index}"
+    return (f"【GM】 아이템 드랍!\n[REWARD: XP +10, 골드 +5, 아이템: {item}]\n"
+            f"(이미지 생성: {item}, 게임 아이템 카드 스타일, 판타지풍, 빛나는 효과)")
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def _seed_state(gsm, history_turns, message_chars):
+    """초기 설정이 끝난 상태에 history_turns 턴 분량의 히스토리를 채워 KV에 저장합니다."""
+    import copy
+    state = copy.deepcopy(gsm.DEFAULT_GAME_STATE)
+    state["player_data"]["initial_setup_done"] = True
+    history = []
+    for turn in range(history_turns):
+        history.append({"role": "user", "parts": [f"턴 {turn}: " + "가" * message_chars]})
+        history.append({"role": "model", "parts": [SCRIPTED_REPLIES[turn % len(SCRIPTED_REPLIES)]]})
+    state["history"] = history
+    state["game_turn"] = history_turns
+    gsm.save_game_state(state)
+
+
+async def _run_scenario(main_module, message, concurrency, requests_per_session):
+    latencies = []
+
+    async def session():
+        for _ in range(requests_per_session):
+            start = time.perf_counter()
+            await main_module.send_message(main_module.PlayerMessage(message=message))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def run_benchmarks(args):
+    server = FakeImageAPIServer(latency=args.image_latency).start()
+    # backend.config는 import 시점에 환경 변수를 읽으므로 import 전에 설정
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["OPENAI_IMAGE_API_URL"] = server.url
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from backend import game_state_manager as gsm
+        from backend import gemini_client as gem_client_module
+        from backend import openai_image_client
+        from backend import main as main_module
+
+    kv = InMemoryKV(latency=args.kv_latency)
+    gsm.set_kv_store(kv)
+    openai_image_client.set_blob_store(InMemoryBlobStore())
+
+    results = {}
+    try:
+        for history_turns in args.history:
+            for concurrency in args.concurrency:
+                for payload in args.payload:
+                    replies = list(SCRIPTED_REPLIES)
+                    if args.image_every:
+                        replies += [_image_reply(i) for i in range(max(1, len(replies) // args.image_every))]
+                    gem_client_module.set_gemini_client(
+                        ScriptedGeminiClient(replies, latency=args.gemini_latency, pad_to=payload)
+                    )
+                    message = "오늘 명상 10분 했어요. " + "가" * max(0, args.message_chars - 14)
+
+                    with contextlib.redirect_stdout(io.StringIO()):  # 게임 로직의 [DEBUG] 로그 억제
+                        _seed_state(gsm, history_turns, args.message_chars)
+                        elapsed, latencies = asyncio.run(
+                            _run_scenario(main_module, message, concurrency, args.requests)
+                        )
+
+                    latencies.sort()
+                    name = f"history={history_turns},concurrency={concurrency},payload={payload}"
+                    results[name] = {
+                        "requests": len(latencies),
+                        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+                        "p50_ms": _percentile(latencies, 0.50) * 1000,
+                        "p99_ms": _percentile(latencies, 0.99) * 1000,
+                        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+                    }
+                    r = results[name]
+                    print(f"{name:<45} {r['throughput_rps']:>9.1f} req/s  "
+                          f"p50 {r['p50_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms")
+    finally:
+        server.stop()
+    return results
+
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    """기준 결과 대비 p50/p99가 tolerance 이상 느려졌거나 처리량이 떨어진 시나리오를 찾습니다."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]:.2f} -> {current[metric]:.2f}")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 백엔드로 send_message 처리량/지연 시간을 측정합니다.")
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 100, 500], help="히스토리 턴 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="동시 세션 수")
+    parser.add_argument("--payload", type=int, nargs="+", default=[500, 4000], help="GM 응답 크기(문자 수)")
+    parser.add_argument("--requests", type=int, default=20, help="세션당 요청 수")
+    parser.add_argument("--message-chars", type=int, default=100, help="플레이어 입력 크기(문자 수)")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="가짜 Gemini 호출 지연(초)")
+    parser.add_argument("--kv-latency", type=float, default=0.0, help="가짜 KV 호출 지연(초)")
+    parser.add_argument("--image-latency", type=float, default=0.0, help="이미지 API 스텁 지연(초)")
+    parser.add_argument("--image-every", type=int, default=0, help="N개 응답당 이미지 드랍 응답 1개 추가 (0: 없음)")
+    parser.add_argument("--save-baseline", help="결과를 저장할 기준 파일")
+    parser.add_argument("--compare", help="비교할 기준 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀로 판단할 상대 변화량")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+        print(f"기준 결과 저장: {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare_with_baseline(results, args.compare, args.tolerance)
+        if regressions:
+            print("성능 회귀 감지:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("기준 결과 대비 회귀 없음.")
+
+
+if __name__ == "__main__":
+    main()
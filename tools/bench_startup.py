@@ -0,0 +1,122 @@
+# bench_startup.py
+"""
+콜드 스타트(import 시간) 벤치마크
+
+`python -X importtime -c "import backend.main"`을 새 프로세스로 여러 번 실행해
+backend.main의 누적 import 시간과 가장 비싼 모듈들을 보고합니다.
+무거운 클라이언트 라이브러리(google.genai, requests, vercel_blob, vercel_kv)가
+import 시점에 로드되지 않는지도 확인합니다.
+
+사용 예:
+python tools/bench_startup.py
+python tools/bench_startup.py --runs 10 --top 20
+python tools/bench_startup.py --save-baseline tools/startup_baseline.json
+python tools/bench_startup.py --compare tools/startup_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 콜드 스타트에 로드되면 안 되는 모듈 (첫 사용 시 지연 로드)
+LAZY_MODULES = ("google.genai", "requests", "vercel_blob", "vercel_kv")
+
+# 자식 프로세스의 결과 줄 표시. config.py의 API 키 경고 같은 다른 stdout 출력과 구분
+RESULT_PREFIX = "__BENCH_STARTUP_EAGER__:"
+
+
+def _parse_importtime(stderr):
+    """-X importtime 출력에서 {모듈: (self_us, cumulative_us)}를 만듭니다."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # 형식: "import time:       123 |        456 |   package.module"
+        try:
+            self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def measure_once(target):
+    check_lazy = (
+        "import sys; "
+        f"print({RESULT_PREFIX!r} + ','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}; {check_lazy}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{target} import 실패:\n{completed.stderr[-2000:]}")
+
+    modules = _parse_importtime(completed.stderr)
+    result_line = next(
+        (line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)), None
+    )
+    if result_line is None:
+        raise RuntimeError(f"{target} 측정 결과를 찾을 수 없습니다:\n{completed.stdout[-2000:]}")
+    eagerly_loaded = [m for m in result_line[len(RESULT_PREFIX):].split(",") if m]
+    return {
+        "wall_s": wall,
+        "target_cumulative_us": modules.get(target, (0, 0))[1],
+        "modules": modules,
+        "eagerly_loaded": eagerly_loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backend.main의 콜드 스타트 import 시간을 측정합니다.")
+    parser.add_argument("--target", default="backend.main", help="측정할 모듈 (기본: backend.main)")
+    parser.add_argument("--runs", type=int, default=5, help="측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=15, help="출력할 상위 모듈 수")
+    parser.add_argument("--save-baseline", help="결과를 저장할 기준 파일")
+    parser.add_argument("--compare", help="비교할 기준 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀로 판단할 상대 변화량")
+    args = parser.parse_args()
+
+    runs = [measure_once(args.target) for _ in range(max(1, args.runs))]
+    wall_ms = statistics.median(run["wall_s"] for run in runs) * 1000
+    import_ms = statistics.median(run["target_cumulative_us"] for run in runs) / 1000
+
+    print(f"{args.target}: import {import_ms:.1f} ms (중앙값), 프로세스 전체 {wall_ms:.1f} ms, {len(runs)}회")
+    print(f"상위 {args.top}개 모듈 (누적 ms):")
+    last_modules = runs[-1]["modules"]
+    for name, (self_us, cumulative_us) in sorted(last_modules.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1000:>9.1f}  (self {self_us / 1000:>7.1f})  {name}")
+
+    eagerly_loaded = runs[-1]["eagerly_loaded"]
+    if eagerly_loaded:
+        print(f"경고: import 시점에 로드된 지연 대상 모듈: {', '.join(eagerly_loaded)}")
+
+    result = {"target": args.target, "import_ms": import_ms, "wall_ms": wall_ms, "eagerly_loaded": eagerly_loaded}
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"기준 결과 저장: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if import_ms > baseline["import_ms"] * (1 + args.tolerance):
+            print(f"콜드 스타트 회귀: {baseline['import_ms']:.1f} ms -> {import_ms:.1f} ms")
+            sys.exit(1)
+        print(f"기준 결과 대비 회귀 없음 ({baseline['import_ms']:.1f} ms -> {import_ms:.1f} ms).")
+
+    if eagerly_loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
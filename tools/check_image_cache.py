@@ -0,0 +1,136 @@
+# check_image_cache.py
+"""
+이미지 캐시 인덱스/용량 제한 검사 (가짜 KV / 인메모리 Blob 저장소 사용, API 호출 없음)
+
+backend.image_cache의 용량 초과 정리 순서(LRU/LFU, 카탈로그 참조, keep),
+Blob 목록 페이지 넘김, delete_all, rebuild_index를 확인합니다. 실패하면 종료 코드 1.
+
+사용 예:
+python tools/check_image_cache.py
+"""
+
+import os
+import sys
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import game_state_manager as gsm
+from backend import image_cache
+from tools.fakes import InMemoryBlobStore, InMemoryKV
+
+IMAGE_BYTES = 100
+
+
+def _hash(index):
+    return f"{index:032x}"
+
+
+def _fresh_cache(image_count):
+    """이미지 image_count개(각 IMAGE_BYTES)를 올린 새 저장소를 만듭니다. 0번이 가장 오래전에 쓴 이미지."""
+    gsm.set_kv_store(InMemoryKV())
+    image_cache._pending_touches.clear()
+    blob_store = InMemoryBlobStore()
+    for index in range(image_count):
+        pathname = f"cached_images/{_hash(index)}.png"
+        url = blob_store.put(pathname=pathname, body=b"x" * IMAGE_BYTES)["url"]
+        image_cache.record_upload(_hash(index), {pathname: (url, IMAGE_BYTES)})
+        entry = image_cache.load_entry(_hash(index))
+        entry["last_access"] = float(index + 1)  # 올린 순서대로 LRU 시각을 고정
+        image_cache._save_entry(_hash(index), entry)
+    return blob_store
+
+
+def _remaining(blob_store):
+    return sorted(image_cache.prompt_hash_of(blob["pathname"]) for blob in blob_store.list(prefix="")["blobs"])
+
+
+def check_lru_order(failures):
+    blob_store = _fresh_cache(5)
+    # 0번은 카탈로그가 참조, 1번은 방금 사용, 2번은 keep
+    image_cache.change_refs([f"https://blob.local/cached_images/{_hash(0)}.png"])
+    image_cache.touch(f"cached_images/{_hash(1)}.png")
+    image_cache.flush_touches()
+    evicted = image_cache.enforce_quota(blob_store, keep=(_hash(2),), max_bytes=350, max_entries=100)
+    # 350B의 90%(315B)까지: 참조 없고 오래된 순 3, 4 -> 2(keep)와 0(참조)은 남김
+    expected = sorted([_hash(0), _hash(1), _hash(2)])
+    if _remaining(blob_store) != expected:
+        failures.append(f"LRU 정리 결과: {_remaining(blob_store)} (기대 {expected})")
+    if len(evicted) != 2:
+        failures.append(f"LRU 정리된 URL 수: {len(evicted)} (기대 2)")
+    usage = image_cache.load_usage()
+    if usage != {"bytes": 3 * IMAGE_BYTES, "images": 3}:
+        failures.append(f"정리 후 합계: {usage}")
+
+
+def check_refs_evicted_last(failures):
+    blob_store = _fresh_cache(3)
+    image_cache.change_refs([f"https://blob.local/cached_images/{_hash(0)}.png"])
+    image_cache.enforce_quota(blob_store, max_bytes=100, max_entries=100)
+    # 90B까지 줄여야 하므로 참조된 이미지까지 모두 지워짐. 참조 없는 것 먼저(1, 2), 그다음 0
+    if _remaining(blob_store):
+        failures.append(f"참조 이미지 정리 후 남은 이미지: {_remaining(blob_store)}")
+
+
+def check_lfu_order(failures):
+    original_policy = image_cache.IMAGE_CACHE_EVICTION
+    image_cache.IMAGE_CACHE_EVICTION = "lfu"
+    try:
+        blob_store = _fresh_cache(3)
+        for _ in range(3):
+            image_cache.touch(f"cached_images/{_hash(0)}.png")
+        image_cache.touch(f"cached_images/{_hash(2)}.png")
+        image_cache.enforce_quota(blob_store, max_bytes=250, max_entries=100)
+        # 225B까지: 사용 횟수가 가장 적은 1번만 지움
+        expected = sorted([_hash(0), _hash(2)])
+        if _remaining(blob_store) != expected:
+            failures.append(f"LFU 정리 결과: {_remaining(blob_store)} (기대 {expected})")
+    finally:
+        image_cache.IMAGE_CACHE_EVICTION = original_policy
+
+
+def check_unindexed_blobs(failures):
+    blob_store = _fresh_cache(2)
+    # 인덱스에 없는 이미지 (다른 인스턴스가 올리고 기록을 잃은 경우): 가장 먼저 지워져야 함
+    blob_store.put(pathname=f"cached_images/{_hash(9)}.png", body=b"x" * IMAGE_BYTES)
+    image_cache.enforce_quota(blob_store, max_bytes=150, max_entries=100)
+    # 합계(인덱스 기준 200B)가 제한을 넘으면 목록 기준 300B에서 135B까지: 9번(기록 없음), 0번 순으로 정리
+    if _remaining(blob_store) != [_hash(1)]:
+        failures.append(f"인덱스에 없는 이미지 정리 결과: {_remaining(blob_store)} (기대 {[_hash(1)]})")
+    if image_cache.load_usage() != {"bytes": IMAGE_BYTES, "images": 1}:
+        failures.append(f"목록 기준으로 맞춘 합계: {image_cache.load_usage()}")
+
+
+def check_paging_and_delete_all(failures):
+    blob_store = _fresh_cache(7)
+    pages = list(image_cache.iter_pages(blob_store, limit=3))
+    listed = [blob["pathname"] for page in pages for blob in page["blobs"]]
+    if len(pages) != 3 or len(listed) != 7 or len(set(listed)) != 7:
+        failures.append(f"페이지 넘김: 페이지 {len(pages)}개, Blob {len(listed)}개")
+
+    rebuilt = image_cache.rebuild_index(blob_store, limit=3)
+    if (rebuilt["bytes"], rebuilt["images"]) != (7 * IMAGE_BYTES, 7):
+        failures.append(f"rebuild_index 합계: {rebuilt}")
+
+    deleted = image_cache.delete_all(blob_store, limit=3)
+    if deleted != 7 or _remaining(blob_store):
+        failures.append(f"delete_all: {deleted}개 삭제, 남은 이미지 {_remaining(blob_store)}")
+    if image_cache.load_entry(_hash(0)) is not None or image_cache.load_usage()["bytes"] != 0:
+        failures.append("delete_all 후 인덱스가 비워지지 않았습니다.")
+
+
+def main():
+    failures = []
+    for check in (check_lru_order, check_refs_evicted_last, check_lfu_order,
+                  check_unindexed_blobs, check_paging_and_delete_all):
+        check(failures)
+    if failures:
+        print("이미지 캐시 검사 실패:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("이미지 캐시 검사 통과.")
+
+
+if __name__ == "__main__":
+    main()
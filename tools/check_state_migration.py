@@ -0,0 +1,80 @@
+# check_state_migration.py
+"""
+저장된 예전 형식 게임 상태 로드 검사 (가짜 KV 사용, API 호출 없음)
+
+game_state_manager.load_game_state가 예전 저장 형식을 잃지 않고 새 형식으로 바꾸는지 확인합니다.
+- 이름 목록 인벤토리 -> 이름별 개수 (중복 이름은 개수로 합침)
+- active_quests에 남은 완료 퀘스트 -> 완료 보관함
+실패하면 종료 코드 1.
+
+사용 예:
+python tools/check_state_migration.py
+"""
+
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import game_state_manager as gsm
+from backend.storage import KVStorage
+from tools.fakes import InMemoryKV
+
+
+def _load_saved(player_data_overrides):
+    """player_data 일부를 바꾼 상태를 KV에 저장하고 load_game_state로 다시 읽습니다."""
+    kv = InMemoryKV()
+    gsm.set_storage(KVStorage(lambda: kv))
+    state = copy.deepcopy(gsm.DEFAULT_GAME_STATE)
+    state["player_data"].update(player_data_overrides)
+    kv.set(gsm.GAME_STATE_KV_KEY, json.dumps(state, ensure_ascii=False))
+    with contextlib.redirect_stdout(io.StringIO()):  # [LOAD_STATE] 로그 억제
+        return gsm.load_game_state(deserialize=False)
+
+
+def check_legacy_inventory_list(failures):
+    loaded = _load_saved({"inventory": ["지식의 파편", "물약", "물약"]})
+    counts = {name: entry.get("count") for name, entry in loaded["player_data"]["inventory"].items()}
+    expected = {"지식의 파편": 1, "물약": 2}
+    if counts != expected:
+        failures.append(f"예전 인벤토리 목록 변환: {counts} (기대 {expected})")
+
+
+def check_stacked_inventory_kept(failures):
+    inventory = {"물약": {"count": 3, "acquired_turn": 4}}
+    loaded = _load_saved({"inventory": copy.deepcopy(inventory)})
+    if loaded["player_data"]["inventory"] != inventory:
+        failures.append(f"새 형식 인벤토리가 바뀌었습니다: {loaded['player_data']['inventory']}")
+
+
+def check_completed_quests_archived(failures):
+    quests = [
+        {"name": "매일 명상", "description": "10분 명상", "status": "진행중"},
+        {"name": "독서 20분", "description": "책 읽기", "status": "완료"},
+    ]
+    loaded = _load_saved({"active_quests": quests})
+    active = [quest["name"] for quest in loaded["player_data"]["active_quests"]]
+    completed = [quest["name"] for quest in loaded["player_data"].get("completed_quests", [])]
+    if active != ["매일 명상"] or completed != ["독서 20분"]:
+        failures.append(f"완료 퀘스트 보관: 진행 중 {active}, 완료 {completed}")
+
+
+def main():
+    failures = []
+    for check in (check_legacy_inventory_list, check_stacked_inventory_kept, check_completed_quests_archived):
+        check(failures)
+    if failures:
+        print("상태 변환 검사 실패:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("상태 변환 검사 통과.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# fakes.py
+"""
+벤치마크/오프라인 실행용 가짜 백엔드
+
+- InMemoryKV: vercel_kv.KV와 같은 get/set 인터페이스의 인메모리 저장소
+- ScriptedGeminiClient: 미리 정한 응답을 돌려주는 Gemini 클라이언트 (지연 시간 설정 가능)
+- InMemoryBlobStore: vercel_blob의 put/head/list/delete를 흉내 내는 인메모리 Blob 저장소
+- FakeImageAPIServer: OpenAI 이미지 생성 API를 흉내 내는 로컬 HTTP 스텁 서버
+
+사용 예:
+gsm.set_kv_store(InMemoryKV())
+gem_client_module.set_gemini_client(ScriptedGeminiClient(["【GM】 좋아요!"], latency=0.2))
+openai_image_client.set_blob_store(InMemoryBlobStore())
+"""
+
+import base64
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# 1x1 투명 PNG
+TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+class InMemoryKV:
+    """vercel_kv.KV 대체용 인메모리 KV."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._data = {}
+        self._lock = threading.Lock()
+        self.get_count = 0
+        self.set_count = 0
+
+    def get(self, key):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.get_count += 1
+            return self._data.get(key)
+
+    def set(self, key, value):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.set_count += 1
+            self._data[key] = value
+        return True
+
+
+class _ScriptedModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model=None, contents=None, config=None):
+        return self._client._next_response(contents)
+
+
+class ScriptedGeminiClient:
+    """genai.Client 대체용. 스크립트된 응답을 순서대로 반복해서 돌려줍니다.
+
+    latency: 호출당 지연 시간(초)
+    pad_to: 응답 텍스트를 이 길이(문자 수)까지 늘려 응답 크기를 조절합니다.
+    """
+
+    def __init__(self, responses, latency=0.0, pad_to=0):
+        if not responses:
+            raise ValueError("스크립트 응답이 최소 하나 필요합니다.")
+        self.latency = latency
+        self.pad_to = pad_to
+        self._responses = itertools.cycle(responses)
+        self._lock = threading.Lock()
+        self.call_count = 0
+        self.last_request_chars = 0
+        self.models = _ScriptedModels(self)
+
+    def _next_response(self, contents):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.call_count += 1
+            text = next(self._responses)
+        self.last_request_chars = sum(
+            len(part.text or "") for content in (contents or []) for part in (content.parts or [])
+        )
+        if self.pad_to and len(text) < self.pad_to:
+            text = text + "\n" + "✨" * (self.pad_to - len(text) - 1)
+        return SimpleNamespace(text=text)
+
+
+class InMemoryBlobStore:
+    """vercel_blob 모듈 대체용 인메모리 Blob 저장소."""
+
+    def __init__(self, base_url="https://blob.local"):
+        self.base_url = base_url
+        self._blobs = {}
+        self._lock = threading.Lock()
+
+    def put(self, pathname, body, add_random_suffix=False, **kwargs):
+        with self._lock:
+            self._blobs[pathname] = bytes(body)
+        return {"url": f"{self.base_url}/{pathname}", "pathname": pathname, "size": len(body)}
+
+    def head(self, pathname, **kwargs):
+        with self._lock:
+            body = self._blobs.get(pathname)
+        if body is None:
+            error = Exception(f"BlobNotFoundError: {pathname}")
+            error.status_code = 404
+            raise error
+        return {"url": f"{self.base_url}/{pathname}", "pathname": pathname, "size": len(body)}
+
+    def list(self, prefix="", limit=1000, cursor=None, **kwargs):
+        """pathname 순으로 한 페이지. cursor는 다음 페이지의 시작 위치입니다."""
+        with self._lock:
+            pathnames = sorted(p for p in self._blobs if p.startswith(prefix))
+            start = int(cursor or 0)
+            page = pathnames[start:start + limit]
+            blobs = [
+                {"url": f"{self.base_url}/{p}", "pathname": p, "size": len(self._blobs[p])} for p in page
+            ]
+        has_more = start + limit < len(pathnames)
+        return {"blobs": blobs, "cursor": str(start + limit) if has_more else None, "hasMore": has_more}
+
+    def delete(self, urls, **kwargs):
+        if isinstance(urls, str):
+            urls = [urls]
+        with self._lock:
+            for url in urls:
+                self._blobs.pop(url[len(self.base_url) + 1:], None)
+
+
+class FakeImageAPIServer:
+    """OpenAI 이미지 생성 엔드포인트를 흉내 내는 로컬 HTTP 서버.
+
+    with FakeImageAPIServer(latency=0.5) as server:
+        os.environ["OPENAI_IMAGE_API_URL"] = server.url
+    """
+
+    def __init__(self, latency=0.0, image_bytes=TINY_PNG, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.request_count = 0
+        payload = json.dumps({"data": [{"b64_json": base64.b64encode(image_bytes).decode()}]}).encode()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/images/generations"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,41 @@
+# import_game_data.py
+"""
+game_data.json 마이그레이션 도구
+
+예전 데스크톱 버전이 만든 game_data.json(직렬화된 게임 상태)을 저장소로 가져옵니다.
+기본적으로 config의 STORAGE_BACKEND로 설정된 저장소를 사용합니다.
+
+사용 예:
+python tools/import_game_data.py                                  # game_data.json -> 설정된 저장소
+python tools/import_game_data.py old_save.json --sqlite game_data.db
+"""
+
+import argparse
+import os
+import sys
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import game_state_manager as gsm
+from backend.storage import SQLiteStorage, import_game_data_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="game_data.json을 게임 상태 저장소로 가져옵니다.")
+    parser.add_argument("json_path", nargs="?", default="game_data.json", help="가져올 파일 (기본: game_data.json)")
+    parser.add_argument("--sqlite", help="설정 대신 이 SQLite 파일로 가져옵니다")
+    parser.add_argument("--key", default=gsm.GAME_STATE_KV_KEY, help="게임 상태 키")
+    args = parser.parse_args()
+
+    storage = SQLiteStorage(args.sqlite) if args.sqlite else gsm.get_storage()
+    try:
+        turns = import_game_data_json(args.json_path, storage, args.key)
+    except (OSError, ValueError) as e:
+        print(f"가져오기 실패: {e}")
+        sys.exit(1)
+    print(f"{args.json_path} -> {storage.name} 저장소 (키: {args.key}), 히스토리 {turns}턴 가져옴")
+
+
+if __name__ == "__main__":
+    main()
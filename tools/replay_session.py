@@ -0,0 +1,247 @@
+# replay_session.py
+"""
+기록된 세션 리플레이 도구 (API 호출 없음)
+
+game_data.json 같은 세션 기록의 GM 응답을 game_logic 파서에 그대로 다시 흘려보내
+최종 상태가 기록과 일치하는지 확인하고, 처리량(turns/sec)을 측정합니다.
+합성 세션을 프로세스 풀로 대량 실행하여 파서/상태 변경의 회귀·성능 테스트도 할 수 있습니다.
+
+사용 예:
+python tools/replay_session.py                                  # game_data.json 리플레이 + 검증
+python tools/replay_session.py --repeat 200                     # 처리량 측정용 반복
+python tools/replay_session.py --synthetic 5000 --workers 8     # 합성 세션 5000개 병렬 실행
+python tools/replay_session.py --synthetic 5000 --save-baseline replay_baseline.json
+python tools/replay_session.py --synthetic 5000 --check-baseline replay_baseline.json
+"""
+
+import argparse
+import contextlib
+import copy
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 저장소 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import game_logic
+from backend import game_state_manager as gsm
+from backend.inventory import normalize_inventory
+
+# 리플레이 결과를 기록과 비교할 player_data 필드
+COMPARED_FIELDS = (
+    "level", "xp", "xp_to_next_level", "gold", "stat_points",
+    "inventory", "active_quests", "achievements", "title",
+)
+
+SYNTHETIC_QUEST_NAMES = [
+    "퀀트 강의 완강", "헬스장 유산소", "매일 명상", "두뇌세탁소 발표 준비",
+    "독서 20분", "방 정리하기", "영어 공부 1시간", "물 2리터 마시기",
+]
+SYNTHETIC_ITEMS = [
+    "지식의 파편", "강철 의지의 팔찌", "작은 HP 회복 물약", "행운의 토큰",
+    "집중의 룬", "명상의 구슬", "새벽의 깃털",
+]
+
+
+def _history_text(entry):
+    parts = entry.get("parts", [])
+    return "\n".join(part if isinstance(part, str) else part.get("text", "") for part in parts)
+
+
+def initial_player_data(recorded_player_data=None):
+    """리플레이 시작 상태를 만듭니다. 능력치는 GM 응답이 아니라 명령어로 정해지므로 기록에서 가져옵니다."""
+    player_data = copy.deepcopy(gsm.DEFAULT_PLAYER_DATA)
+    if recorded_player_data:
+        for key in ("name", "stats", "initial_setup_done", "current_class"):
+            if key in recorded_player_data:
+                player_data[key] = copy.deepcopy(recorded_player_data[key])
+    return player_data
+
+
+def replay_turns(gm_responses, player_data, game_state=None):
+    """GM 응답 목록을 순서대로 적용합니다. 생성될 이미지 프롬프트 목록을 반환합니다."""
+    if game_state is None:
+        game_state = {"player_data": player_data}
+    image_prompts = []
+    for gm_text in gm_responses:
+        changed_fields = set()
+        game_logic.parse_gm_response_for_updates(gm_text, player_data, game_state, changed_fields)
+        image_prompts.extend(game_logic.extract_image_prompts(gm_text))
+        game_logic.check_achievements(player_data, game_state, changed_fields)
+    return image_prompts
+
+
+def _comparable(field, value):
+    # 인벤토리는 예전 기록(이름 목록)과 새 형식(dict)을 같은 형태로: {이름: 개수}.
+    # 기록에는 얻은 턴이 없으므로 개수만 비교
+    if field == "inventory":
+        return {name: entry.get("count", 1) for name, entry in normalize_inventory(value).items()}
+    return value
+
+
+def diff_player_data(replayed, recorded):
+    """비교 대상 필드 중 값이 다른 것들을 {필드: (리플레이, 기록)}으로 반환합니다."""
+    return {
+        field: (replayed.get(field), recorded.get(field))
+        for field in COMPARED_FIELDS
+        if field in recorded and _comparable(field, replayed.get(field)) != _comparable(field, recorded.get(field))
+    }
+
+
+def state_digest(player_data):
+    """비교 대상 필드의 안정적인 해시 (회귀 비교용)."""
+    snapshot = {field: player_data.get(field) for field in COMPARED_FIELDS}
+    return hashlib.sha256(json.dumps(snapshot, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+def synthetic_gm_response(rng, quest_names, recorded_responses):
+    """태그가 섞인 합성 GM 응답 하나를 만듭니다."""
+    if recorded_responses and rng.random() < 0.3:
+        return rng.choice(recorded_responses)
+
+    lines = ["【GM】 좋습니다, 모험가님! 오늘도 한 걸음 나아가셨군요."]
+    roll = rng.random()
+    if roll < 0.3 or not quest_names:
+        quest = rng.choice(SYNTHETIC_QUEST_NAMES) + f" {rng.randint(1, 50)}"
+        quest_names.append(quest)
+        lines.append(f"[QUEST_ADD: {quest} | 합성 퀘스트 설명 | 진행중]")
+    elif roll < 0.6:
+        quest = rng.choice(quest_names)
+        done = rng.randint(1, 4)
+        lines.append(f"[QUEST_UPDATE: {quest} | {done}/4 완료 | 진행 상황 갱신]")
+    else:
+        quest = quest_names.pop(rng.randrange(len(quest_names)))
+        reward = game_logic.calculate_quest_reward(rng.choice(["easy", "normal", "hard", "expert"]), 1)
+        lines.append(f"[QUEST_COMPLETE: {quest}]")
+        reward_text = f"XP +{reward['xp']}, 골드 +{reward['gold']}"
+        if rng.random() < 0.5:
+            item = rng.choice(SYNTHETIC_ITEMS)
+            reward_text += f", 아이템: {item}"
+            lines.append(f"(이미지 생성: {item}, 게임 아이템 카드 스타일, 판타지풍, 빛나는 효과)")
+        lines.append(f"[REWARD: {reward_text}]")
+    return "\n".join(lines)
+
+
+def run_synthetic_session(seed, turns, recorded_responses=()):
+    """시드로 결정되는 합성 세션 하나를 실행하고 (시드, 턴 수, 상태 해시)를 반환합니다."""
+    rng = random.Random(seed)
+    quest_names = []
+    gm_responses = [synthetic_gm_response(rng, quest_names, recorded_responses) for _ in range(turns)]
+    player_data = initial_player_data()
+    with contextlib.redirect_stdout(io.StringIO()):  # 파서의 [DEBUG] 출력 억제
+        replay_turns(gm_responses, player_data)
+    return seed, turns, state_digest(player_data)
+
+
+def _run_synthetic_batch(args):
+    seeds, turns, recorded_responses = args
+    return [run_synthetic_session(seed, turns, recorded_responses) for seed in seeds]
+
+
+def replay_recorded(path, repeat):
+    with open(path, "r", encoding="utf-8") as f:
+        recorded = json.load(f)
+
+    gm_responses = [_history_text(entry) for entry in recorded.get("history", []) if entry.get("role") == "model"]
+    recorded_player_data = recorded.get("player_data", {})
+
+    player_data = initial_player_data(recorded_player_data)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        image_prompts = replay_turns(gm_responses, player_data)
+        for _ in range(repeat - 1):
+            replay_turns(gm_responses, initial_player_data(recorded_player_data))
+    elapsed = time.perf_counter() - start
+
+    total_turns = len(gm_responses) * repeat
+    print(f"세션: {path}")
+    print(f"GM 턴: {len(gm_responses)}개 x {repeat}회 = {total_turns}턴, {elapsed:.4f}초 "
+          f"({total_turns / elapsed if elapsed else float('inf'):,.0f} turns/sec)")
+    print(f"이미지 프롬프트: {len(image_prompts)}개")
+
+    differences = diff_player_data(player_data, recorded_player_data)
+    if differences:
+        print("기록된 상태와 불일치:")
+        for field, (replayed_value, recorded_value) in differences.items():
+            print(f"  - {field}: 리플레이={replayed_value!r} / 기록={recorded_value!r}")
+        return False
+    print("기록된 상태와 일치합니다.")
+    return True
+
+
+def replay_synthetic(count, turns, workers, recorded_path, save_baseline, check_baseline):
+    recorded_responses = ()
+    if recorded_path and os.path.exists(recorded_path):
+        with open(recorded_path, "r", encoding="utf-8") as f:
+            recorded_responses = tuple(
+                _history_text(entry) for entry in json.load(f).get("history", []) if entry.get("role") == "model"
+            )
+
+    seeds = list(range(count))
+    batch_size = max(1, count // (workers * 8))
+    batches = [(seeds[i:i + batch_size], turns, recorded_responses) for i in range(0, count, batch_size)]
+
+    start = time.perf_counter()
+    results = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch_result in executor.map(_run_synthetic_batch, batches):
+                results.extend(batch_result)
+    else:
+        for batch in batches:
+            results.extend(_run_synthetic_batch(batch))
+    elapsed = time.perf_counter() - start
+
+    total_turns = sum(result_turns for _, result_turns, _ in results)
+    digests = {str(seed): digest for seed, _, digest in results}
+    print(f"합성 세션: {count}개 x {turns}턴, 워커 {workers}개")
+    print(f"총 {total_turns}턴, {elapsed:.3f}초 ({total_turns / elapsed if elapsed else float('inf'):,.0f} turns/sec)")
+
+    if save_baseline:
+        with open(save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"turns": turns, "digests": digests}, f, indent=2)
+        print(f"기준 결과 저장: {save_baseline}")
+
+    if check_baseline:
+        with open(check_baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("turns") != turns:
+            print(f"기준 결과의 턴 수({baseline.get('turns')})가 현재({turns})와 다릅니다.")
+            return False
+        changed = [seed for seed, digest in digests.items()
+                   if seed in baseline["digests"] and baseline["digests"][seed] != digest]
+        if changed:
+            print(f"기준 결과와 다른 세션 {len(changed)}개 (예: 시드 {', '.join(changed[:10])})")
+            return False
+        print("기준 결과와 일치합니다.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록된 세션을 API 호출 없이 game_logic으로 리플레이합니다.")
+    parser.add_argument("session", nargs="?", default="game_data.json", help="세션 기록 파일 (기본: game_data.json)")
+    parser.add_argument("--repeat", type=int, default=1, help="처리량 측정을 위한 반복 횟수")
+    parser.add_argument("--synthetic", type=int, default=0, help="실행할 합성 세션 수")
+    parser.add_argument("--turns", type=int, default=50, help="합성 세션당 턴 수")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="합성 세션 프로세스 수")
+    parser.add_argument("--save-baseline", help="합성 세션 결과 해시를 저장할 파일")
+    parser.add_argument("--check-baseline", help="합성 세션 결과를 비교할 기준 파일")
+    args = parser.parse_args()
+
+    ok = True
+    if args.synthetic:
+        ok = replay_synthetic(args.synthetic, args.turns, args.workers, args.session,
+                              args.save_baseline, args.check_baseline)
+    else:
+        ok = replay_recorded(args.session, max(1, args.repeat))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()